@@ -0,0 +1,45 @@
+"""
+Compare serial transforming with `svgpdtools.batch.transform`.
+
+usage: python benchmarks/batch.py [number-of-jobs] [max-workers]
+"""
+import random, sys, time, os
+
+import svgpdtools as PD
+
+
+def make_pathdata(rnd: random.Random, n: int) -> str:
+    d = f'M {rnd.uniform(0, 100):.3f},{rnd.uniform(0, 100):.3f}'
+    for _ in range(n):
+        if rnd.random() < .5:
+            d += f' l {rnd.uniform(-10, 10):.3f},{rnd.uniform(-10, 10):.3f}'
+        else:
+            d += ' c' + ''.join(f' {rnd.uniform(-10, 10):.3f},{rnd.uniform(-10, 10):.3f}' for _ in range(3))
+    return d + ' z'
+
+
+def bench(label: str, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f'{label:<10} {elapsed:8.3f}s')
+    return elapsed
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    rnd = random.Random(0)
+    t = 'translate(10,20) rotate(30) scale(2)'
+    jobs = [(make_pathdata(rnd, 50), t) for _ in range(count)]
+
+    print(f'jobs: {count}, workers: {workers}, GIL enabled: {PD.batch.gil_enabled()}')
+    serial = bench('serial', lambda: PD.batch.transform(jobs, executor='serial', precision=3))
+    for kind in ('thread', 'process'):
+        elapsed = bench(kind, lambda: PD.batch.transform(
+            jobs, executor=kind, max_workers=workers, precision=3))
+        print(f'{"":<10} x{serial / elapsed:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Compare `polyline.flatten_many` with and without NumPy.
+
+usage: python benchmarks/flatten.py [number-of-paths] [tolerance]
+"""
+import random, sys, time
+from unittest import mock
+
+import svgpdtools as PD
+from svgpdtools.polyline import flatten_many
+
+
+def make_pathdata(rnd: random.Random) -> PD.PathData:
+    u = lambda: rnd.uniform(-100, 100)
+    d = f'M {u():.3f},{u():.3f}'
+    for _ in range(20):
+        if rnd.random() < .7:
+            d += ' C' + ''.join(f' {u():.3f},{u():.3f}' for _ in range(3))
+        else:
+            d += f' Q {u():.3f},{u():.3f} {u():.3f},{u():.3f}'
+    return PD.pathdata_from_string(d)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    tolerance = float(sys.argv[2]) if len(sys.argv) > 2 else .1
+    rnd = random.Random(0)
+    pds = [make_pathdata(rnd) for _ in range(count)]
+
+    start = time.perf_counter()
+    coords, _, _ = flatten_many(pds, tolerance)
+    print(f'numpy:  {time.perf_counter() - start:.4f}s ({len(coords) // 2} points)')
+
+    with mock.patch.dict(sys.modules, {'numpy': None}):
+        start = time.perf_counter()
+        flatten_many(pds, tolerance)
+        print(f'python: {time.perf_counter() - start:.4f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Measure the time and the peak memory of `PathData.normalize`.
+
+usage: python benchmarks/normalize.py [number-of-commands]
+"""
+import random, sys, time, tracemalloc
+
+import svgpdtools as PD
+
+
+def make_pathdata(rnd: random.Random, n: int) -> str:
+    d = 'M 0,0 10,10'
+    for _ in range(n):
+        r = rnd.random()
+        if r < .3:
+            d += f' l {rnd.uniform(-10, 10):.3f},{rnd.uniform(-10, 10):.3f} 1,2'
+        elif r < .5:
+            d += f' h {rnd.uniform(-10, 10):.3f} v 3'
+        elif r < .8:
+            d += ' c' + ''.join(f' {rnd.uniform(-10, 10):.3f},{rnd.uniform(-10, 10):.3f}' for _ in range(3))
+        elif r < .9:
+            d += ' m 3,4 5,6'
+        else:
+            d += ' z'
+    return d
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    d = make_pathdata(random.Random(0), count)
+    repeat = 5
+
+    pds = [PD.pathdata_from_string(d) for _ in range(repeat)]
+    start = time.perf_counter()
+    for pd in pds:
+        pd.normalize(collapse_hv_lineto=True)
+    print(f'time: {(time.perf_counter() - start) / repeat:.4f}s')
+
+    pd = PD.pathdata_from_string(d)
+    tracemalloc.start()
+    pd.normalize(collapse_hv_lineto=True)
+    print(f'peak: {tracemalloc.get_traced_memory()[1] / 1024:.0f} KiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,8 @@ from .transform import Transform
 from .pathdata import PathData
 import svgpdtools.utils as utils
 import svgpdtools.parser as parser
+from .fastpath import transform_d, normalize_d
+import svgpdtools.batch as batch
 
 
 __version__ = "0.1.2"
@@ -0,0 +1,170 @@
+"""
+Transform many pathdata strings in parallel.
+
+On a free-threaded CPython build (e.g. 3.13t) the jobs run on a thread pool
+and scale across cores. On a build with the GIL, threads cannot run Python
+code in parallel, so a process pool is used instead.
+"""
+from __future__ import annotations
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass
+from collections.abc import Sequence
+from typing import Literal, Optional, Union
+import os, sys
+
+from .transform import Transform
+from .fastpath import transform_d
+from .corpus import Corpus
+from .pathdata import temporary_repr_relative
+from .utils import current_precision, temporary_precision
+from . import parser
+
+
+Job = tuple[str, Union[str, Transform]]
+ExecutorKind = Literal['auto', 'thread', 'process', 'serial']
+
+
+@dataclass(frozen=True)
+class _Options:
+    precision: int
+    repr_relative: bool
+    repr_absolute: bool
+    noexception: bool
+    collapse_hv_lineto: bool
+    collapse_elliptical_arc: bool
+    corpus: Optional[str]
+
+
+def gil_enabled() -> bool:
+    """
+    Return False only when running on a free-threaded build with the GIL
+    actually disabled.
+    """
+    is_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_enabled is None else is_enabled()
+
+
+def executor_pool(executor: ExecutorKind, max_workers: Optional[int],
+                  jobs: int) -> tuple[Optional[Executor], int]:
+    """
+    Return a new pool of workers for a number of jobs and the number of
+    its workers. The pool is None when the jobs should run serially: for
+    'serial', one worker or one job. 'auto' uses threads on a
+    free-threaded build and processes otherwise.
+    """
+    workers = max_workers or os.cpu_count() or 1
+    if executor == 'auto':
+        executor = 'thread' if not gil_enabled() else 'process'
+    if executor == 'serial' or workers == 1 or jobs == 1:
+        return None, 1
+    if executor == 'thread':
+        return ThreadPoolExecutor(max_workers=workers), workers
+    if executor == 'process':
+        return ProcessPoolExecutor(max_workers=workers), workers
+    raise ValueError(f'Unknown executor: {executor}')
+
+
+def transform(jobs: Sequence[Job], *,
+              executor: ExecutorKind = 'auto',
+              max_workers: Optional[int] = None,
+              chunksize: Optional[int] = None,
+              precision: Optional[int] = None,
+              repr_relative=False,
+              repr_absolute=False,
+              noexception=False,
+              collapse_hv_lineto=False,
+              collapse_elliptical_arc=False,
+              corpus: Union[str, os.PathLike, Corpus, None] = None) -> list[str]:
+    """
+    Transform each `(d, transform)` job and return the formatted pathdata
+    strings in the order of `jobs`. A transform is a `svgpdtools.Transform`
+    object or a string of SVG transform functions.
+
+    The result of each job is the same as::
+
+        pd = svgpdtools.pathdata_from_string(d)
+        pd.transform(t, noexception=..., collapse_hv_lineto=...,
+                     collapse_elliptical_arc=...)
+        str(pd)
+
+    :param executor: 'thread', 'process' or 'serial'. 'auto' uses threads
+        on a free-threaded build and processes otherwise. (default 'auto')
+    :param max_workers: the number of workers. (default `os.cpu_count()`)
+    :param chunksize: the number of jobs sent to a worker at once.
+    :param precision: the precision for formatting. (default the current
+        precision of the calling thread)
+    :param repr_relative: if True, show all commands in relative coords.
+    :param repr_absolute: if True, show all commands in absolute coords.
+    :param corpus: a `svgpdtools.corpus.Corpus` or the path of its file.
+        The pathdata of the strings in the corpus are read from it instead
+        of parsed; each worker maps the file. A float32 corpus gives the
+        rounded coords (see `svgpdtools.columnar`).
+
+    The other keyword arguments are passed to `PathData.transform`.
+    A `PDTransformFailed` raised by a job is re-raised by this function.
+    """
+    options = _Options(
+        precision = current_precision() if precision is None else precision,
+        repr_relative = repr_relative,
+        repr_absolute = repr_absolute,
+        noexception = noexception,
+        collapse_hv_lineto = collapse_hv_lineto,
+        collapse_elliptical_arc = collapse_elliptical_arc,
+        corpus = None if corpus is None else str(corpus.path if isinstance(corpus, Corpus) else corpus),
+    )
+    if not jobs:
+        return []
+
+    pool, workers = executor_pool(executor, max_workers, len(jobs))
+    if pool is None:
+        return _run_chunk(list(jobs), options)
+
+    if chunksize is None:
+        chunksize = max(1, len(jobs) // (workers * 4))
+    chunks = [jobs[i:i+chunksize] for i in range(0, len(jobs), chunksize)]
+    results: list[str] = []
+    with pool:
+        for rs in pool.map(_run_chunk, chunks, [options] * len(chunks)):
+            results.extend(rs)
+    return results
+
+
+def _run_chunk(jobs: Sequence[Job], options: _Options) -> list[str]:
+    if options.corpus is None:
+        return _run_jobs(jobs, options, None)
+    with Corpus(options.corpus) as corpus:
+        return _run_jobs(jobs, options, corpus)
+
+
+def _run_jobs(jobs: Sequence[Job], options: _Options, corpus: Optional[Corpus]) -> list[str]:
+    transforms: dict[str, Transform] = {}
+    results = []
+    with temporary_precision(options.precision):
+        for d, t in jobs:
+            if isinstance(t, str):
+                if t not in transforms:
+                    transforms[t] = Transform.concat(parser.transforms(t))
+                t = transforms[t]
+
+            pd = None if corpus is None else corpus.get(d)
+            if pd is not None:
+                pd.transform(t,
+                             noexception=options.noexception,
+                             collapse_hv_lineto=options.collapse_hv_lineto,
+                             collapse_elliptical_arc=options.collapse_elliptical_arc)
+                if options.repr_absolute:
+                    pd.absolutize()
+                with temporary_repr_relative(options.repr_relative):
+                    results.append(str(pd))
+                continue
+
+            results.append(transform_d(
+                d, t,
+                noexception=options.noexception,
+                collapse_hv_lineto=options.collapse_hv_lineto,
+                collapse_elliptical_arc=options.collapse_elliptical_arc,
+                repr_relative=options.repr_relative,
+                repr_absolute=options.repr_absolute,
+            ))
+
+    return results
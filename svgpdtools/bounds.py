@@ -0,0 +1,257 @@
+"""
+Exact bounding boxes of segments and pathdata.
+
+The extrema of beziers are solved analytically from the roots of their
+derivatives, and those of elliptical arcs from the center
+parameterization, so no flattening is needed. `bboxes()` computes the
+boxes of many pathdata at once, vectorized with NumPy when it is
+installed.
+"""
+from __future__ import annotations
+from array import array
+from collections.abc import Iterable, Sequence
+from typing import Optional
+import math
+
+from .graphics import Rect
+from .segments import Segment, iter_indexed_segments, fill_segment_buffers, quadratic_roots, SEGMENT_SIZES
+from .ellipticalarc import center_parameterization
+from .command import Command
+
+
+# (min_x, min_y, max_x, max_y)
+Box = tuple[float, float, float, float]
+
+
+def segment_bbox(seg: Segment) -> Box:
+    """
+    Return the bounding box of a segment record as
+    `(min_x, min_y, max_x, max_y)`. A moveto record is a point.
+    """
+    op = seg[0]
+    if op == 'M':
+        _, x, y = seg
+        return x, y, x, y
+    if op == 'L' or op == 'Z':
+        _, x0, y0, x, y = seg
+        return min(x0, x), min(y0, y), max(x0, x), max(y0, y)
+    if op == 'C':
+        _, x0, y0, x1, y1, x2, y2, x, y = seg
+        min_x, max_x = _cubic_extent(x0, x1, x2, x)
+        min_y, max_y = _cubic_extent(y0, y1, y2, y)
+        return min_x, min_y, max_x, max_y
+    if op == 'Q':
+        _, x0, y0, x1, y1, x, y = seg
+        min_x, max_x = _quadratic_extent(x0, x1, x)
+        min_y, max_y = _quadratic_extent(y0, y1, y)
+        return min_x, min_y, max_x, max_y
+    if op == 'A':
+        return _arc_bbox(*seg[1:])
+    raise Exception(f'Unknown segment: {op}')
+
+
+def command_bboxes(cmds: Sequence[Command]) -> list[Optional[Box]]:
+    """
+    Return the bounding box of each command. A command which has no data
+    has None.
+    """
+    boxes: list[Optional[Box]] = [None] * len(cmds)
+    for i, seg in iter_indexed_segments(cmds):
+        box = segment_bbox(seg)
+        prev = boxes[i]
+        if prev is not None:
+            box = union_box(prev, box)
+        boxes[i] = box
+    return boxes
+
+
+def bboxes(pds: Iterable[Sequence[Command]]) -> list[Optional[Rect]]:
+    """
+    Return the bounding box of each pathdata, or None for an empty one.
+    When NumPy is installed, the segments of all pathdata are packed into
+    buffers and their boxes are computed as arrays.
+    """
+    ops = bytearray()
+    coords = array('d')
+    offsets = [0]
+    for pd in pds:
+        fill_segment_buffers(pd, ops, coords)
+        offsets.append(len(ops))
+
+    try:
+        import numpy
+    except ImportError:
+        return _bboxes_from_buffers(ops, coords, offsets)
+    return _bboxes_from_buffers_numpy(numpy, ops, coords, offsets)
+
+
+def union_box(a: Box, b: Box) -> Box:
+    """
+    Return the smallest box containing both boxes.
+    """
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def _cubic_extent(p0: float, p1: float, p2: float, p3: float) -> tuple[float, float]:
+    lo, hi = (p0, p3) if p0 < p3 else (p3, p0)
+    if lo <= p1 <= hi and lo <= p2 <= hi:
+        # the curve is in the hull of its control points
+        return lo, hi
+
+    # roots of the derivative divided by 3
+    a = -p0 + 3 * (p1 - p2) + p3
+    b = 2 * (p0 - 2 * p1 + p2)
+    c = p1 - p0
+    for t in quadratic_roots(a, b, c):
+        if 0 < t < 1:
+            mt = 1 - t
+            v = mt * mt * mt * p0 + 3 * mt * mt * t * p1 + 3 * mt * t * t * p2 + t * t * t * p3
+            lo, hi = min(lo, v), max(hi, v)
+    return lo, hi
+
+
+def _quadratic_extent(p0: float, p1: float, p2: float) -> tuple[float, float]:
+    lo, hi = (p0, p2) if p0 < p2 else (p2, p0)
+    if lo <= p1 <= hi:
+        return lo, hi
+
+    t = (p0 - p1) / (p0 - 2 * p1 + p2)
+    mt = 1 - t
+    v = mt * mt * p0 + 2 * mt * t * p1 + t * t * p2
+    return min(lo, v), max(hi, v)
+
+
+def _arc_bbox(x0: float, y0: float, rx: float, ry: float, rotation: float,
+              is_large_arc: bool, is_sweep: bool, x: float, y: float) -> Box:
+    min_x, min_y, max_x, max_y = min(x0, x), min(y0, y), max(x0, x), max(y0, y)
+    phi = math.radians(rotation)
+    center = center_parameterization(x0, y0, rx, ry, phi, bool(is_large_arc), bool(is_sweep), x, y)
+    if center is None:
+        return min_x, min_y, max_x, max_y
+
+    cx, cy, rx, ry, theta1, dtheta = center
+    cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+    # angles where dx/dtheta == 0 and dy/dtheta == 0
+    theta_x = math.atan2(-ry * sin_phi, rx * cos_phi)
+    theta_y = math.atan2(ry * cos_phi, rx * sin_phi)
+    for theta in (theta_x, theta_x + math.pi, theta_y, theta_y + math.pi):
+        if not _on_arc(theta, theta1, dtheta):
+            continue
+        cos_t, sin_t = math.cos(theta), math.sin(theta)
+        px = cx + rx * cos_phi * cos_t - ry * sin_phi * sin_t
+        py = cy + rx * sin_phi * cos_t + ry * cos_phi * sin_t
+        min_x, min_y = min(min_x, px), min(min_y, py)
+        max_x, max_y = max(max_x, px), max(max_y, py)
+    return min_x, min_y, max_x, max_y
+
+
+def _on_arc(theta: float, theta1: float, dtheta: float) -> bool:
+    two_pi = 2 * math.pi
+    if dtheta >= 0:
+        return (theta - theta1) % two_pi <= dtheta
+    return (theta1 - theta) % two_pi <= -dtheta
+
+
+def _bboxes_from_buffers(ops: bytearray, coords: array,
+                         offsets: list[int]) -> list[Optional[Rect]]:
+    results: list[Optional[Rect]] = []
+    seg_iter = _segments_from_buffers(ops, coords)
+    for start, end in zip(offsets, offsets[1:]):
+        box: Optional[Box] = None
+        for _ in range(start, end):
+            b = segment_bbox(next(seg_iter))
+            box = b if box is None else union_box(box, b)
+        results.append(None if box is None else Rect(*box))
+    return results
+
+
+def _segments_from_buffers(ops: bytearray, coords: array):
+    pos = 0
+    for op in ops:
+        c = chr(op)
+        n = SEGMENT_SIZES[c]
+        yield (c, *coords[pos:pos+n])
+        pos += n
+
+
+def _bboxes_from_buffers_numpy(np, ops: bytearray, coords: array,
+                               offsets: list[int]) -> list[Optional[Rect]]:
+    n = len(ops)
+    if n == 0:
+        return [None] * (len(offsets) - 1)
+
+    opcodes = np.frombuffer(bytes(ops), dtype=np.uint8)
+    values = np.frombuffer(coords, dtype=np.float64)
+    sizes = np.zeros(256, dtype=np.int64)
+    for c, size in SEGMENT_SIZES.items():
+        sizes[ord(c)] = size
+    starts = np.concatenate(([0], np.cumsum(sizes[opcodes])[:-1]))
+
+    # The last point of every record is its end point.
+    ends = starts + sizes[opcodes]
+    min_x = values[ends - 2].copy()
+    min_y = values[ends - 1].copy()
+    max_x, max_y = min_x.copy(), min_y.copy()
+
+    # The first point of every record but moveto is its start point.
+    sel = np.flatnonzero(opcodes != ord('M'))
+    _extend(np, min_x, max_x, sel, values[starts[sel]])
+    _extend(np, min_y, max_y, sel, values[starts[sel] + 1])
+
+    sel = np.flatnonzero(opcodes == ord('C'))
+    if len(sel):
+        s = starts[sel]
+        for axis, lo, hi in ((0, min_x, max_x), (1, min_y, max_y)):
+            p0, p1, p2, p3 = (values[s + k * 2 + axis] for k in range(4))
+            a = -p0 + 3 * (p1 - p2) + p3
+            b = 2 * (p0 - 2 * p1 + p2)
+            c = p1 - p0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                disc = b * b - 4 * a * c
+                sq = np.sqrt(np.where(disc < 0, np.nan, disc))
+                linear = np.abs(a) < 1e-12
+                t1 = np.where(linear, -c / b, (-b + sq) / (2 * a))
+                t2 = np.where(linear, np.nan, (-b - sq) / (2 * a))
+            for t in (t1, t2):
+                t = np.where((t > 0) & (t < 1), t, np.nan)
+                mt = 1 - t
+                v = mt * mt * mt * p0 + 3 * mt * mt * t * p1 + 3 * mt * t * t * p2 + t * t * t * p3
+                _extend(np, lo, hi, sel, v)
+
+    sel = np.flatnonzero(opcodes == ord('Q'))
+    if len(sel):
+        s = starts[sel]
+        for axis, lo, hi in ((0, min_x, max_x), (1, min_y, max_y)):
+            p0, p1, p2 = (values[s + k * 2 + axis] for k in range(3))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = (p0 - p1) / (p0 - 2 * p1 + p2)
+            t = np.where((t > 0) & (t < 1), t, np.nan)
+            mt = 1 - t
+            _extend(np, lo, hi, sel, mt * mt * p0 + 2 * mt * t * p1 + t * t * p2)
+
+    # arcs are few in practice, so they are computed one by one
+    for i in np.flatnonzero(opcodes == ord('A')).tolist():
+        s = int(starts[i])
+        box = _arc_bbox(*values[s:s+9].tolist())
+        min_x[i], min_y[i] = min(min_x[i], box[0]), min(min_y[i], box[1])
+        max_x[i], max_y[i] = max(max_x[i], box[2]), max(max_y[i], box[3])
+
+    bounds = np.asarray(offsets, dtype=np.int64)
+    nonempty = np.flatnonzero(bounds[1:] > bounds[:-1])
+    idx = bounds[:-1][nonempty]
+    reduced = zip(
+        np.minimum.reduceat(min_x, idx).tolist(),
+        np.minimum.reduceat(min_y, idx).tolist(),
+        np.maximum.reduceat(max_x, idx).tolist(),
+        np.maximum.reduceat(max_y, idx).tolist(),
+    )
+    results: list[Optional[Rect]] = [None] * (len(offsets) - 1)
+    for i, box in zip(nonempty.tolist(), reduced):
+        results[i] = Rect(*box)
+    return results
+
+
+def _extend(np, lo, hi, sel, v) -> None:
+    # NaNs in `v` are ignored by fmin/fmax
+    lo[sel] = np.fmin(lo[sel], v)
+    hi[sel] = np.fmax(hi[sel], v)
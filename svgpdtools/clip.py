@@ -0,0 +1,283 @@
+"""
+Clipping of pathdata to rectangles, and culling of tiny subpaths.
+
+Subpaths whose bounding boxes do not intersect the rectangle are dropped
+as a whole, using the bounding boxes cached by `PathData`. With `split`,
+the segments of subpaths crossing the boundary are split where they
+cross it, and the pieces outside are dropped. Split subpaths are opened,
+so splitting suits stroked geometry; the fills of those subpaths change.
+
+Culling drops subpaths whose bounding boxes are smaller than a pixel at
+a render resolution.
+"""
+from __future__ import annotations
+from collections.abc import Iterator, Sequence
+from typing import Optional
+import math
+
+from .command import Command, Moveto, Lineto, Curveto, EllipticalArc, Close
+from .ellipticalarc import EllipticalArcItem
+from .graphics import Point, Rect
+from .segments import Segment, iter_indexed_segments, prepared_segment, segment_point, quadratic_roots, \
+    split_bezier
+from .bounds import Box, segment_bbox, union_box
+
+
+def clipped_commands(cmds: Sequence[Command], boxes: Sequence[Optional[Box]],
+                     rect: Rect, *, split=False) -> list[Command]:
+    """
+    Return the commands of the subpaths intersecting `rect`. `boxes` are
+    the bounding boxes of the commands (see `bounds.command_bboxes`). The
+    commands should be absolutized.
+    """
+    records = list(iter_indexed_segments(cmds)) if split else []
+    k = 0
+    results: list[Command] = []
+    prev_kept = False
+    for start, end in subpath_ranges(cmds):
+        segs: list[Segment] = []
+        while k < len(records) and records[k][0] < end:
+            segs.append(records[k][1])
+            k += 1
+
+        box = _subpath_box(boxes, start, end)
+        if box is None or not _intersects(rect, box):
+            prev_kept = False
+            continue
+
+        first = cmds[start]
+        if split and not _contains(rect, box):
+            _append_pieces(results, segs, rect, first.repr_relative)
+            prev_kept = False
+            continue
+
+        _append_subpath(results, cmds, start, end, prev_kept)
+        prev_kept = True
+
+    return results
+
+
+def culled_commands(cmds: Sequence[Command], boxes: Sequence[Optional[Box]],
+                    min_area: float, *, scale: float = 1.) -> list[Command]:
+    """
+    Return the commands without the subpaths too small to see: those whose
+    bounding boxes, scaled by `scale`, fit in a unit square and cover less
+    than `min_area`. The commands should be absolutized.
+    """
+    results: list[Command] = []
+    prev_kept = False
+    for start, end in subpath_ranges(cmds):
+        box = _subpath_box(boxes, start, end)
+        if box is not None:
+            w, h = (box[2] - box[0]) * scale, (box[3] - box[1]) * scale
+            if w < 1. and h < 1. and w * h < min_area:
+                box = None
+        if box is None:
+            prev_kept = False
+            continue
+
+        _append_subpath(results, cmds, start, end, prev_kept)
+        prev_kept = True
+
+    return results
+
+
+def subpath_ranges(cmds: Sequence[Command]) -> Iterator[tuple[int, int]]:
+    """
+    Iterate `(start, end)` index ranges of the subpaths of commands. A
+    subpath starts with a moveto command, or with the command following a
+    closepath.
+    """
+    start = 0
+    for i in range(1, len(cmds)):
+        if isinstance(cmds[i], Moveto) or isinstance(cmds[i-1], Close):
+            yield start, i
+            start = i
+    if cmds:
+        yield start, len(cmds)
+
+
+def clipped_segments(seg: Segment, rect: Rect) -> Iterator[Segment]:
+    """
+    Iterate the pieces of a segment record inside `rect`. A closepath
+    record is clipped as a line, and a moveto record yields nothing.
+    """
+    op = seg[0]
+    if op == 'M':
+        return
+    if op == 'Z':
+        seg = ('L', *seg[1:])
+        op = 'L'
+
+    box = segment_bbox(seg)
+    if not _intersects(rect, box):
+        return
+    if _contains(rect, box):
+        yield seg
+        return
+
+    prepared = prepared_segment(seg)
+    if prepared[0] == 'L' and op == 'A':
+        seg = prepared
+
+    ts = sorted(t for axis, values in ((0, (rect.min_x, rect.max_x)), (1, (rect.min_y, rect.max_y)))
+                for v in values for t in _crossings(prepared, axis, v) if 0. < t < 1.)
+    intervals: list[list[float]] = []
+    for t0, t1 in zip([0., *ts], [*ts, 1.]):
+        if t1 <= t0:
+            continue
+        x, y = segment_point(prepared, (t0 + t1) / 2)
+        if not (rect.min_x <= x <= rect.max_x and rect.min_y <= y <= rect.max_y):
+            continue
+        if intervals and intervals[-1][1] == t0:
+            intervals[-1][1] = t1
+        else:
+            intervals.append([t0, t1])
+
+    for t0, t1 in intervals:
+        yield _sub_segment(seg, prepared, t0, t1)
+
+
+def _subpath_box(boxes: Sequence[Optional[Box]], start: int, end: int) -> Optional[Box]:
+    box: Optional[Box] = None
+    for b in boxes[start:end]:
+        if b is not None:
+            box = b if box is None else union_box(box, b)
+    return box
+
+
+def _append_subpath(results: list[Command], cmds: Sequence[Command],
+                    start: int, end: int, prev_kept: bool) -> None:
+    first = cmds[start]
+    if not isinstance(first, Moveto) and not prev_kept:
+        # the subpath follows a closepath of a dropped subpath
+        moveto = Moveto('M', [first.start_point.clone()])
+        moveto.repr_relative = first.repr_relative
+        _push(results, moveto)
+    for cmd in cmds[start:end]:
+        _push(results, cmd)
+
+
+def _append_pieces(results: list[Command], segs: list[Segment], rect: Rect, rel: bool) -> None:
+    cur: Optional[tuple[float, float]] = None
+    for seg in segs:
+        for piece in clipped_segments(seg, rect):
+            op = piece[0]
+            x0, y0, x, y = piece[1], piece[2], piece[-2], piece[-1]
+            if cur != (x0, y0):
+                moveto = Moveto('M', [Point(x0, y0)])
+                moveto.repr_relative = rel
+                _push(results, moveto)
+
+            last = results[-1]
+            cmd: Command
+            if op == 'A':
+                _, _, _, rx, ry, rotation, is_large_arc, is_sweep, _, _ = piece
+                item = EllipticalArcItem((rx, ry), rotation, bool(is_large_arc), bool(is_sweep), Point(x, y))
+                cmd = EllipticalArc('A', [item])
+            else:
+                ps = [Point(piece[j], piece[j+1]) for j in range(3, len(piece), 2)]
+                cmd = Lineto('L', ps) if op == 'L' else Curveto(op, ps)
+
+            if op != 'A' and op == last.fn:
+                last.data += cmd.data
+            else:
+                cmd.repr_relative = rel
+                _push(results, cmd)
+            cur = (x, y)
+
+
+def _push(results: list[Command], cmd: Command) -> None:
+    if isinstance(cmd, Moveto):
+        cmd.is_first_command = not results
+    if results:
+        cmd.start_point = results[-1].end_point.clone()
+    results.append(cmd)
+
+
+def _intersects(rect: Rect, box: Box) -> bool:
+    return rect.min_x <= box[2] and box[0] <= rect.max_x and \
+        rect.min_y <= box[3] and box[1] <= rect.max_y
+
+
+def _contains(rect: Rect, box: Box) -> bool:
+    return rect.min_x <= box[0] and box[2] <= rect.max_x and \
+        rect.min_y <= box[1] and box[3] <= rect.max_y
+
+
+def _crossings(seg: tuple, axis: int, v: float) -> list[float]:
+    # parameters where the coordinate of `axis` is `v`
+    op = seg[0]
+    if op == 'L':
+        p0, p1 = seg[1+axis], seg[3+axis]
+        return [] if p0 == p1 else [(v - p0) / (p1 - p0)]
+    if op == 'Q':
+        p0, p1, p2 = seg[1+axis], seg[3+axis], seg[5+axis]
+        return list(quadratic_roots(p0 - 2 * p1 + p2, 2 * (p1 - p0), p0 - v))
+    if op == 'C':
+        p0, p1, p2, p3 = seg[1+axis], seg[3+axis], seg[5+axis], seg[7+axis]
+        return _cubic_roots(-p0 + 3 * p1 - 3 * p2 + p3, 3 * p0 - 6 * p1 + 3 * p2, 3 * (p1 - p0), p0 - v)
+
+    # elliptical arc: a * cos(theta) + b * sin(theta) == v - center
+    _, cx, cy, rx, ry, cos_phi, sin_phi, theta1, dtheta = seg
+    if axis == 0:
+        a, b, c = rx * cos_phi, -ry * sin_phi, v - cx
+    else:
+        a, b, c = rx * sin_phi, ry * cos_phi, v - cy
+    r = math.hypot(a, b)
+    if r == 0 or abs(c) > r:
+        return []
+    alpha, beta = math.atan2(b, a), math.acos(c / r)
+    two_pi = 2 * math.pi
+    ts = []
+    for theta in (alpha + beta, alpha - beta):
+        if dtheta >= 0:
+            ts.append((theta - theta1) % two_pi / dtheta)
+        else:
+            ts.append((theta1 - theta) % two_pi / -dtheta)
+    return ts
+
+
+def _cubic_roots(a: float, b: float, c: float, d: float) -> list[float]:
+    # roots in [0, 1], by bisection of the intervals where the cubic is
+    # monotonic
+    def f(t: float) -> float:
+        return ((a * t + b) * t + c) * t + d
+
+    ends = sorted([0., 1., *(t for t in quadratic_roots(3 * a, 2 * b, c) if 0. < t < 1.)])
+    roots = []
+    for lo, hi in zip(ends, ends[1:]):
+        f_lo, f_hi = f(lo), f(hi)
+        if f_lo == 0.:
+            roots.append(lo)
+            continue
+        if (f_lo < 0.) == (f_hi < 0.):
+            continue
+        for _ in range(60):
+            m = (lo + hi) / 2
+            f_m = f(m)
+            if (f_m < 0.) == (f_lo < 0.):
+                lo, f_lo = m, f_m
+            else:
+                hi = m
+        roots.append((lo + hi) / 2)
+    return roots
+
+
+def _sub_segment(seg: Segment, prepared: tuple, t0: float, t1: float) -> Segment:
+    op = seg[0]
+    if op == 'A':
+        _, x0, y0, _, _, rotation, _, _, x, y = seg
+        _, _, _, rx, ry, _, _, _, dtheta = prepared
+        if t0 > 0.:
+            x0, y0 = segment_point(prepared, t0)
+        if t1 < 1.:
+            x, y = segment_point(prepared, t1)
+        return ('A', x0, y0, rx, ry, rotation, abs(dtheta * (t1 - t0)) > math.pi, dtheta > 0, x, y)
+
+    ps = [(seg[j], seg[j+1]) for j in range(1, len(seg), 2)]
+    if t1 < 1.:
+        ps = split_bezier(ps, t1)[0]
+    if t0 > 0.:
+        ps = split_bezier(ps, t0 / t1)[1]
+    return (op, *(v for p in ps for v in p))
@@ -0,0 +1,124 @@
+"""
+Closest points on pathdata.
+
+The segments of a pathdata are indexed by `svgpdtools.spatial.RTreeIndex`,
+and a query visits them in ascending order of the distance to their
+bounding boxes, so the segments whose boxes are farther than the closest
+point found so far are never solved.
+
+Within a segment, the squared distance is sampled at a few parameters and
+each local minimum is bracketed by its neighbouring samples. It is refined
+by Newton's method on the derivative `(B(t) - P) . B'(t)`, falling back to
+golden-section steps when a Newton step leaves the bracket or does not
+reduce the distance. Lines are projected exactly.
+"""
+from __future__ import annotations
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Optional
+import math
+
+from .command import Command
+from .segments import PreparedSegment, closest_parameter, iter_segments, prepared_segment, \
+    segment_point, squared_distance
+from .bounds import segment_bbox
+from .spatial import RTreeIndex
+
+
+# samples per quarter turn of an elliptical arc
+_ARC_SAMPLES = 4
+
+
+@dataclass(frozen=True)
+class Closest:
+    """
+    The closest point `(x, y)` on a pathdata, at the parameter `t` of the
+    record `index` of `PathData.segments()`.
+    """
+    index: int
+    t: float
+    x: float
+    y: float
+    distance: float
+
+
+class ClosestIndex:
+    """
+    Closest point queries over the segments of commands.
+    """
+    def __init__(self, cmds: Sequence[Command]) -> None:
+        records = list(iter_segments(cmds))
+        self._segments = [prepared_segment(seg) for seg in records]
+        self._index = RTreeIndex()
+        self._index.insert_boxes(0, ((i, segment_bbox(seg)) for i, seg in enumerate(records)
+                                     if seg[0] != 'M'))
+
+    def closest(self, x: float, y: float, max_distance: float = math.inf) -> Optional[Closest]:
+        """
+        Return the closest point to `(x, y)`, or None if nothing is drawn
+        within `max_distance`.
+        """
+        solved: dict[int, Closest] = {}
+
+        def distance(_, index: int) -> float:
+            c = solved[index] = closest_on_segment(self._segments[index], x, y, index)
+            return c.distance
+
+        found = self._index.nearest(x, y, max_distance=max_distance, distance=distance)
+        if not found:
+            return None
+        _, (_, index) = found[0]
+        return solved[index]
+
+    def closest_many(self, points: Iterable[Sequence[float]]) -> list[Optional[Closest]]:
+        """
+        Return the closest point to each `(x, y)` point. The distance of a
+        point bounds that of the next point, so points in a sequence near
+        each other prune more segments.
+        """
+        results: list[Optional[Closest]] = []
+        prev: Optional[tuple[float, float, float]] = None
+        for x, y in points:
+            x, y = float(x), float(y)
+            bound = math.inf
+            if prev is not None:
+                px, py, d = prev
+                # slightly loose, so the rounding errors keep the point
+                bound = (d + math.hypot(x - px, y - py)) * (1 + 1e-9) + 1e-12
+            c = self.closest(x, y, bound)
+            results.append(c)
+            if c is not None:
+                prev = (x, y, c.distance)
+        return results
+
+
+def closest_on_segment(seg: PreparedSegment, x: float, y: float, index: int = -1) -> Closest:
+    """
+    Return the closest point to `(x, y)` on a prepared segment.
+    """
+    op = seg[0]
+    if op == 'L':
+        _, x0, y0, x1, y1 = seg
+        dx, dy = x1 - x0, y1 - y0
+        dd = dx * dx + dy * dy
+        t = 0. if dd == 0 else min(1., max(0., ((x - x0) * dx + (y - y0) * dy) / dd))
+        return _closest_at(seg, x, y, t, index)
+
+    if op == 'E':
+        n = max(2, math.ceil(abs(seg[8]) / (math.pi / 2) * _ARC_SAMPLES))
+    else:
+        n = 16 if op == 'C' else 8
+    ts = [i / n for i in range(n + 1)]
+    ds = [squared_distance(seg, x, y, t) for t in ts]
+
+    results = [_closest_at(seg, x, y, t, index) for t in (0., 1.)]
+    for i in range(n + 1):
+        if (i == 0 or ds[i] <= ds[i-1]) and (i == n or ds[i] <= ds[i+1]):
+            t = closest_parameter(seg, x, y, ts[i], ts[max(i - 1, 0)], ts[min(i + 1, n)])
+            results.append(_closest_at(seg, x, y, t, index))
+    return min(results, key=lambda c: c.distance)
+
+
+def _closest_at(seg: PreparedSegment, x: float, y: float, t: float, index: int) -> Closest:
+    px, py = segment_point(seg, t)
+    return Closest(index, t, px, py, math.hypot(px - x, py - y))
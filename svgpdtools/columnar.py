@@ -0,0 +1,349 @@
+"""
+Columnar arrays of many pathdata.
+
+The commands of all pathdata are packed into flat columns, as the blobs of
+`svgpdtools.wire` are, so the whole document is a handful of arrays::
+
+    opcodes          uint8 per command: the letter in ASCII, with the bit
+                     0x80 set when it is shown in relative coords
+    counts           uint32 per command: the items of its data
+    coords           float64 (or float32) values as `svgpdtools.wire`
+                     stores them: 2 per point, 1 per H/V and 7 per
+                     elliptical arc item, relative to the previous point
+                     for lowercase commands but the end points of arcs
+    command_offsets  int64 per path and one more: its first command
+    coord_offsets    int64 per path and one more: its first coord
+    element_index    int64 per path: the index of the path-element in the
+                     document, as counted by the option `-i`
+    flags            uint8 per path: the flags of the `svgpdtools.wire`
+                     header
+
+The commands of the path `i` are `command_offsets[i]:command_offsets[i+1]`
+of `opcodes` and `counts`, and its coords `coord_offsets[i]:coord_offsets[i+1]`
+of `coords`. The columns are saved as `.npy` files in a directory, which
+`numpy.load(..., mmap_mode='r')` maps without parsing or copying, or as
+one `.npz` file.
+
+Float32 coords halve the memory and the bandwidth of `coords`. A float32
+value has a 24-bit significand, so storing `x` rounds it by at most
+`|x| * 2**-24` (about `|x| * 6e-8`). While that is less than half a unit
+of the last digit of `precision()`, i.e. `|x| < float32_limit()`
+(8388.608 for the precision 3), a formatted number differs from the
+float64 one by at most one unit of the last digit. It differs at all only
+when `x` is that close to a rounding boundary, e.g. `0.0025` at the
+precision 3; `mismatches` finds such paths. Each `PathColumns.transform`
+computes in float64 and rounds the results once more, and a relative
+coord adds the errors of the coords before it when absolutized.
+"""
+from __future__ import annotations
+from array import array
+from collections.abc import Iterable, Iterator
+from typing import Literal, Optional, Union
+import math, os, pathlib
+
+from .pathdata import PathData
+from .transform import Transform
+from .utils import current_precision, temporary_precision
+from . import npy, wire
+
+
+CoordType = Literal['d', 'f']
+
+COLUMNS = ('opcodes', 'counts', 'coords', 'command_offsets', 'coord_offsets', 'element_index', 'flags')
+
+# coords per item of the data of each command
+_WIDTHS = {'M': 2, 'L': 2, 'C': 2, 'S': 2, 'Q': 2, 'T': 2, 'H': 1, 'V': 1, 'A': 7, 'Z': 0}
+
+
+class PathColumns:
+    """
+    Columnar arrays of many pathdata. `coord_type` is the typecode of
+    `coords`: 'd' for float64 or 'f' for float32.
+    """
+    def __init__(self, coord_type: CoordType = 'd') -> None:
+        if coord_type not in ('d', 'f'):
+            raise ValueError(f'Unknown coord type: {coord_type}')
+        self.opcodes = array('B')
+        self.counts = array('I')
+        self.coords = array(coord_type)
+        self.command_offsets = array('q', [0])
+        self.coord_offsets = array('q', [0])
+        self.element_index = array('q')
+        self.flags = array('B')
+
+    def __len__(self) -> int:
+        return len(self.element_index)
+
+    def __iter__(self) -> Iterator[PathData]:
+        for i in range(len(self)):
+            yield self.pathdata(i)
+
+    def append(self, pd: PathData, element_index: int = -1) -> int:
+        """
+        Append a pathdata, and return its index.
+        """
+        flags, opcodes, counts, coords = wire._encode(pd)
+        self.opcodes.extend(opcodes)
+        self.counts.extend(counts)
+        if self.coords.typecode == coords.typecode:
+            self.coords.extend(coords)
+        else:
+            self.coords.fromlist(coords.tolist())
+        self.command_offsets.append(len(self.opcodes))
+        self.coord_offsets.append(len(self.coords))
+        self.element_index.append(element_index)
+        self.flags.append(flags & wire._ABSOLUTIZED)
+        return len(self) - 1
+
+    def extend(self, pds: Iterable[PathData]) -> None:
+        for pd in pds:
+            self.append(pd)
+
+    def pathdata(self, index: int) -> PathData:
+        """
+        Return a new pathdata decoded from the columns.
+        """
+        c0, c1 = self.command_offsets[index], self.command_offsets[index+1]
+        k0, k1 = self.coord_offsets[index], self.coord_offsets[index+1]
+        return wire._decode(self.flags[index], bytes(self.opcodes[c0:c1]), self.counts[c0:c1],
+                            self.coords[k0:k1])
+
+    def transform(self, t: Transform) -> None:
+        """
+        Transform the coords of all paths in place. Unlike
+        `PathData.transform`, the radii and the x-axis-rotation of an
+        elliptical arc are transformed exactly by any transform, and the
+        commands keep their letters. A transform with rotation or skew
+        raises an Exception when there are H/h or V/v commands. When NumPy
+        is installed, all coords are transformed as arrays.
+        """
+        if t.b != 0 or t.c != 0:
+            hv = {ord(c) for c in 'HhVv'}
+            if any((op & 0x7f) in hv for op in self.opcodes):
+                raise Exception('H/h and V/v commands cannot be transformed by rotation or skew; '
+                                'collapse them into L/l commands before making the columns.')
+        try:
+            import numpy
+        except ImportError:
+            _transform_coords(self, t)
+            return
+        _transform_coords_numpy(numpy, self, t)
+
+    def astype(self, coord_type: CoordType) -> PathColumns:
+        """
+        Return a copy of the columns whose coords are of `coord_type`.
+        """
+        columns = PathColumns(coord_type)
+        for name in COLUMNS:
+            if name != 'coords':
+                setattr(columns, name, array(getattr(self, name).typecode, getattr(self, name)))
+        columns.coords.fromlist(self.coords.tolist())
+        return columns
+
+    def arrays(self) -> dict[str, array]:
+        return {name: getattr(self, name) for name in COLUMNS}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, array]) -> PathColumns:
+        missing = [name for name in COLUMNS if name not in arrays]
+        if missing:
+            raise Exception(f'Missing columns: {", ".join(missing)}')
+        columns = cls(arrays['coords'].typecode)
+        for name in COLUMNS:
+            setattr(columns, name, arrays[name])
+        n = len(columns.element_index)
+        if len(columns.command_offsets) != n + 1 or len(columns.coord_offsets) != n + 1 or \
+                len(columns.flags) != n or len(columns.counts) != len(columns.opcodes) or \
+                columns.command_offsets[-1] != len(columns.opcodes) or \
+                columns.coord_offsets[-1] != len(columns.coords):
+            raise Exception('Inconsistent lengths of the columns.')
+        return columns
+
+
+def float32_limit(precision: Optional[int] = None) -> float:
+    """
+    Return the magnitude below which storing a coord as float32 rounds it
+    by less than half a unit of the last digit of the precision, which
+    defaults to the current one.
+    """
+    if precision is None:
+        precision = current_precision()
+    return .5 * 10 ** -precision * 2 ** 24
+
+
+def mismatches(expected: PathColumns, actual: PathColumns,
+               precision: Optional[int] = None) -> list[int]:
+    """
+    Return the indexes of the paths whose formatted pathdata differ
+    between two columns of the same paths, e.g. float64 columns and their
+    `astype('f')` copy, at the precision (default the current one).
+    """
+    if len(expected) != len(actual):
+        raise ValueError(f'the numbers of paths differ: {len(expected)} and {len(actual)}')
+    if precision is None:
+        precision = current_precision()
+    with temporary_precision(precision):
+        return [i for i in range(len(expected)) if str(expected.pathdata(i)) != str(actual.pathdata(i))]
+
+
+def save(columns: PathColumns, path: Union[str, os.PathLike]) -> None:
+    """
+    Save the columns into an `.npz` file if the path ends with `.npz`, and
+    otherwise into a directory of `<column>.npy` files.
+    """
+    path = pathlib.Path(path)
+    if path.suffix == '.npz':
+        npy.write_npz(path, columns.arrays())
+        return
+    path.mkdir(parents=True, exist_ok=True)
+    for name, buf in columns.arrays().items():
+        npy.save(path / f'{name}.npy', buf)
+
+
+def load(path: Union[str, os.PathLike]) -> PathColumns:
+    """
+    Load the columns saved by `save`.
+    """
+    path = pathlib.Path(path)
+    arrays: dict[str, array] = {}
+    if path.is_dir():
+        for name in COLUMNS:
+            with open(path / f'{name}.npy', 'rb') as f:
+                arrays[name] = npy.read_npy(f)[0]
+    else:
+        arrays = {name: buf for name, (buf, _) in npy.read_npz(path).items()}
+    return PathColumns.from_arrays(arrays)
+
+
+def _arc_transformed(t: Transform, rx: float, ry: float, rotation: float) -> tuple[float, float, float]:
+    # The ellipse is the image of the unit circle by R(rotation) diag(rx, ry)
+    # and then by the linear part of `t`. The singular values of the product
+    # are the new radii and its left rotation is the new x-axis-rotation.
+    theta = math.radians(rotation)
+    cos, sin = math.cos(theta), math.sin(theta)
+    p = (t.a * cos + t.c * sin) * rx
+    q = (t.c * cos - t.a * sin) * ry
+    r = (t.b * cos + t.d * sin) * rx
+    s = (t.d * cos - t.b * sin) * ry
+    e, f, g, h = (p + s) / 2, (p - s) / 2, (r + q) / 2, (r - q) / 2
+    qq, rr = math.hypot(e, h), math.hypot(f, g)
+    # the direction where the x-axis of the ellipse is carried
+    phi = math.atan2(t.b * cos + t.d * sin, t.a * cos + t.c * sin)
+    if rr <= 1e-12 * qq:
+        return qq, qq, math.degrees(phi)
+
+    beta = (math.atan2(g, f) + math.atan2(h, e)) / 2
+    major, minor = qq + rr, abs(qq - rr)
+    diff = (beta - phi + math.pi / 2) % math.pi - math.pi / 2
+    if abs(diff) <= math.pi / 4:
+        return major, minor, math.degrees(phi + diff)
+    diff = (beta - phi) % math.pi - math.pi / 2
+    return minor, major, math.degrees(phi + diff)
+
+
+def _transform_coords(columns: PathColumns, t: Transform) -> None:
+    coords = columns.coords
+    flip_sweep = t.a * t.d - t.b * t.c < 0
+    pos = 0
+    for i in range(len(columns)):
+        first = columns.command_offsets[i]
+        for k in range(first, columns.command_offsets[i+1]):
+            fn = chr(columns.opcodes[k] & 0x7f)
+            n = columns.counts[k]
+            e, f = (0., 0.) if fn.islower() else (t.e, t.f)
+            if fn in 'Hh':
+                for j in range(pos, pos + n):
+                    coords[j] = t.a * coords[j] + e
+            elif fn in 'Vv':
+                for j in range(pos, pos + n):
+                    coords[j] = t.d * coords[j] + f
+            elif fn in 'Aa':
+                for j in range(pos, pos + 7 * n, 7):
+                    coords[j], coords[j+1], coords[j+2] = _arc_transformed(t, *coords[j:j+3])
+                    if flip_sweep:
+                        coords[j+4] = 1. - coords[j+4]
+                    x, y = coords[j+5], coords[j+6]
+                    coords[j+5] = t.a * x + t.c * y + t.e
+                    coords[j+6] = t.b * x + t.d * y + t.f
+            else:
+                for j in range(pos, pos + 2 * n, 2):
+                    x, y = coords[j], coords[j+1]
+                    # the first moveto of a path is relative to the origin
+                    if fn == 'm' and k == first and j == pos:
+                        coords[j] = t.a * x + t.c * y + t.e
+                        coords[j+1] = t.b * x + t.d * y + t.f
+                    else:
+                        coords[j] = t.a * x + t.c * y + e
+                        coords[j+1] = t.b * x + t.d * y + f
+            pos += _WIDTHS[fn.upper()] * n
+
+
+def _transform_coords_numpy(np, columns: PathColumns, t: Transform) -> None:
+    if not len(columns.opcodes):
+        return
+    coords = np.frombuffer(columns.coords, dtype=np.float32 if columns.coords.typecode == 'f' else np.float64)
+    ops = np.frombuffer(columns.opcodes, dtype=np.uint8) & 0x7f
+    counts = np.frombuffer(columns.counts, dtype=np.uint32).astype(np.int64)
+    widths = np.zeros(128, dtype=np.int64)
+    for c, w in _WIDTHS.items():
+        widths[ord(c)] = widths[ord(c.lower())] = w
+
+    # an item is a point, an H/V value or an arc
+    item_ops = np.repeat(ops, counts)
+    item_widths = widths[item_ops]
+    starts = np.cumsum(item_widths) - item_widths
+    translated = item_ops < ord('a')
+    # the first moveto of a path is relative to the origin
+    first = np.frombuffer(columns.command_offsets, dtype=np.int64)[:-1]
+    first = first[first < len(ops)]
+    first = first[(ops[first] == ord('m')) & (counts[first] > 0)]
+    item_offsets = np.cumsum(counts) - counts
+    translated[item_offsets[first]] = True
+
+    sel = item_widths == 2
+    s, tr = starts[sel], translated[sel]
+    x, y = coords[s].astype(np.float64), coords[s+1].astype(np.float64)
+    coords[s] = t.a * x + t.c * y + np.where(tr, t.e, 0.)
+    coords[s+1] = t.b * x + t.d * y + np.where(tr, t.f, 0.)
+
+    for letter, scale, offset in (('H', t.a, t.e), ('V', t.d, t.f)):
+        sel = (item_ops == ord(letter)) | (item_ops == ord(letter.lower()))
+        s, tr = starts[sel], translated[sel]
+        coords[s] = scale * coords[s].astype(np.float64) + np.where(tr, offset, 0.)
+
+    s = starts[item_widths == 7]
+    if len(s):
+        rx, ry, rotation = _arcs_transformed_numpy(
+            np, t, coords[s].astype(np.float64), coords[s+1].astype(np.float64),
+            coords[s+2].astype(np.float64))
+        coords[s], coords[s+1], coords[s+2] = rx, ry, rotation
+        if t.a * t.d - t.b * t.c < 0:
+            coords[s+4] = 1 - coords[s+4]
+        x, y = coords[s+5].astype(np.float64), coords[s+6].astype(np.float64)
+        coords[s+5] = t.a * x + t.c * y + t.e
+        coords[s+6] = t.b * x + t.d * y + t.f
+
+
+def _arcs_transformed_numpy(np, t: Transform, rx, ry, rotation):
+    # the same as `_arc_transformed`
+    theta = np.radians(rotation)
+    cos, sin = np.cos(theta), np.sin(theta)
+    p = (t.a * cos + t.c * sin) * rx
+    q = (t.c * cos - t.a * sin) * ry
+    r = (t.b * cos + t.d * sin) * rx
+    s = (t.d * cos - t.b * sin) * ry
+    e, f, g, h = (p + s) / 2, (p - s) / 2, (r + q) / 2, (r - q) / 2
+    qq, rr = np.hypot(e, h), np.hypot(f, g)
+    phi = np.arctan2(t.b * cos + t.d * sin, t.a * cos + t.c * sin)
+
+    beta = (np.arctan2(g, f) + np.arctan2(h, e)) / 2
+    major, minor = qq + rr, np.abs(qq - rr)
+    diff = (beta - phi + np.pi / 2) % np.pi - np.pi / 2
+    swapped = np.abs(diff) > np.pi / 4
+    diff = np.where(swapped, (beta - phi) % np.pi - np.pi / 2, diff)
+    circle = rr <= 1e-12 * qq
+    diff = np.where(circle, 0., diff)
+    major, minor = np.where(circle, qq, major), np.where(circle, qq, minor)
+    swapped &= ~circle
+    return (np.where(swapped, minor, major), np.where(swapped, major, minor),
+            np.degrees(phi + diff))
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import Protocol, TypeVar, Generic, Optional
 from dataclasses import dataclass, field, asdict
-import math
+import math, threading
 
 from .graphics import Point, TupledPoint
 from .transform import Transform
@@ -139,10 +139,13 @@ class SegmentalLineAndCurve(CommandBase[Point]):
         cur = prev_point.clone()
         _, step = _data_steps(self.fn)
 
+        # points are updated in place to save allocating new ones
         for i in range(0, len(self.data), step):
             for j in range(step):
-                self.data[i+j] += cur
-            cur = self.data[i+j]
+                p = self.data[i+j]
+                p.x += cur.x
+                p.y += cur.y
+            cur = p
 
         self.fn = self.fn.upper()
         return self.end_point
@@ -268,8 +271,10 @@ class Moveto(CommandBase[Point]):
         cur = prev_point.clone()
         start = 1 if self.is_first_command else 0
         for i in range(start, len(self.data)):
-            self.data[i] += cur
-            cur = self.data[i]
+            p = self.data[i]
+            p.x += cur.x
+            p.y += cur.y
+            cur = p
 
         self.fn = self.fn.upper()
         return self.end_point
@@ -346,10 +351,13 @@ class HorizontalAndVerticalLineto(CommandBase[float]):
                 y = cur.y if is_h else self.data[-1],
             )
         
-        total = sum(self.data)
+        # accumulated in the same order as `absolutize`
+        acc = cur.x if is_h else cur.y
+        for n in self.data:
+            acc += n
         return  Point(
-            x = cur.x + (total if is_h else .0),
-            y = cur.y + (.0 if is_h else total),
+            x = acc if is_h else cur.x,
+            y = cur.y if is_h else acc,
         )
 
     def transform(self, t: Transform) -> None:
@@ -362,10 +370,12 @@ class HorizontalAndVerticalLineto(CommandBase[float]):
         self.repr_relative = called_internally and self.repr_relative
         if self.fn.isupper(): return self.end_point
 
-        if self.fn == 'h':
-            self.data = [x + prev_point.x for x in self.data]
-        else:
-            self.data = [y + prev_point.y for y in self.data]
+        acc = prev_point.x if self.fn == 'h' else prev_point.y
+        data = []
+        for n in self.data:
+            acc += n
+            data.append(acc)
+        self.data = data
 
         self.fn = self.fn.upper()
         return self.end_point
@@ -497,12 +507,12 @@ class Close(CommandBase[Point]):
         return [tuple(self.end_point)]    
 
 
-_force_repr_relative = False
+# The flag is kept per thread so that pathdata can be formatted concurrently.
+_local = threading.local()
 def set_force_repr_relative(val: bool) -> bool:
-    global _force_repr_relative
-    old_value = _force_repr_relative
-    _force_repr_relative = val
+    old_value = getattr(_local, 'force_repr_relative', False)
+    _local.force_repr_relative = val
     return old_value
 
 def _is_force_repr_relative(cmd: Command) -> bool:
-    return _force_repr_relative or (cmd.repr_relative and cmd.fn.isupper())
+    return getattr(_local, 'force_repr_relative', False) or (cmd.repr_relative and cmd.fn.isupper())
@@ -0,0 +1,337 @@
+"""
+Memory-mapped corpus of parsed pathdata.
+
+A corpus file holds the pathdata of many `d` strings, each parsed once, in
+the columns of `svgpdtools.columnar` plus an index from the hash of a `d`
+string to its path::
+
+    header    32 bytes: magic b'SPDC', version (uint8), 3 padding bytes,
+              number of paths (uint64), number of sections (uint32),
+              4 padding bytes, offset of the section table (uint64)
+    sections  the data of each column, aligned to 64 bytes
+    table     per section: name (16 bytes, NUL padded), typecode (1 byte),
+              itemsize (uint8), 6 padding bytes, offset (uint64) and
+              number of items (uint64)
+
+The `hashes` section is the sorted 64-bit keys of the distinct `d`
+strings, `hash_checks` another 64 bits of the same 128-bit BLAKE2b hash
+of each string, and `hash_paths` the path of each hash. A lookup compares
+all 128 bits, so a string only hits a path of a different string on a
+collision of the whole hash. The `coords` section
+is float64, or float32 when built with `coord_type='f'` (see
+`svgpdtools.columnar` for the error bounds). All numbers are
+little-endian.
+
+`Corpus` maps the file and views the sections as `memoryview` objects
+without copying, so a path is looked up by bisecting the hashes and read
+from the mapped pages. The processes opening the same file share those
+pages, and a `Corpus` is pickled as its file path.
+"""
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import BinaryIO, Optional, Union
+import hashlib, mmap, os, pathlib, struct, sys, tempfile
+
+from .pathdata import PathData
+from .columnar import COLUMNS, CoordType
+from . import parser, wire
+
+
+MAGIC = b'SPDC'
+VERSION = 2
+
+_HEADER = struct.Struct('<4sB3xQI4xQ')
+_SECTION = struct.Struct('<16scB6xQQ')
+_ALIGNMENT = 64
+
+_SECTIONS = (*COLUMNS, 'hashes', 'hash_checks', 'hash_paths')
+
+
+def hash_d(d: str) -> tuple[int, int]:
+    """
+    Return the 128-bit hash of a `d` string used by the index of a corpus,
+    as the 64-bit key sorted by the index and the 64-bit check.
+    """
+    digest = hashlib.blake2b(d.encode('utf-8'), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little')
+
+
+class CorpusBuilder:
+    """
+    Write a corpus file. The columns of the commands and coords are spooled
+    into temporary files while `d` strings are added, so only the per-path
+    columns and the hashes stay in memory. The file is written by
+    `close()`, or at the end of a `with` block without an exception.
+    `coord_type` is the typecode of the coords: 'd' for float64 or 'f' for
+    float32.
+    """
+    def __init__(self, path: Union[str, os.PathLike], coord_type: CoordType = 'd') -> None:
+        if coord_type not in ('d', 'f'):
+            raise ValueError(f'Unknown coord type: {coord_type}')
+        self.path = pathlib.Path(path)
+        self.coord_type = coord_type
+        # the columns as large as the commands or the coords
+        self._spools = {name: tempfile.TemporaryFile() for name in ('opcodes', 'counts', 'coords')}
+        self._sizes = {name: 0 for name in self._spools}
+        self.command_offsets = array('q', [0])
+        self.coord_offsets = array('q', [0])
+        self.element_index = array('q')
+        self.flags = array('B')
+        self._paths: dict[tuple[int, int], int] = {}
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self.element_index)
+
+    def __enter__(self) -> CorpusBuilder:
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._discard()
+
+    def add(self, d: str, element_index: int = -1) -> int:
+        """
+        Parse and add a `d` string unless it is already added, and return
+        the index of its path.
+        """
+        key = hash_d(d)
+        index = self._paths.get(key)
+        if index is None:
+            index = self._add(key, parser.pathdata(d), element_index)
+        return index
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._write()
+        finally:
+            self._discard()
+
+    def _add(self, key: tuple[int, int], pd: PathData, element_index: int) -> int:
+        flags, opcodes, counts, coords = wire._encode(pd)
+        if self.coord_type != coords.typecode:
+            coords = array(self.coord_type, coords.tolist())
+        for name, buf in (('opcodes', array('B', opcodes)), ('counts', counts), ('coords', coords)):
+            _write_le(self._spools[name], buf)
+            self._sizes[name] += len(buf)
+        self.command_offsets.append(self._sizes['opcodes'])
+        self.coord_offsets.append(self._sizes['coords'])
+        self.element_index.append(element_index)
+        self.flags.append(flags & wire._ABSOLUTIZED)
+        self._paths[key] = len(self.element_index) - 1
+        return self._paths[key]
+
+    def _write(self) -> None:
+        keys = sorted(self._paths)
+        sections: list[tuple[str, str, int, Union[array, BinaryIO]]] = []
+        for name in _SECTIONS:
+            if name in self._spools:
+                typecode = {'opcodes': 'B', 'counts': 'I', 'coords': self.coord_type}[name]
+                sections.append((name, typecode, self._sizes[name], self._spools[name]))
+            elif name == 'hashes':
+                sections.append((name, 'Q', len(keys), array('Q', (k for k, _ in keys))))
+            elif name == 'hash_checks':
+                sections.append((name, 'Q', len(keys), array('Q', (c for _, c in keys))))
+            elif name == 'hash_paths':
+                sections.append((name, 'Q', len(keys), array('Q', (self._paths[k] for k in keys))))
+            else:
+                buf = getattr(self, name)
+                sections.append((name, buf.typecode, len(buf), buf))
+
+        table = []
+        with open(self.path, 'wb') as f:
+            f.write(bytes(_HEADER.size))
+            for name, typecode, count, src in sections:
+                f.write(bytes(-f.tell() % _ALIGNMENT))
+                offset = f.tell()
+                if isinstance(src, array):
+                    _write_le(f, src)
+                else:
+                    src.seek(0)
+                    while chunk := src.read(1 << 20):
+                        f.write(chunk)
+                table.append(_SECTION.pack(name.encode('ascii'), typecode.encode('ascii'),
+                                           array(typecode).itemsize, offset, count))
+            f.write(bytes(-f.tell() % 8))
+            table_offset = f.tell()
+            f.write(b''.join(table))
+            f.seek(0)
+            f.write(_HEADER.pack(MAGIC, VERSION, len(self), len(table), table_offset))
+
+    def _discard(self) -> None:
+        for spool in self._spools.values():
+            spool.close()
+
+
+def build(path: Union[str, os.PathLike], ds: Iterable[str], coord_type: CoordType = 'd') -> int:
+    """
+    Write a corpus of `d` strings, and return the number of distinct
+    paths.
+    """
+    with CorpusBuilder(path, coord_type) as builder:
+        for d in ds:
+            builder.add(d)
+    return len(builder)
+
+
+@dataclass(frozen=True)
+class PathView:
+    """
+    Zero-copy view of a path in a corpus: memoryviews of its opcodes,
+    counts and coords in the mapped file.
+    """
+    opcodes: memoryview
+    counts: memoryview
+    coords: memoryview
+    flags: int
+
+    def pathdata(self) -> PathData:
+        """
+        Return a new pathdata decoded from the view.
+        """
+        return wire._decode(self.flags, self.opcodes, self.counts, self.coords)
+
+    def release(self) -> None:
+        for mv in (self.opcodes, self.counts, self.coords):
+            mv.release()
+
+
+class Corpus:
+    """
+    Read-only corpus file mapped into memory. The memoryviews of the
+    sections and of `PathView` objects refer to the mapped pages, and have
+    to be released before `close()`.
+    """
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self.path = pathlib.Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._sections = _read_sections(self._mmap)
+        except:
+            self._mmap.close()
+            raise
+        self._length = len(self._sections['element_index'])
+
+    def __reduce__(self):
+        return Corpus, (str(self.path),)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[PathData]:
+        for i in range(len(self)):
+            yield self.pathdata(i)
+
+    def __enter__(self) -> Corpus:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def section(self, name: str) -> memoryview:
+        """
+        Return a section as a memoryview of its typecode, e.g. `coords` as
+        float64 or float32 values. `numpy.frombuffer` views it as an array.
+        """
+        return self._sections[name]
+
+    def find(self, d: str) -> Optional[int]:
+        """
+        Return the index of the path of a `d` string, or None if the corpus
+        does not have it.
+        """
+        hashes = self._sections['hashes']
+        checks = self._sections['hash_checks']
+        key, check = hash_d(d)
+        i = bisect_left(hashes, key)
+        while i < len(hashes) and hashes[i] == key:
+            if checks[i] == check:
+                return self._sections['hash_paths'][i]
+            i += 1
+        return None
+
+    def get(self, d: str) -> Optional[PathData]:
+        """
+        Return a new pathdata of a `d` string from the corpus, or None if the
+        corpus does not have it.
+        """
+        i = self.find(d)
+        return None if i is None else self.pathdata(i)
+
+    def view(self, index: int) -> PathView:
+        if not -len(self) <= index < len(self):
+            raise IndexError(f'path index out of range: {index}')
+        index %= len(self)
+        s = self._sections
+        c0, c1 = s['command_offsets'][index], s['command_offsets'][index+1]
+        k0, k1 = s['coord_offsets'][index], s['coord_offsets'][index+1]
+        return PathView(s['opcodes'][c0:c1], s['counts'][c0:c1], s['coords'][k0:k1], s['flags'][index])
+
+    def pathdata(self, index: int) -> PathData:
+        view = self.view(index)
+        try:
+            return view.pathdata()
+        finally:
+            view.release()
+
+    def close(self) -> None:
+        if self._mmap.closed:
+            return
+        for mv in self._sections.values():
+            mv.release()
+        self._mmap.close()
+
+
+def _write_le(f: BinaryIO, buf: array) -> None:
+    if sys.byteorder == 'big' and buf.itemsize > 1:
+        buf = array(buf.typecode, buf)
+        buf.byteswap()
+    f.write(buf.tobytes())
+
+
+def _read_sections(buf: mmap.mmap) -> dict[str, memoryview]:
+    if len(buf) < _HEADER.size:
+        raise Exception('Too short to be a corpus file.')
+    magic, version, n_paths, n_sections, table_offset = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise Exception(f'Unknown magic number of a corpus file: {magic!r}')
+    if version != VERSION:
+        raise Exception(f'Unsupported version of a corpus file: {version}')
+
+    mv = memoryview(buf)
+    sections: dict[str, memoryview] = {}
+    for k in range(n_sections):
+        name, typecode, itemsize, offset, count = _SECTION.unpack_from(buf, table_offset + k * _SECTION.size)
+        code = typecode.decode('ascii')
+        if array(code).itemsize != itemsize:
+            raise Exception(f'Unsupported item size of {code!r}: {itemsize}')
+        end = offset + itemsize * count
+        if end > len(buf):
+            raise Exception('Truncated corpus file.')
+        section = mv[offset:end]
+        if sys.byteorder == 'big' and itemsize > 1:
+            # the data has to be swapped, so it is copied
+            copied = array(code, section.tobytes())
+            copied.byteswap()
+            section.release()
+            section = memoryview(copied)
+        sections[name.rstrip(b'\0').decode('ascii')] = section.cast(code)
+    mv.release()
+
+    missing = [name for name in _SECTIONS if name not in sections]
+    if missing:
+        raise Exception(f'Missing sections of a corpus file: {", ".join(missing)}')
+    if len(sections['element_index']) != n_paths:
+        raise Exception('Inconsistent number of paths in a corpus file.')
+    if not len(sections['hashes']) == len(sections['hash_checks']) == len(sections['hash_paths']):
+        raise Exception('Inconsistent number of hashes in a corpus file.')
+    return sections
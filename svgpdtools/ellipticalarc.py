@@ -1,3 +1,4 @@
+from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Optional
 import math, os
@@ -16,6 +17,8 @@ class EllipticalArcItem:
     _from_point: Optional[Point] = field(default=None)
     _elliptical_arc_center: Optional[Point] = field(default=None)
     _elliptical_arc_start: Optional[Point] = field(default=None)
+    # the radii are scaled by this when too small to reach the end point
+    _radii_scale: float = field(default=1.)
 
     def _init_with_start_point(self, sp: Point, is_abs: bool) -> None:
         self._from_point = sp.clone()
@@ -23,18 +26,30 @@ class EllipticalArcItem:
             self.to_point += sp
 
         phi = deg2rad(self.x_axis_rotation)
-        self._elliptical_arc_center = _elliptical_arc_center(
-            phi = phi,
-            rx = self.rx,
-            ry = self.ry,
-            is_large_arc = self.is_large_arc,
-            is_sweep = self.is_sweep,
-            from_p = sp,
-            to_p = self.to_point,
-        )
+        center = center_parameterization(
+            sp.x, sp.y, self.rx, self.ry, phi,
+            self.is_large_arc, self.is_sweep, self.to_point.x, self.to_point.y)
+        if center is None:
+            # an omitted arc or a zero radius, which has no center
+            self._elliptical_arc_center = _elliptical_arc_center(
+                phi = phi,
+                rx = self.rx,
+                ry = self.ry,
+                is_large_arc = self.is_large_arc,
+                is_sweep = self.is_sweep,
+                from_p = sp,
+                to_p = self.to_point,
+            )
+        else:
+            # radii too small to reach the end point are scaled up (F.6.6),
+            # while the given ones are kept for the representation
+            cx, cy, rx, _, _, _ = center
+            self._radii_scale = rx / abs(self.rx)
+            self._elliptical_arc_center = Point(cx, cy)
+        rx = self.rx * self._radii_scale
         self._elliptical_arc_start = Point(
-            x = self._elliptical_arc_center.x + math.cos(phi) * self.rx,
-            y = self._elliptical_arc_center.y + math.sin(phi) * self.rx,
+            x = self._elliptical_arc_center.x + math.cos(phi) * rx,
+            y = self._elliptical_arc_center.y + math.sin(phi) * rx,
         )
 
     @property
@@ -65,7 +80,8 @@ class EllipticalArcItem:
         self._elliptical_arc_center.transform(t)
         self._elliptical_arc_start.transform(t)
 
-        rx2 = self._elliptical_arc_center.distance_to(self._elliptical_arc_start)
+        distance = self._elliptical_arc_center.distance_to(self._elliptical_arc_start)
+        rx2 = distance / self._radii_scale
         if not math.isclose(self.rx, rx2):
             ry2 = self.ry * rx2 / self.rx
             self.radii = (rx2, ry2)
@@ -73,7 +89,7 @@ class EllipticalArcItem:
         self.x_axis_rotation = rad2deg(_x_axis_rotation(
             cp = self._elliptical_arc_center,
             sp = self._elliptical_arc_start,
-            rx = rx2,
+            rx = distance,
         ))
 
         if t.a * t.d < 0:
@@ -84,7 +100,7 @@ class EllipticalArcItem:
         from_p = self._from_point
         assert cp is not None and from_p is not None
         
-        guide_circle = Circle(c=cp, r=self.rx)
+        guide_circle = Circle(c=cp, r=self.rx * self._radii_scale)
         to_O = Transform.translate(-cp.x, -cp.y)
         rotate_to_normal = Transform.rotate(-self.x_axis_rotation)
         scale_to_circle = Transform.scale(1, self.rx / self.ry)
@@ -98,7 +114,73 @@ class EllipticalArcItem:
         return [p.transformed(t) for p in curve_points]
     
 
-        
+    def center_parameterization(self) -> Optional[ArcCenter]:
+        """
+        Return the center parameterization of this arc. See
+        `center_parameterization()`.
+        """
+        from_p = self._from_point
+        if from_p is None:
+            raise Exception('Should be initialized with start_point.')
+        return center_parameterization(
+            from_p.x, from_p.y, self.rx, self.ry, deg2rad(self.x_axis_rotation),
+            self.is_large_arc, self.is_sweep, self.to_point.x, self.to_point.y)
+
+
+# (cx, cy, rx, ry, theta1, delta_theta)
+ArcCenter = tuple[float, float, float, float, float, float]
+
+def center_parameterization(x1: float, y1: float, rx: float, ry: float, phi: float,
+                            is_large_arc: bool, is_sweep: bool,
+                            x2: float, y2: float) -> Optional[ArcCenter]:
+    """
+    Convert an arc from endpoint to center parameterization (SVG 1.1
+    F.6.5). Out-of-range radii are corrected (F.6.6), so returned radii
+    may be larger than the given ones. `phi` is in radians, and the arc is
+    the points of angles from `theta1` to `theta1 + delta_theta`.
+
+    Return None when the arc is omitted (same endpoints) or is rendered
+    as a straight line (a zero radius).
+    """
+    if x1 == x2 and y1 == y2:
+        return None
+    rx, ry = abs(rx), abs(ry)
+    if rx == 0 or ry == 0:
+        return None
+
+    cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+    dx2, dy2 = (x1 - x2) / 2, (y1 - y2) / 2
+    x1p = cos_phi * dx2 + sin_phi * dy2
+    y1p = -sin_phi * dx2 + cos_phi * dy2
+
+    lam = (x1p * x1p) / (rx * rx) + (y1p * y1p) / (ry * ry)
+    if lam > 1:
+        s = math.sqrt(lam)
+        rx, ry = rx * s, ry * s
+
+    sqr_rx, sqr_ry = rx * rx, ry * ry
+    numr = sqr_rx * sqr_ry - sqr_rx * y1p * y1p - sqr_ry * x1p * x1p
+    denm = sqr_rx * y1p * y1p + sqr_ry * x1p * x1p
+    # the radii are at least just enough, so a negative value is a rounding
+    # error
+    coef = math.sqrt(max(0., numr / denm))
+    if is_large_arc == is_sweep:
+        coef = -coef
+    cxp = coef * rx * y1p / ry
+    cyp = -coef * ry * x1p / rx
+
+    cx = cos_phi * cxp - sin_phi * cyp + (x1 + x2) / 2
+    cy = sin_phi * cxp + cos_phi * cyp + (y1 + y2) / 2
+    theta1 = math.atan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+    theta2 = math.atan2((-y1p - cyp) / ry, (-x1p - cxp) / rx)
+    dtheta = theta2 - theta1
+    if is_sweep and dtheta < 0:
+        dtheta += 2 * math.pi
+    elif not is_sweep and dtheta > 0:
+        dtheta -= 2 * math.pi
+    return cx, cy, rx, ry, theta1, dtheta
+
+
 def _x_axis_rotation(cp: Point, sp: Point, rx: float) -> float:
     dx, dy = sp.x - cp.x, sp.y - cp.y
 
@@ -0,0 +1,330 @@
+"""
+String-to-string operations on pathdata.
+
+`transform_d` and `normalize_d` tokenize a pathdata string, then absolutize,
+transform and format flat lists of coordinates without building `PathData`,
+`Command` or `Point` objects. The results are the same strings as the operations on
+`PathData` objects. A pathdata which includes elliptical arcs or which is
+not well-formed is processed by `PathData` instead, so errors are the same
+as well.
+"""
+from __future__ import annotations
+from typing import Optional
+import re
+
+from .transform import Transform
+from .pathdata import PathData, temporary_repr_relative
+from .utils import number_repr
+from . import parser
+
+
+def transform_d(d: str, t: Transform, *,
+                noexception=False,
+                collapse_hv_lineto=False,
+                collapse_elliptical_arc=False,
+                repr_relative=False,
+                repr_absolute=False) -> str:
+    """
+    Return the transformed pathdata string of `d`. The result is the same
+    as `PathData.transform` followed by `str()`.
+
+    :param repr_relative: if True, show all commands in relative coords.
+    :param repr_absolute: if True, show all commands in absolute coords.
+
+    The other keyword arguments are the same as `PathData.transform`.
+    """
+    try:
+        cmds = _tokenize(d)
+        if not (noexception or collapse_hv_lineto) and \
+           any(fn in 'HhVv' for fn, _ in cmds):
+            raise _Fallback
+        return _format(_absolutized(cmds, t, collapse_hv_lineto=True),
+                       repr_relative=repr_relative, repr_absolute=repr_absolute)
+    except _Fallback:
+        pass
+
+    pd = parser.pathdata(d)
+    pd.transform(t,
+                 noexception=noexception,
+                 collapse_hv_lineto=collapse_hv_lineto,
+                 collapse_elliptical_arc=collapse_elliptical_arc)
+    if repr_absolute:
+        pd.absolutize()
+    with temporary_repr_relative(repr_relative):
+        return str(pd)
+
+
+def normalize_d(d: str, *,
+                transform: Optional[Transform] = None,
+                repr_relative=False,
+                collapse_hv_lineto=False,
+                collapse_elliptical_arc=False,
+                allow_implicit_lineto=False,
+                use_shorthand=False,
+                simplify: Optional[float] = None,
+                fit_curves: Optional[float] = None,
+                optimize=False) -> str:
+    """
+    Return the normalized pathdata string of `d`. The result is the same
+    as `PathData.normalize` followed by `str()`.
+
+    :param transform: if given, transform the pathdata before normalizing
+        as `PathData.transform` with the collapse options.
+    :param use_shorthand: if True, write curves in S/Q/T by
+        `PathData.shorthand_curves` at last.
+    :param simplify: if given, simplify the normalized pathdata by
+        `PathData.simplify` with this tolerance.
+    :param fit_curves: if given, fit curves to the normalized pathdata by
+        `PathData.fit_curves` with this tolerance.
+    :param optimize: if True, remove degenerate and redundant commands
+        by `PathData.optimize` after simplifying and fitting.
+
+    The other keyword arguments are the same as `PathData.normalize`.
+    """
+    try:
+        if use_shorthand or simplify is not None or fit_curves is not None or optimize:
+            raise _Fallback
+        cmds = _tokenize(d)
+        if transform is not None and not collapse_hv_lineto and \
+           any(fn in 'HhVv' for fn, _ in cmds):
+            raise _Fallback
+        return _format(_merged(_absolutized(cmds, transform,
+                                            collapse_hv_lineto=collapse_hv_lineto),
+                               allow_implicit_lineto=allow_implicit_lineto),
+                       repr_relative=repr_relative, repr_absolute=not repr_relative)
+    except _Fallback:
+        pass
+
+    return str(normalized_pathdata(
+        d,
+        transform=transform,
+        repr_relative=repr_relative,
+        collapse_hv_lineto=collapse_hv_lineto,
+        collapse_elliptical_arc=collapse_elliptical_arc,
+        allow_implicit_lineto=allow_implicit_lineto,
+        use_shorthand=use_shorthand,
+        simplify=simplify,
+        fit_curves=fit_curves,
+        optimize=optimize,
+    ))
+
+
+def normalized_pathdata(d: str, *,
+                        transform: Optional[Transform] = None,
+                        repr_relative=False,
+                        collapse_hv_lineto=False,
+                        collapse_elliptical_arc=False,
+                        allow_implicit_lineto=False,
+                        use_shorthand=False,
+                        simplify: Optional[float] = None,
+                        fit_curves: Optional[float] = None,
+                        optimize=False) -> PathData:
+    """
+    Return the `PathData` of `normalize_d` before formatting. The keyword
+    arguments are the same as `normalize_d`.
+    """
+    pd = parser.pathdata(d)
+    if transform is not None:
+        pd.transform(transform,
+                     collapse_hv_lineto=collapse_hv_lineto,
+                     collapse_elliptical_arc=collapse_elliptical_arc)
+    pd.normalize(repr_relative=repr_relative,
+                 collapse_hv_lineto=collapse_hv_lineto,
+                 collapse_elliptical_arc=collapse_elliptical_arc,
+                 allow_implicit_lineto=allow_implicit_lineto)
+    if simplify is not None:
+        pd.simplify(simplify)
+    if fit_curves is not None:
+        pd.fit_curves(fit_curves)
+    if optimize:
+        pd.optimize()
+    if use_shorthand:
+        pd.shorthand_curves()
+    return pd
+
+
+
+class _Fallback(Exception):
+    """
+    Raised when the pathdata should be processed by `PathData`.
+    """
+
+
+_COMMAND_LETTERS = re.compile(r'([MmZzLlHhVvCcSsQqTtAa])')
+_NUMBER = re.compile(r'[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?')
+_WSP = re.compile(r'[\t\n\x0b\x0c\r ]*')
+_COMMA_WSP = re.compile(r'[\t\n\x0b\x0c\r ,]*')
+_NUMS_PER_ITEM = {
+    'm': 2, 'l': 2, 't': 2, 'c': 6, 's': 4, 'q': 4, 'h': 1, 'v': 1,
+    'M': 2, 'L': 2, 'T': 2, 'C': 6, 'S': 4, 'Q': 4, 'H': 1, 'V': 1,
+}
+
+_Tokens = list[tuple[str, list[float]]]
+
+def _tokenize(d: str) -> _Tokens:
+    parts = _COMMAND_LETTERS.split(d)
+    if not _WSP.fullmatch(parts[0]):
+        raise _Fallback
+
+    cmds = []
+    for i in range(1, len(parts), 2):
+        fn, args = parts[i], parts[i+1]
+        fn_ = fn.lower()
+        if fn_ == 'z':
+            if not _WSP.fullmatch(args):
+                raise _Fallback
+            cmds.append((fn, []))
+            continue
+        if fn_ == 'a':
+            raise _Fallback
+
+        nums = _NUMBER.findall(args)
+        if not nums or len(nums) % _NUMS_PER_ITEM[fn] != 0 or \
+           not _COMMA_WSP.fullmatch(_NUMBER.sub('', args)):
+            raise _Fallback
+        if fn_ in 'hv' and args.rstrip('\t\n\x0b\x0c\r ').endswith(','):
+            raise _Fallback
+        cmds.append((fn, [float(n) for n in nums]))
+
+    if cmds and cmds[0][0] not in 'Mm':
+        raise _Fallback
+    return cmds
+
+
+# An absolutized command is a list of
+# [letter, is_relative, start_x, start_y, coords]. Coords are flat pairs
+# of (x, y), or values of x or y for H/V.
+_AbsCommand = list
+
+def _absolutized(cmds: _Tokens, t: Optional[Transform], *,
+                 collapse_hv_lineto: bool) -> list[_AbsCommand]:
+    results: list[_AbsCommand] = []
+    cx = cy = 0.
+    mx = my = 0.
+    for i, (fn, nums) in enumerate(cmds):
+        fn_ = fn.upper()
+        is_rel = fn.islower()
+        sx, sy = cx, cy
+
+        if fn_ == 'Z':
+            results.append(['Z', is_rel, sx, sy, []])
+            cx, cy = mx, my
+            continue
+
+        if fn_ in 'HV':
+            acc = cx if fn_ == 'H' else cy
+            values = []
+            for n in nums:
+                acc = acc + n if is_rel else n
+                values.append(acc)
+            if fn_ == 'H':
+                cx = acc
+            else:
+                cy = acc
+            if collapse_hv_lineto:
+                results.append(['L', is_rel, sx, sy, [cx, cy]])
+            else:
+                results.append([fn_, is_rel, sx, sy, values])
+            continue
+
+        if i == 0:
+            # the first moveto point is always absolute
+            cx, cy = nums[0], nums[1]
+        step = _NUMS_PER_ITEM[fn]
+        coords = []
+        for j in range(0, len(nums), step):
+            for k in range(j, j + step, 2):
+                x, y = nums[k], nums[k+1]
+                if is_rel and (i > 0 or k > 0):
+                    x, y = cx + x, cy + y
+                coords.append(x)
+                coords.append(y)
+            cx, cy = x, y
+        if fn_ == 'M':
+            mx, my = coords[0], coords[1]
+        results.append([fn_, is_rel, sx, sy, coords])
+
+    if t is not None:
+        _transform_in_place(results, t)
+    return results
+
+
+def _transform_in_place(cmds: list[_AbsCommand], t: Transform) -> None:
+    a, b, c, d, e, f = t.a, t.b, t.c, t.d, t.e, t.f
+    for cmd in cmds:
+        fn, _, x, y, coords = cmd
+        if fn in 'HV':
+            raise _Fallback
+        cmd[2] = a * x + c * y + e
+        cmd[3] = b * x + d * y + f
+        for k in range(0, len(coords), 2):
+            x, y = coords[k], coords[k+1]
+            coords[k] = a * x + c * y + e
+            coords[k+1] = b * x + d * y + f
+
+
+def _merged(cmds: list[_AbsCommand], *, allow_implicit_lineto: bool) -> list[_AbsCommand]:
+    merged: list[_AbsCommand] = []
+    for cmd in cmds:
+        fn, _, _, _, coords = cmd
+        if fn == 'M':
+            merged.append(cmd)
+            if not allow_implicit_lineto and len(coords) > 2:
+                merged.append(['L', False, coords[0], coords[1], coords[2:]])
+                del coords[2:]
+            continue
+
+        prev = merged[-1]
+        if fn == 'L' and (prev[0] == 'L' or (allow_implicit_lineto and prev[0] == 'M')):
+            prev[4] += coords
+        elif fn == prev[0]:
+            if fn in 'HVZ':
+                prev[4] = coords[-1:]
+            else:
+                prev[4] += coords
+        else:
+            if fn in 'HVZ':
+                cmd[4] = coords[-1:]
+            merged.append(cmd)
+
+    return merged
+
+
+_STEPS = {'M': 2, 'L': 2, 'T': 2, 'C': 6, 'S': 4, 'Q': 4}
+
+def _format(cmds: list[_AbsCommand], *, repr_relative: bool, repr_absolute: bool) -> str:
+    nr = number_repr
+    reprs = []
+    for i, (fn, is_rel, sx, sy, coords) in enumerate(cmds):
+        rel = repr_relative or (not repr_absolute and is_rel)
+        rpr = fn.lower() if rel else fn
+
+        if fn == 'Z':
+            reprs.append(rpr)
+            continue
+
+        if fn in 'HV':
+            cur = sx if fn == 'H' else sy
+            for n in coords:
+                rpr += ' ' + nr(n - cur if rel else n)
+                cur = n
+            reprs.append(rpr)
+            continue
+
+        step = _STEPS[fn]
+        first = 0
+        if i == 0:
+            sx, sy = coords[0], coords[1]
+            rpr += f' {nr(sx)},{nr(sy)}'
+            first = 2
+        for j in range(first, len(coords), step):
+            for k in range(j, j + step, 2):
+                x, y = coords[k], coords[k+1]
+                if rel:
+                    rpr += f' {nr(x - sx)},{nr(y - sy)}'
+                else:
+                    rpr += f' {nr(x)},{nr(y)}'
+            sx, sy = x, y
+        reprs.append(rpr)
+
+    return ' '.join(reprs)
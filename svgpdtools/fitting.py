@@ -0,0 +1,214 @@
+"""
+Fitting cubic beziers to runs of straight lines (Philip J. Schneider,
+"An Algorithm for Automatically Fitting Digitized Curves", Graphics Gems).
+
+A run is first split at corners, then each piece is fitted by least
+squares with chord-length parameters refined by Newton's method, and is
+split at the point of the maximum error until every curve is within the
+tolerance. Pieces are processed with an explicit stack.
+"""
+from __future__ import annotations
+from collections.abc import Sequence
+from typing import Optional
+import math
+
+from .command import Command, Curveto
+from .graphics import Point
+from .simplify import replace_line_runs
+
+
+# (x0, y0, x1, y1, x2, y2, x3, y3)
+Cubic = tuple[float, float, float, float, float, float, float, float]
+
+_Vec = tuple[float, float]
+
+# a run is split where its direction turns more than 60 degrees
+_CORNER_COS = .5
+_MAX_ITERATIONS = 4
+
+
+def fit_cubics(xs: Sequence[float], ys: Sequence[float], tolerance: float) -> list[Cubic]:
+    """
+    Return cubic beziers approximating the polyline within `tolerance`.
+    The curves are continuous and pass through the first and last points.
+    """
+    if not tolerance > 0:
+        raise ValueError(f'tolerance should be positive: {tolerance}')
+
+    ps: list[_Vec] = []
+    for x, y in zip(xs, ys):
+        if not ps or ps[-1] != (x, y):
+            ps.append((x, y))
+    if len(ps) < 2:
+        return []
+
+    cubics: list[Cubic] = []
+    first = 0
+    for i in range(1, len(ps) - 1):
+        d1 = _unit(_sub(ps[i], ps[i-1]))
+        d2 = _unit(_sub(ps[i+1], ps[i]))
+        if _dot(d1, d2) < _CORNER_COS:
+            cubics += _fit_piece(ps, first, i, tolerance * tolerance)
+            first = i
+    cubics += _fit_piece(ps, first, len(ps) - 1, tolerance * tolerance)
+    return cubics
+
+
+def fitted_commands(cmds: Sequence[Command], tolerance: float) -> list[Command]:
+    """
+    Return commands whose runs of straight lines are replaced with curveto
+    commands. The commands should be absolutized. A run is replaced only
+    when the curves have fewer coordinates than the lines.
+    """
+    def fitted(xs: list[float], ys: list[float]) -> Optional[Command]:
+        if len(xs) < 4:
+            return None
+        cubics = fit_cubics(xs, ys, tolerance)
+        if 3 * len(cubics) >= len(xs) - 1:
+            return None
+        return Curveto('C', [Point(c[k], c[k+1]) for c in cubics for k in (2, 4, 6)])
+
+    return replace_line_runs(cmds, fitted)
+
+
+def _fit_piece(ps: list[_Vec], first: int, last: int, error: float) -> list[Cubic]:
+    cubics: list[Cubic] = []
+    stack = [(first, last,
+              _unit(_sub(ps[first+1], ps[first])),
+              _unit(_sub(ps[last-1], ps[last])))]
+    while stack:
+        first, last, tan1, tan2 = stack.pop()
+        p0, p3 = ps[first], ps[last]
+        if last - first == 1:
+            dist = _norm(_sub(p3, p0)) / 3
+            cubics.append(_cubic(p0, _add(p0, _scale(tan1, dist)), _add(p3, _scale(tan2, dist)), p3))
+            continue
+
+        u = _chord_length_params(ps, first, last)
+        bez = _generate(ps, first, last, u, tan1, tan2)
+        max_error, split = _max_error(ps, first, last, bez, u)
+        if max_error < error:
+            cubics.append(_cubic(*bez))
+            continue
+
+        if max_error < error * 4:
+            for _ in range(_MAX_ITERATIONS):
+                u = _reparameterize(ps, first, last, bez, u)
+                bez = _generate(ps, first, last, u, tan1, tan2)
+                max_error, split = _max_error(ps, first, last, bez, u)
+                if max_error < error:
+                    break
+            if max_error < error:
+                cubics.append(_cubic(*bez))
+                continue
+
+        center = _unit(_sub(ps[split-1], ps[split+1]))
+        if center == (0., 0.):
+            center = _unit((ps[split][1] - ps[split-1][1], ps[split-1][0] - ps[split][0]))
+        stack.append((split, last, _scale(center, -1), tan2))
+        stack.append((first, split, tan1, center))
+    return cubics
+
+
+def _chord_length_params(ps: list[_Vec], first: int, last: int) -> list[float]:
+    u = [0.]
+    for i in range(first + 1, last + 1):
+        u.append(u[-1] + _norm(_sub(ps[i], ps[i-1])))
+    total = u[-1]
+    return [v / total for v in u]
+
+
+def _generate(ps: list[_Vec], first: int, last: int, u: list[float],
+              tan1: _Vec, tan2: _Vec) -> tuple[_Vec, _Vec, _Vec, _Vec]:
+    p0, p3 = ps[first], ps[last]
+    c00 = c01 = c11 = x0 = x1 = 0.
+    for i, t in enumerate(u):
+        mt = 1 - t
+        b0, b1, b2, b3 = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+        a1, a2 = _scale(tan1, b1), _scale(tan2, b2)
+        c00 += _dot(a1, a1)
+        c01 += _dot(a1, a2)
+        c11 += _dot(a2, a2)
+        p = ps[first + i]
+        tmp = (p[0] - (p0[0] * (b0 + b1) + p3[0] * (b2 + b3)),
+               p[1] - (p0[1] * (b0 + b1) + p3[1] * (b2 + b3)))
+        x0 += _dot(a1, tmp)
+        x1 += _dot(a2, tmp)
+
+    det_c0_c1 = c00 * c11 - c01 * c01
+    det_c0_x = c00 * x1 - c01 * x0
+    det_x_c1 = x0 * c11 - x1 * c01
+    alpha1 = 0. if det_c0_c1 == 0 else det_x_c1 / det_c0_c1
+    alpha2 = 0. if det_c0_c1 == 0 else det_c0_x / det_c0_c1
+
+    seg_length = _norm(_sub(p3, p0))
+    epsilon = 1e-6 * seg_length
+    if alpha1 < epsilon or alpha2 < epsilon:
+        alpha1 = alpha2 = seg_length / 3
+    return p0, _add(p0, _scale(tan1, alpha1)), _add(p3, _scale(tan2, alpha2)), p3
+
+
+def _max_error(ps: list[_Vec], first: int, last: int,
+               bez: tuple[_Vec, _Vec, _Vec, _Vec], u: list[float]) -> tuple[float, int]:
+    max_dist, split = 0., (first + last) // 2
+    for i in range(first + 1, last):
+        q = _bezier(bez, u[i - first])
+        d = _sub(q, ps[i])
+        dist = _dot(d, d)
+        if dist >= max_dist:
+            max_dist, split = dist, i
+    return max_dist, split
+
+
+def _reparameterize(ps: list[_Vec], first: int, last: int,
+                    bez: tuple[_Vec, _Vec, _Vec, _Vec], u: list[float]) -> list[float]:
+    p0, p1, p2, p3 = bez
+    d1 = (_scale(_sub(p1, p0), 3), _scale(_sub(p2, p1), 3), _scale(_sub(p3, p2), 3))
+    d2 = (_scale(_sub(d1[1], d1[0]), 2), _scale(_sub(d1[2], d1[1]), 2))
+    results = []
+    for i, t in enumerate(u):
+        q = _sub(_bezier(bez, t), ps[first + i])
+        q1 = _bezier2(d1, t)
+        q2 = _add(_scale(d2[0], 1 - t), _scale(d2[1], t))
+        denominator = _dot(q1, q1) + _dot(q, q2)
+        results.append(t if denominator == 0 else t - _dot(q, q1) / denominator)
+    return results
+
+
+def _bezier(bez: tuple[_Vec, _Vec, _Vec, _Vec], t: float) -> _Vec:
+    p0, p1, p2, p3 = bez
+    mt = 1 - t
+    b0, b1, b2, b3 = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+    return (b0 * p0[0] + b1 * p1[0] + b2 * p2[0] + b3 * p3[0],
+            b0 * p0[1] + b1 * p1[1] + b2 * p2[1] + b3 * p3[1])
+
+
+def _bezier2(bez: tuple[_Vec, _Vec, _Vec], t: float) -> _Vec:
+    p0, p1, p2 = bez
+    mt = 1 - t
+    b0, b1, b2 = mt * mt, 2 * mt * t, t * t
+    return b0 * p0[0] + b1 * p1[0] + b2 * p2[0], b0 * p0[1] + b1 * p1[1] + b2 * p2[1]
+
+
+def _cubic(p0: _Vec, p1: _Vec, p2: _Vec, p3: _Vec) -> Cubic:
+    return p0[0], p0[1], p1[0], p1[1], p2[0], p2[1], p3[0], p3[1]
+
+
+def _add(a: _Vec, b: _Vec) -> _Vec:
+    return a[0] + b[0], a[1] + b[1]
+
+def _sub(a: _Vec, b: _Vec) -> _Vec:
+    return a[0] - b[0], a[1] - b[1]
+
+def _scale(a: _Vec, s: float) -> _Vec:
+    return a[0] * s, a[1] * s
+
+def _dot(a: _Vec, b: _Vec) -> float:
+    return a[0] * b[0] + a[1] * b[1]
+
+def _norm(a: _Vec) -> float:
+    return math.hypot(a[0], a[1])
+
+def _unit(a: _Vec) -> _Vec:
+    n = _norm(a)
+    return (0., 0.) if n == 0 else (a[0] / n, a[1] / n)
@@ -131,3 +131,40 @@ class Circle:
     def tangent_through(self, p: Point) -> Line:
         po = line_through(self.c, p)
         return po.perpendicular_through(p)
+
+
+@dataclass
+class Rect:
+    """
+    Axis-aligned rectangle. Shown as the SVG's viewBox, `x y width height`.
+    """
+    min_x: float = 0.
+    min_y: float = 0.
+    max_x: float = 0.
+    max_y: float = 0.
+
+    def __repr__(self) -> str:
+        return ' '.join(number_repr(n) for n in (self.min_x, self.min_y, self.width, self.height))
+
+    @property
+    def width(self) -> float:
+        return self.max_x - self.min_x
+
+    @property
+    def height(self) -> float:
+        return self.max_y - self.min_y
+
+    def union(self, other: Rect) -> Rect:
+        return Rect(
+            min_x = min(self.min_x, other.min_x),
+            min_y = min(self.min_y, other.min_y),
+            max_x = max(self.max_x, other.max_x),
+            max_y = max(self.max_y, other.max_y),
+        )
+
+    def intersects(self, other: Rect) -> bool:
+        return self.min_x <= other.max_x and other.min_x <= self.max_x and \
+            self.min_y <= other.max_y and other.min_y <= self.max_y
+
+    def contains_point(self, p: Point) -> bool:
+        return self.min_x <= p.x <= self.max_x and self.min_y <= p.y <= self.max_y
@@ -0,0 +1,328 @@
+"""
+Intersections of pathdata.
+
+Segments are converted to bezier curves: lines and beziers as they are,
+and elliptical arcs as cubics of at most 22.5 degrees each. Candidate
+pairs of curves are found by sweeping a vertical line over the bounding
+boxes of their control points in the order of their left sides, so only
+the boxes overlapping on the sweep line are compared, instead of all
+pairs.
+
+A candidate pair is solved by bezier clipping (Sederberg and Nishita):
+each curve is clipped to the parameter range where its control polygon
+lies within the fat line of the other, and a pair which does not shrink
+enough is split in half. The points found are polished by Newton's method
+on the exact segments, so the intersections with elliptical arcs are
+exact too. Overlapping collinear parts have no isolated intersections and
+are not reported.
+"""
+from __future__ import annotations
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from typing import Optional
+import heapq, math
+
+from .command import Command
+from .segments import PreparedSegment, closest_parameter, iter_segments, prepared_segment, \
+    segment_derivatives, segment_point, split_bezier
+
+
+_Vec = tuple[float, float]
+
+# the largest angle of an elliptical arc approximated by a cubic
+_ARC_STEP = math.pi / 8
+# the largest number of pairs of sub-curves examined for a pair of curves
+_MAX_PAIRS = 1 << 15
+_NEWTON_ITERATIONS = 6
+
+
+@dataclass(frozen=True)
+class Intersection:
+    """
+    An intersection point `(x, y)` of the record `a` of the segments of
+    the first pathdata at its parameter `ta`, and the record `b` of the
+    second at `tb` (see `PathData.segments()`).
+    """
+    a: int
+    ta: float
+    b: int
+    tb: float
+    x: float
+    y: float
+
+
+def intersections(a: Sequence[Command], b: Sequence[Command], *,
+                  tolerance: float = 1e-9) -> list[Intersection]:
+    """
+    Return the intersections of the segments of two pathdata, in the
+    order of the segments of `a`. Points closer than `tolerance` are
+    merged. Raises an exception on segments which stay too close to be
+    separated, e.g. nearly coincident curves.
+    """
+    found = intersections_many([a], [b], tolerance=tolerance)
+    return [x for _, _, x in found]
+
+
+def intersections_many(pds: Sequence[Sequence[Command]],
+                       others: Optional[Sequence[Sequence[Command]]] = None, *,
+                       tolerance: float = 1e-9) -> list[tuple[int, int, Intersection]]:
+    """
+    Return `(i, j, intersection)` of the pathdata `pds[i]` and
+    `others[j]`. Without `others`, the pairs of different pathdata of
+    `pds` are intersected, with `i < j`. Self-intersections are not
+    reported.
+    """
+    if not tolerance > 0:
+        raise ValueError(f'tolerance should be positive: {tolerance}')
+
+    curves = [_curves(pd, i) for i, pd in enumerate(pds)]
+    if others is None:
+        items = [c for cs in curves for c in cs]
+        pairs = _swept_pairs(items, items)
+    else:
+        other_items = [c for j, pd in enumerate(others) for c in _curves(pd, j)]
+        pairs = _swept_pairs([c for cs in curves for c in cs], other_items)
+
+    found: dict[tuple[int, int], list[Intersection]] = {}
+    for c, d in pairs:
+        if others is None:
+            if c.path == d.path:
+                continue
+            if c.path > d.path:
+                c, d = d, c
+        points = found.setdefault((c.path, d.path), [])
+        for s, u in _curve_intersections(c, d, tolerance):
+            x = _polished(c, d, s, u)
+            if all(math.hypot(x.x - p.x, x.y - p.y) > tolerance for p in points):
+                points.append(x)
+
+    results = []
+    for (i, j), points in sorted(found.items()):
+        points.sort(key=lambda x: (x.a, x.ta, x.b, x.tb))
+        results.extend((i, j, x) for x in points)
+    return results
+
+
+@dataclass(frozen=True)
+class _Curve:
+    path: int
+    index: int
+    seg: PreparedSegment
+    # the range of the segment parameter covered by `points`
+    t0: float
+    t1: float
+    points: tuple[_Vec, ...]
+    box: tuple[float, float, float, float]
+
+
+def _curves(cmds: Sequence[Command], path: int) -> list[_Curve]:
+    curves = []
+    for index, seg in enumerate(iter_segments(cmds)):
+        if seg[0] == 'M':
+            continue
+        prepared = prepared_segment(seg)
+        op = prepared[0]
+        if op != 'E':
+            ps = tuple((prepared[k], prepared[k+1]) for k in range(1, len(prepared), 2))
+            curves.append(_curve(path, index, prepared, 0., 1., ps))
+            continue
+
+        dtheta = prepared[8]
+        n = max(1, math.ceil(abs(dtheta) / _ARC_STEP))
+        for k in range(n):
+            curves.append(_curve(path, index, prepared, k / n, (k + 1) / n, _arc_cubic(prepared, k / n, (k + 1) / n)))
+    return curves
+
+
+def _curve(path: int, index: int, seg: PreparedSegment, t0: float, t1: float, ps: tuple[_Vec, ...]) -> _Curve:
+    xs = [p[0] for p in ps]
+    ys = [p[1] for p in ps]
+    return _Curve(path, index, seg, t0, t1, ps, (min(xs), min(ys), max(xs), max(ys)))
+
+
+def _arc_cubic(seg: PreparedSegment, t0: float, t1: float) -> tuple[_Vec, ...]:
+    p0, d0, _ = segment_derivatives(seg, t0)
+    p3, d3, _ = segment_derivatives(seg, t1)
+    # the length of the handles of a cubic through the ends of an arc of
+    # the angle delta is 4/3 * tan(delta / 4)
+    dtheta = seg[8] * (t1 - t0)
+    k = 4 / 3 * math.tan(dtheta / 4) / seg[8] if seg[8] else 0.
+    return (p0, (p0[0] + d0[0] * k, p0[1] + d0[1] * k),
+            (p3[0] - d3[0] * k, p3[1] - d3[1] * k), p3)
+
+
+def _swept_pairs(items: list[_Curve], others: list[_Curve]) -> Iterator[tuple[_Curve, _Curve]]:
+    # `items` is `others` when a collection is intersected with itself
+    same = items is others
+    events = sorted([(c.box[0], 0, i) for i, c in enumerate(items)] +
+                    ([] if same else [(c.box[0], 1, j) for j, c in enumerate(others)]))
+    active: tuple[dict[int, _Curve], dict[int, _Curve]] = ({}, {})
+    # (max_x, side, index) of the active boxes, to remove the passed ones
+    expiry: list[tuple[float, int, int]] = []
+    for min_x, side, i in events:
+        while expiry and expiry[0][0] < min_x:
+            _, s, j = heapq.heappop(expiry)
+            del active[s][j]
+
+        c = (items, others)[side][i]
+        box = c.box
+        for d in active[0 if same else 1 - side].values():
+            if box[1] <= d.box[3] and d.box[1] <= box[3]:
+                yield (c, d) if side == 0 else (d, c)
+        active[side][i] = c
+        heapq.heappush(expiry, (box[2], side, i))
+
+
+def _curve_intersections(c: _Curve, d: _Curve, tolerance: float) -> list[tuple[float, float]]:
+    # parameters of the intersections in the segment parameters of the
+    # curves
+    results: list[tuple[float, float]] = []
+    if _within_line(c.points, d.points, tolerance) and _within_line(d.points, c.points, tolerance):
+        # collinear overlapping parts
+        return results
+    stack = [(c.points, 0., 1., d.points, 0., 1.)]
+    n = 0
+    while stack:
+        n += 1
+        if n > _MAX_PAIRS:
+            raise Exception(f'the segments {c.index} and {d.index} do not separate after '
+                            f'{_MAX_PAIRS} subdivisions; they may run closer than the '
+                            f'tolerance {tolerance} for a while')
+        p, p0, p1, q, q0, q1 = stack.pop()
+        if not _boxes_overlap(p, q):
+            continue
+        if _within_line(p, q, tolerance) and _within_line(q, p, tolerance):
+            # the curves are flat and closer than the tolerance here, e.g.
+            # near a tangency where clipping converges slowly
+            results.append((c.t0 + (c.t1 - c.t0) * (p0 + p1) / 2,
+                            d.t0 + (d.t1 - d.t0) * (q0 + q1) / 2))
+            continue
+
+        # clip each curve by the fat line of the other
+        r = _clipped_range(p, q, tolerance / 2)
+        if r is None:
+            continue
+        p, p0, p1 = _sub_curve(p, *r), p0 + (p1 - p0) * r[0], p0 + (p1 - p0) * r[1]
+        s = _clipped_range(q, p, tolerance / 2)
+        if s is None:
+            continue
+        q, q0, q1 = _sub_curve(q, *s), q0 + (q1 - q0) * s[0], q0 + (q1 - q0) * s[1]
+
+        if _extent(p) <= tolerance and _extent(q) <= tolerance:
+            results.append((c.t0 + (c.t1 - c.t0) * (p0 + p1) / 2,
+                            d.t0 + (d.t1 - d.t0) * (q0 + q1) / 2))
+            continue
+
+        if r[1] - r[0] > .8 and s[1] - s[0] > .8:
+            # the fat lines do not clip enough, so the longer curve is
+            # split in half
+            if _extent(p) >= _extent(q):
+                left, right = split_bezier(list(p), .5)
+                m = (p0 + p1) / 2
+                stack.append((tuple(left), p0, m, q, q0, q1))
+                stack.append((tuple(right), m, p1, q, q0, q1))
+            else:
+                left, right = split_bezier(list(q), .5)
+                m = (q0 + q1) / 2
+                stack.append((p, p0, p1, tuple(left), q0, m))
+                stack.append((p, p0, p1, tuple(right), m, q1))
+        else:
+            stack.append((p, p0, p1, q, q0, q1))
+    return results
+
+
+def _clipped_range(p: tuple[_Vec, ...], q: tuple[_Vec, ...],
+                   slack: float) -> Optional[tuple[float, float]]:
+    # the range of the parameters of `p` where its convex hull lies within
+    # the fat line of `q` widened by `slack` against rounding errors
+    (ax, ay), (bx, by) = q[0], q[-1]
+    dx, dy = bx - ax, by - ay
+    length = math.hypot(dx, dy)
+    if length == 0:
+        # a closed curve; its fat line is along the farthest point
+        far = max(q, key=lambda v: math.hypot(v[0] - ax, v[1] - ay))
+        dx, dy = far[0] - ax, far[1] - ay
+        length = math.hypot(dx, dy)
+        if length == 0:
+            return 0., 1.
+    nx, ny = -dy / length, dx / length
+
+    def dist(v: _Vec) -> float:
+        return (v[0] - ax) * nx + (v[1] - ay) * ny
+
+    ds = [dist(v) for v in q]
+    d_min, d_max = min(ds) - slack, max(ds) + slack
+
+    m = len(p) - 1
+    hull = [(j / m, dist(v)) for j, v in enumerate(p)]
+    t_min, t_max = math.inf, -math.inf
+    for i in range(len(hull)):
+        ti, di = hull[i]
+        if d_min <= di <= d_max:
+            t_min, t_max = min(t_min, ti), max(t_max, ti)
+        for j in range(i + 1, len(hull)):
+            tj, dj = hull[j]
+            if di == dj:
+                continue
+            for level in (d_min, d_max):
+                u = (level - di) / (dj - di)
+                if 0. <= u <= 1.:
+                    t = ti + (tj - ti) * u
+                    t_min, t_max = min(t_min, t), max(t_max, t)
+    if t_min > t_max:
+        return None
+    return max(0., t_min), min(1., t_max)
+
+
+def _within_line(p: tuple[_Vec, ...], q: tuple[_Vec, ...], tolerance: float) -> bool:
+    # whether the control points of `p` are within `tolerance` of the
+    # chord of `q`
+    (ax, ay), (bx, by) = q[0], q[-1]
+    length = math.hypot(bx - ax, by - ay)
+    if length == 0:
+        return False
+    return all(abs((v[0] - ax) * (by - ay) - (v[1] - ay) * (bx - ax)) <= tolerance * length
+               for v in (*p, *q))
+
+
+def _sub_curve(ps: tuple[_Vec, ...], t0: float, t1: float) -> tuple[_Vec, ...]:
+    curve = list(ps)
+    if t1 < 1.:
+        curve = split_bezier(curve, t1)[0]
+    if t0 > 0.:
+        curve = split_bezier(curve, t0 / t1)[1] if t1 > 0 else [curve[0]] * len(curve)
+    return tuple(curve)
+
+
+def _boxes_overlap(p: tuple[_Vec, ...], q: tuple[_Vec, ...]) -> bool:
+    return min(v[0] for v in p) <= max(v[0] for v in q) and \
+        min(v[0] for v in q) <= max(v[0] for v in p) and \
+        min(v[1] for v in p) <= max(v[1] for v in q) and \
+        min(v[1] for v in q) <= max(v[1] for v in p)
+
+
+def _extent(ps: tuple[_Vec, ...]) -> float:
+    xs = [v[0] for v in ps]
+    ys = [v[1] for v in ps]
+    return max(max(xs) - min(xs), max(ys) - min(ys))
+
+
+def _polished(c: _Curve, d: _Curve, s: float, u: float) -> Intersection:
+    # Newton's method on A(s) - B(u) = 0, from the point of B closest to
+    # A(s), which is all there is at a tangency
+    u = closest_parameter(d.seg, *segment_point(c.seg, s), u)
+    for _ in range(_NEWTON_ITERATIONS):
+        a, da, _ = segment_derivatives(c.seg, s)
+        b, db, _ = segment_derivatives(d.seg, u)
+        fx, fy = a[0] - b[0], a[1] - b[1]
+        det = -da[0] * db[1] + da[1] * db[0]
+        if det == 0 or (fx == 0 and fy == 0):
+            break
+        ns = min(1., max(0., s - (-db[1] * fx + db[0] * fy) / det))
+        nu = min(1., max(0., u - (-da[1] * fx + da[0] * fy) / det))
+        na, nb = segment_point(c.seg, ns), segment_point(d.seg, nu)
+        if math.hypot(na[0] - nb[0], na[1] - nb[1]) >= math.hypot(fx, fy):
+            break
+        s, u = ns, nu
+    x, y = segment_point(c.seg, s)
+    return Intersection(c.index, s, d.index, u, x, y)
@@ -0,0 +1,69 @@
+"""
+Levels of detail of pathdata.
+
+A pathdata is parsed, transformed and normalized once, then encoded with
+`svgpdtools.wire`. Each level decodes its own copy from the blob, so the
+levels share the work before simplification. A level simplifies its copy
+with its tolerance, and formats it with its precision after removing the
+commands which are degenerate at that precision.
+"""
+from __future__ import annotations
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Optional
+
+from .pathdata import PathData
+from .utils import current_precision, temporary_precision
+from . import wire
+
+
+@dataclass(frozen=True)
+class Level:
+    """
+    A level of detail. `tolerance` is for `PathData.simplify`, and 0 keeps
+    every point. `precision` is None for the current precision when the
+    level is formatted.
+    """
+    tolerance: float = 0.
+    precision: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if self.tolerance < 0:
+            raise ValueError(f'tolerance should not be negative: {self.tolerance}')
+        if self.precision is not None and self.precision < 0:
+            raise ValueError(f'precision should not be negative: {self.precision}')
+
+    @staticmethod
+    def from_string(src: str) -> Level:
+        """
+        Parse a level written as `TOLERANCE[:PRECISION]`, e.g. `0.5:2`.
+        """
+        tolerance, _, precision = src.partition(':')
+        try:
+            return Level(float(tolerance), int(precision) if precision else None)
+        except ValueError:
+            raise ValueError(f'Invalid level of detail: {src!r}') from None
+
+
+def level_strings(pd: PathData, levels: Sequence[Level], *, use_shorthand=False) -> list[str]:
+    """
+    Return the pathdata string of each level: a copy of `pd` simplified
+    with the tolerance, optimized by `PathData.optimize` at the precision
+    and formatted. `pd` is not modified.
+
+    :param use_shorthand: if True, write curves in S/Q/T by
+        `PathData.shorthand_curves`. (default False)
+    """
+    blob = wire.dumps(pd)
+    results = []
+    for level in levels:
+        copied = wire.loads(blob)
+        precision = current_precision() if level.precision is None else level.precision
+        with temporary_precision(precision):
+            if level.tolerance > 0:
+                copied.simplify(level.tolerance)
+            copied.optimize()
+            if use_shorthand:
+                copied.shorthand_curves()
+            results.append(str(copied))
+    return results
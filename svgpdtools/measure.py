@@ -0,0 +1,168 @@
+"""
+Arc lengths of pathdata, and points at given lengths along them.
+
+Lengths of curves are integrated with adaptive Gauss-Legendre quadrature
+of the speed `|B'(t)|`. `LengthIndex` keeps the cumulative lengths of the
+segments of a pathdata, so a point at a length is found by a binary
+search and a Newton iteration within one segment.
+"""
+from __future__ import annotations
+from bisect import bisect_left
+from collections.abc import Sequence
+import math
+
+from .command import Command
+from .segments import Segment, PreparedSegment, iter_segments, prepared_segment, segment_point
+from .graphics import Point
+
+
+def _gauss_legendre(n: int) -> list[tuple[float, float]]:
+    # nodes and weights on [0, 1]
+    nodes = []
+    for i in range(1, n + 1):
+        x = math.cos(math.pi * (i - .25) / (n + .5))
+        for _ in range(100):
+            p0, p1 = 1., x
+            for k in range(2, n + 1):
+                p0, p1 = p1, ((2 * k - 1) * x * p1 - (k - 1) * p0) / k
+            dp = n * (x * p1 - p0) / (x * x - 1)
+            dx = p1 / dp
+            x -= dx
+            if abs(dx) < 1e-15:
+                break
+        nodes.append(((1 - x) / 2, 1 / ((1 - x * x) * dp * dp)))
+    return nodes
+
+_GL = _gauss_legendre(16)
+_MAX_DEPTH = 12
+
+
+def _speed(seg: PreparedSegment, t: float) -> float:
+    op = seg[0]
+    if op == 'C':
+        _, x0, y0, x1, y1, x2, y2, x3, y3 = seg
+        mt = 1 - t
+        a, b, c = 3 * mt * mt, 6 * mt * t, 3 * t * t
+        dx = a * (x1 - x0) + b * (x2 - x1) + c * (x3 - x2)
+        dy = a * (y1 - y0) + b * (y2 - y1) + c * (y3 - y2)
+        return math.hypot(dx, dy)
+    if op == 'Q':
+        _, x0, y0, x1, y1, x2, y2 = seg
+        mt = 1 - t
+        return 2 * math.hypot(mt * (x1 - x0) + t * (x2 - x1), mt * (y1 - y0) + t * (y2 - y1))
+    if op == 'E':
+        _, _, _, rx, ry, _, _, theta1, dtheta = seg
+        theta = theta1 + dtheta * t
+        return abs(dtheta) * math.hypot(rx * math.sin(theta), ry * math.cos(theta))
+    if op == 'L':
+        _, x0, y0, x1, y1 = seg
+        return math.hypot(x1 - x0, y1 - y0)
+    return 0.
+
+
+def _gauss(seg: PreparedSegment, a: float, b: float) -> float:
+    h = b - a
+    return h * sum(w * _speed(seg, a + h * x) for x, w in _GL)
+
+
+def _length(seg: PreparedSegment, a: float = 0., b: float = 1.) -> float:
+    op = seg[0]
+    if op == 'L':
+        return _speed(seg, 0.) * (b - a)
+    if op == 'M':
+        return 0.
+
+    # adaptive: halve the interval until both halves agree with the whole
+    stack = [(a, b, _gauss(seg, a, b), 0)]
+    total = 0.
+    while stack:
+        a, b, whole, depth = stack.pop()
+        m = (a + b) / 2
+        left, right = _gauss(seg, a, m), _gauss(seg, m, b)
+        if depth >= _MAX_DEPTH or abs(left + right - whole) <= 1e-12 * max(1., abs(whole)):
+            total += left + right
+        else:
+            stack.append((m, b, right, depth + 1))
+            stack.append((a, m, left, depth + 1))
+    return total
+
+
+def segment_length(seg: Segment) -> float:
+    """
+    Return the arc length of a segment record. A moveto record is 0.
+    """
+    return _length(prepared_segment(seg))
+
+
+class LengthIndex:
+    """
+    Cumulative arc lengths of the segments of commands. Build it once and
+    query points at lengths in O(log n) of the number of segments.
+    """
+    def __init__(self, cmds: Sequence[Command]) -> None:
+        self.segments = [prepared_segment(seg) for seg in iter_segments(cmds)]
+        self.lengths = [_length(seg) for seg in self.segments]
+        self.cumulative: list[float] = []
+        acc = 0.
+        for n in self.lengths:
+            acc += n
+            self.cumulative.append(acc)
+
+    @property
+    def total(self) -> float:
+        return self.cumulative[-1] if self.cumulative else 0.
+
+    def point_at(self, s: float) -> Point:
+        """
+        Return the point at the length `s` from the beginning. `s` is
+        clamped into `[0, total]`.
+        """
+        if not self.segments:
+            raise Exception('The pathdata is empty.')
+
+        if s >= self.total:
+            return Point(*segment_point(self.segments[-1], 1.))
+
+        s = max(s, 0.)
+        i = bisect_left(self.cumulative, s)
+        seg = self.segments[i]
+        local = s - (self.cumulative[i - 1] if i else 0.)
+        return Point(*segment_point(seg, _param_at(seg, local, self.lengths[i])))
+
+    def sample(self, n: int) -> list[Point]:
+        """
+        Return `n` points evenly spaced along the length, including both
+        ends.
+        """
+        if n < 1:
+            return []
+        if n == 1:
+            return [self.point_at(0.)]
+        total = self.total
+        return [self.point_at(total * i / (n - 1)) for i in range(n)]
+
+
+def _param_at(seg: PreparedSegment, s: float, length: float) -> float:
+    # solve `_length(seg, 0, t) == s` by Newton's method safeguarded by
+    # bisection
+    if length <= 0. or s <= 0.:
+        return 0.
+    if s >= length:
+        return 1.
+    if seg[0] == 'L':
+        return s / length
+
+    lo, hi = 0., 1.
+    t = s / length
+    for _ in range(50):
+        f = _length(seg, 0., t) - s
+        if abs(f) <= 1e-10 * max(1., length):
+            break
+        if f > 0:
+            hi = t
+        else:
+            lo = t
+        v = _speed(seg, t)
+        t_next = t - f / v if v > 0 else -1.
+        t = t_next if lo < t_next < hi else (lo + hi) / 2
+    return t
@@ -0,0 +1,160 @@
+"""
+Reading and writing of packed arrays as NumPy `.npy` and `.npz` files or
+raw buffers.
+
+NumPy is not needed: the `.npy` header is a short Python literal of the
+dtype and the shape, followed by the little-endian data of the array, so
+`numpy.load(path, mmap_mode='r')` maps the file without copying. A raw
+buffer is the same data without the header, as uploaded to a GPU. An
+`.npz` file is a zip archive of `.npy` members, stored uncompressed.
+"""
+from __future__ import annotations
+from array import array
+from collections.abc import Mapping
+from typing import BinaryIO, Optional, Union
+import ast, os, pathlib, struct, sys, zipfile
+
+
+_MAGIC = b'\x93NUMPY'
+# the header is padded so the data is aligned to this
+_ALIGNMENT = 64
+
+
+def dtype_of(buf: array) -> str:
+    """
+    Return the NumPy dtype string of an array, e.g. `'<f4'` for
+    `array('f')`.
+    """
+    code = buf.typecode
+    if code in 'fd':
+        kind = 'f'
+    elif code in 'bhilq':
+        kind = 'i'
+    elif code in 'BHILQ':
+        kind = 'u'
+    else:
+        raise ValueError(f'Unsupported typecode: {code}')
+    return f'{"|" if buf.itemsize == 1 else "<"}{kind}{buf.itemsize}'
+
+
+def npy_header(dtype: str, shape: tuple[int, ...]) -> bytes:
+    """
+    Return the header of a `.npy` file (format version 1.0) of a C-ordered
+    array.
+    """
+    shape_repr = f'({shape[0]},)' if len(shape) == 1 else f'({", ".join(map(str, shape))})'
+    header = f"{{'descr': '{dtype}', 'fortran_order': False, 'shape': {shape_repr}, }}"
+    size = len(_MAGIC) + 2 + 2 + len(header) + 1
+    header += ' ' * (-size % _ALIGNMENT) + '\n'
+    return _MAGIC + b'\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin-1')
+
+
+def write_npy(f: BinaryIO, buf: array, shape: Optional[tuple[int, ...]] = None) -> None:
+    """
+    Write an array as a `.npy` file. `shape` defaults to the length of the
+    array; e.g. `(n, 2)` for `x, y` pairs.
+    """
+    shape = _checked_shape(buf, shape)
+    f.write(npy_header(dtype_of(buf), shape))
+    write_raw(f, buf)
+
+
+def write_raw(f: BinaryIO, buf: array) -> None:
+    """
+    Write the little-endian data of an array.
+    """
+    if sys.byteorder == 'big' and buf.itemsize > 1:
+        buf = array(buf.typecode, buf)
+        buf.byteswap()
+    f.write(buf.tobytes())
+
+
+def save(path: Union[str, os.PathLike], buf: array, shape: Optional[tuple[int, ...]] = None) -> None:
+    """
+    Write an array into a file: a `.npy` file if the path ends with
+    `.npy`, and the raw data otherwise.
+    """
+    path = pathlib.Path(path)
+    with open(path, 'wb') as f:
+        if path.suffix == '.npy':
+            write_npy(f, buf, shape)
+        else:
+            write_raw(f, buf)
+
+
+def write_npz(path: Union[str, os.PathLike],
+              arrays: Mapping[str, Union[array, tuple[array, tuple[int, ...]]]]) -> None:
+    """
+    Write arrays into an `.npz` file, as `numpy.savez` does. A value is an
+    array, or an array and its shape.
+    """
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED, allowZip64=True) as z:
+        for name, value in arrays.items():
+            buf, shape = value if isinstance(value, tuple) else (value, None)
+            with z.open(f'{name}.npy', 'w', force_zip64=True) as f:
+                write_npy(f, buf, shape)
+
+
+def read_npy(f: BinaryIO) -> tuple[array, tuple[int, ...]]:
+    """
+    Read a `.npy` file of a C-ordered little-endian numeric array, and
+    return the flat array and the shape.
+    """
+    magic = f.read(len(_MAGIC) + 2)
+    if magic[:len(_MAGIC)] != _MAGIC:
+        raise Exception(f'Unknown magic number of a npy file: {magic!r}')
+    if magic[-2] == 1:
+        size, = struct.unpack('<H', f.read(2))
+    else:
+        size, = struct.unpack('<I', f.read(4))
+    header = ast.literal_eval(f.read(size).decode('latin-1'))
+    if header['fortran_order']:
+        raise Exception('Fortran-ordered arrays are not supported.')
+
+    buf = array(_typecode(header['descr']))
+    shape = tuple(header['shape'])
+    count = 1
+    for n in shape:
+        count *= n
+    data = f.read(count * buf.itemsize)
+    if len(data) != count * buf.itemsize:
+        raise Exception('Truncated npy file.')
+    buf.frombytes(data)
+    if sys.byteorder == 'big' and buf.itemsize > 1:
+        buf.byteswap()
+    return buf, shape
+
+
+def read_npz(path: Union[str, os.PathLike]) -> dict[str, tuple[array, tuple[int, ...]]]:
+    """
+    Read the arrays of an `.npz` file as `{name: (array, shape)}`.
+    """
+    results = {}
+    with zipfile.ZipFile(path) as z:
+        for name in z.namelist():
+            if name.endswith('.npy'):
+                with z.open(name) as f:
+                    results[name[:-4]] = read_npy(f)
+    return results
+
+
+def _typecode(dtype: str) -> str:
+    if dtype[0] == '>' and dtype[2:] != '1':
+        raise Exception(f'Big-endian arrays are not supported: {dtype}')
+    kind, size = dtype[1], int(dtype[2:])
+    codes = 'fd' if kind == 'f' else 'bhilq' if kind == 'i' else 'BHILQ' if kind == 'u' else ''
+    for code in codes:
+        if array(code).itemsize == size:
+            return code
+    raise Exception(f'Unsupported dtype: {dtype}')
+
+
+def _checked_shape(buf: array, shape: Optional[tuple[int, ...]]) -> tuple[int, ...]:
+    if shape is None:
+        return (len(buf),)
+    size = 1
+    for n in shape:
+        size *= n
+    if size != len(buf):
+        raise ValueError(f'shape {shape} does not match the length {len(buf)}')
+    return tuple(shape)
@@ -0,0 +1,211 @@
+"""
+Elimination of degenerate and redundant commands.
+
+Commands are rebuilt from their segment records, so relative commands,
+implicit linetos and shorthand curves are resolved first. Coordinates are
+compared within half a unit of the last digit of the current precision,
+which is the difference `number_repr` can not show:
+
+- a line of zero length is removed, unless it is the only drawing of a
+  subpath (a dot with round caps)
+- points of a run of lines are removed while they all lie on the line
+  drawn over them (Ramer-Douglas-Peucker within the precision)
+- a curve whose control points lie on its chord becomes a line
+- an elliptical arc with a zero radius becomes a line, and one with the
+  same end points is removed
+- a line to the start of a subpath right before a closepath is removed,
+  as the closepath draws it
+- a line becomes a horizontal or vertical lineto when it can
+- a moveto followed by another moveto is removed
+"""
+from __future__ import annotations
+from collections.abc import Sequence
+import math
+
+from .command import Command, Moveto, Lineto, Curveto, HorizontalAndVerticalLineto, EllipticalArc, Close
+from .ellipticalarc import EllipticalArcItem
+from .graphics import Point
+from .segments import iter_indexed_segments
+from .simplify import rdp_indexes
+from .utils import precision_epsilon
+
+
+def optimized_commands(cmds: Sequence[Command]) -> list[Command]:
+    """
+    Return absolute commands drawing the same as `cmds` without degenerate
+    and redundant commands. Each command takes `repr_relative` from the
+    command it comes from.
+    """
+    builder = _Builder(precision_epsilon())
+    arc_cmd, arc_item = -1, 0
+    for i, seg in iter_indexed_segments(cmds):
+        op = seg[0]
+        rel = cmds[i].repr_relative
+        if op == 'M':
+            builder.moveto(seg[1], seg[2], rel)
+        elif op == 'L':
+            builder.lineto(seg[3], seg[4], rel)
+        elif op == 'Z':
+            builder.closepath(rel)
+        elif op == 'C' or op == 'Q':
+            builder.curveto(seg, rel)
+        elif op == 'A':
+            if arc_cmd != i:
+                arc_cmd, arc_item = i, 0
+            item = cmds[i].data[arc_item]
+            arc_item += 1
+            builder.arc(seg, item, rel)
+
+    return builder.finish()
+
+
+class _Builder:
+    def __init__(self, eps: float) -> None:
+        self.eps = eps
+        self.cmds: list[Command] = []
+        # the current point and the start of the current subpath
+        self.cx = self.cy = self.sx = self.sy = 0.
+        # whether the current subpath draws, and whether it had a line of
+        # zero length
+        self.draws = False
+        self.dot = False
+        # pending points of lines beginning with the current point
+        self.run: list[tuple[float, float]] = []
+        self.run_rel = False
+
+    def same(self, x0: float, y0: float, x1: float, y1: float) -> bool:
+        return abs(x1 - x0) <= self.eps and abs(y1 - y0) <= self.eps
+
+    def moveto(self, x: float, y: float, rel: bool) -> None:
+        self.end_subpath()
+        last = self.cmds[-1] if self.cmds else None
+        if isinstance(last, Moveto):
+            # nothing is drawn from the previous moveto
+            last.data = [Point(x, y)]
+        else:
+            cmd = Moveto('M', [Point(x, y)], is_first_command=last is None)
+            self.push(cmd, rel)
+        self.cx = self.sx = x
+        self.cy = self.sy = y
+        self.draws = self.dot = False
+
+    def lineto(self, x: float, y: float, rel: bool) -> None:
+        if not self.run:
+            self.run.append((self.cx, self.cy))
+            self.run_rel = rel
+        px, py = self.run[-1]
+        if self.same(px, py, x, y):
+            self.dot = True
+            return
+        self.run.append((x, y))
+
+    def curveto(self, seg: tuple, rel: bool) -> None:
+        x0, y0, x, y = seg[1], seg[2], seg[-2], seg[-1]
+        controls = seg[3:-2]
+        if all(self.on_line(x0, y0, controls[k], controls[k+1], x, y)
+               for k in range(0, len(controls), 2)):
+            self.lineto(x, y, rel)
+            return
+
+        self.flush()
+        fn = seg[0]
+        ps = [Point(seg[k], seg[k+1]) for k in range(3, len(seg), 2)]
+        last = self.cmds[-1]
+        if last.fn == fn:
+            last.data += ps
+        else:
+            self.push(Curveto(fn, ps), rel)
+        self.cx, self.cy = x, y
+        self.draws = True
+
+    def arc(self, seg: tuple, item: EllipticalArcItem, rel: bool) -> None:
+        _, x0, y0, rx, ry, _, _, _, x, y = seg
+        if self.same(x0, y0, x, y):
+            # an arc to the current point is omitted (SVG 1.1 F.6.2)
+            self.dot = True
+            return
+        if abs(rx) <= self.eps or abs(ry) <= self.eps:
+            self.lineto(x, y, rel)
+            return
+
+        self.flush()
+        last = self.cmds[-1]
+        if isinstance(last, EllipticalArc):
+            last.data.append(item)
+        else:
+            self.push(EllipticalArc('A', [item]), rel)
+        self.cx, self.cy = x, y
+        self.draws = True
+
+    def closepath(self, rel: bool) -> None:
+        run = self.run
+        if len(run) > 1 and self.same(*run[-1], self.sx, self.sy):
+            run.pop()
+        self.flush()
+        if not isinstance(self.cmds[-1], Close):
+            cmd = Close('Z')
+            self.push(cmd, rel)
+            cmd.end_point = Point(self.sx, self.sy)
+        self.cx, self.cy = self.sx, self.sy
+        self.draws = True
+
+    def on_line(self, x0: float, y0: float, x: float, y: float, x1: float, y1: float) -> bool:
+        # whether (x, y) lies on the line from (x0, y0) to (x1, y1)
+        dx, dy = x1 - x0, y1 - y0
+        d = math.hypot(dx, dy)
+        if d <= self.eps:
+            return self.same(x0, y0, x, y) and self.same(x1, y1, x, y)
+        px, py = x - x0, y - y0
+        if abs(px * dy - py * dx) / d > self.eps:
+            return False
+        t = (px * dx + py * dy) / (d * d)
+        return -self.eps / d <= t <= 1 + self.eps / d
+
+    def flush(self) -> None:
+        run = self.run
+        if len(run) < 2:
+            run.clear()
+            return
+
+        # every removed point stays within eps of the line drawn over it
+        indexes = rdp_indexes([p[0] for p in run], [p[1] for p in run], self.eps)
+        kept = [run[i] for i in indexes]
+
+        cx, cy = kept[0]
+        for x, y in kept[1:]:
+            if abs(y - cy) <= self.eps:
+                fn, value, y = 'H', x, cy
+            elif abs(x - cx) <= self.eps:
+                fn, value, x = 'V', y, cx
+            else:
+                fn, value = 'L', Point(x, y)
+            last = self.cmds[-1]
+            if last.fn == fn:
+                last.data.append(value)
+            elif fn == 'L':
+                self.push(Lineto('L', [value]), self.run_rel)
+            else:
+                self.push(HorizontalAndVerticalLineto(fn, [value]), self.run_rel)
+            cx, cy = x, y
+
+        self.cx, self.cy = cx, cy
+        self.draws = True
+        run.clear()
+
+    def end_subpath(self) -> None:
+        self.flush()
+        if self.cmds and not self.draws and self.dot:
+            self.push(Lineto('L', [Point(self.cx, self.cy)]), self.run_rel)
+
+    def push(self, cmd: Command, rel: bool) -> None:
+        if self.cmds:
+            cmd.start_point = Point(self.cx, self.cy)
+        cmd.repr_relative = rel
+        self.cmds.append(cmd)
+
+    def finish(self) -> list[Command]:
+        self.end_subpath()
+        cmds = self.cmds
+        if len(cmds) > 1 and isinstance(cmds[-1], Moveto):
+            cmds.pop()
+        return cmds
@@ -1,11 +1,26 @@
 from __future__ import annotations
+from array import array
 from collections import UserList
-from typing import Literal
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any, Literal, Optional
 
-from .command import Command, Moveto, Lineto, Close, HorizontalAndVerticalLineto, EllipticalArc, \
+from .command import Command, Moveto, Lineto, Curveto, Close, HorizontalAndVerticalLineto, EllipticalArc, \
     set_force_repr_relative
 from .transform import Transform
-from .graphics import TupledPoint
+from .graphics import TupledPoint, Rect, Point
+from .segments import Segment, iter_segments, fill_segment_buffers
+from .bounds import Box, command_bboxes, union_box
+from .polyline import Polyline, flatten
+from .measure import LengthIndex
+from .simplify import simplified_commands
+from .fitting import fitted_commands
+from .optimize import optimized_commands
+from .shorthand import shorthand_commands
+from .clip import clipped_commands, culled_commands
+from .winding import FillRule, Piece, monotone_pieces, winding_number, winding_numbers, is_inside
+from .closest import Closest, ClosestIndex
+from .intersect import Intersection, intersections
+from .tessellate import Mesh, tessellate
 
 
 class PDTransformFailed(Exception):
@@ -13,6 +28,17 @@ class PDTransformFailed(Exception):
         self.source = str(pd)
         self.message = message
 
+    def __reduce__(self):
+        # Raised in worker processes of `svgpdtools.batch`, so it should
+        # survive pickling without the original PathData.
+        return _rebuild_transform_failed, (self.source, self.message)
+
+
+def _rebuild_transform_failed(source: str, message: str) -> PDTransformFailed:
+    e = PDTransformFailed.__new__(PDTransformFailed)
+    e.source, e.message = source, message
+    return e
+
 # ISSUES:
 #   - it may be bad idea to use UserList
 #   - should be immutable data
@@ -25,17 +51,91 @@ class PathData(UserList[Command]):
     """
     def __init__(self, cmds: list[Command] = []) -> None:
         self._absolutized = False
+        self._caches: dict[str, Any] = {}
 
         super().__init__([])
         for cmd in cmds:
             self.append(cmd)
 
+    # Geometric results (e.g. bounding boxes) are cached until the list
+    # is modified. Assigning `data` and the mutating methods of UserList
+    # clear the caches.
+    @property  # type: ignore[override]
+    def data(self) -> list[Command]:
+        return self.__dict__['data']
+
+    @data.setter
+    def data(self, value: list[Command]) -> None:
+        self.__dict__['data'] = value
+        self.clear_caches()
+
+    def __copy__(self) -> PathData:
+        inst = super().__copy__()
+        inst._caches = {}
+        return inst
+
+    def clear_caches(self) -> None:
+        """
+        Clear cached results. Call this after modifying commands of the
+        pathdata directly.
+        """
+        self._caches.clear()
+
+    def __setitem__(self, i, item) -> None:
+        self.clear_caches()
+        super().__setitem__(i, item)
+
+    def __delitem__(self, i) -> None:
+        self.clear_caches()
+        super().__delitem__(i)
+
+    def __iadd__(self, other):
+        self.clear_caches()
+        return super().__iadd__(other)
+
+    def __imul__(self, n):
+        self.clear_caches()
+        return super().__imul__(n)
+
+    def insert(self, i: int, item: Command) -> None:
+        self.clear_caches()
+        super().insert(i, item)
+
+    def pop(self, i: int = -1) -> Command:
+        self.clear_caches()
+        return super().pop(i)
+
+    def remove(self, item: Command) -> None:
+        self.clear_caches()
+        super().remove(item)
+
+    def clear(self) -> None:
+        self.clear_caches()
+        super().clear()
+
+    def extend(self, other) -> None:
+        self.clear_caches()
+        super().extend(other)
+
+    def reverse(self) -> None:
+        self.clear_caches()
+        super().reverse()
+
+    def sort(self, /, *args, **kwds) -> None:
+        self.clear_caches()
+        super().sort(*args, **kwds)
+
     def __repr__(self) -> str:
         r = ''
         for cmd in self:
             r += f' {cmd}'
         return r[1:]
 
+    def __reduce__(self):
+        # pickled as one compact blob rather than a graph of objects
+        from .wire import dumps, loads
+        return loads, (dumps(self),)
+
     def append(self, cmd: Command) -> None:
         if self.data:
             cmd.start_point = self[-1].end_point.clone()
@@ -53,7 +153,8 @@ class PathData(UserList[Command]):
 
         if cmd.fn.islower():
             self._absolutized = False
-            
+
+        self.clear_caches()
         super().append(cmd)
 
     def transform(self, t: Transform, *,
@@ -84,6 +185,7 @@ class PathData(UserList[Command]):
         if not self._absolutized:
             self.absolutize(called_internally=True)
 
+        self.clear_caches()
         if noexception:
             for i in range(len(self.data)):
                 cmd = self[i]
@@ -149,6 +251,7 @@ You can continue to transform by the followings:
                   collapse_hv_lineto=False,
                   collapse_elliptical_arc=False,
                   allow_implicit_lineto=False,
+                  use_shorthand=False,
                   ) -> None:
         """
         Normalize in this module means:
@@ -165,56 +268,130 @@ You can continue to transform by the followings:
             C/c commands. (default False)
         :param allow_implicit_lineto: if True, keep implicit lineto
             commands. (default False)
+        :param use_shorthand: if True, write curves in S/Q/T when the
+            reflected or quadratic forms draw the same within the current
+            precision. (default False)
         """
-        
-        if not self._absolutized:
-            self.absolutize()
 
-        if not self.data: return
+        # Absolutizing, merging, collapsing and tagging are done in one
+        # traversal. Collapsed H/V and A commands are appended to the
+        # previous command directly when it is of the same type.
+        absolutized = self._absolutized
+        self._absolutized = True
 
-        if not allow_implicit_lineto:
-            cmds = _collapse_implicit_lineto(self[0])
-        else:
-            cmds = [self[0]]
+        if not self.data: return
 
-        for i in range(1, len(self)):
-            prev_cmd = cmds[-1]
-            cmd = self[i]
-            if collapse_elliptical_arc and isinstance(cmd, EllipticalArc):
-                cmd = cmd.converted_to_curves()
+        cmds: list[Command] = []
+        curr_p = self[0].start_point
+        for cmd in self.data:
+            if not absolutized:
+                curr_p = cmd.absolutize(curr_p)
 
-            if collapse_hv_lineto and isinstance(cmd, HorizontalAndVerticalLineto):
-                cmd = cmd.converted_to_lineto()
+            fn = cmd.fn
+            prev_cmd = cmds[-1] if cmds else None
+            new_cmd: Command
 
-            if cmd.fn == 'M':
-                if not allow_implicit_lineto:
-                    cmds += _collapse_implicit_lineto(cmd)
+            if fn == 'M':
+                cmd.repr_relative = repr_relative
+                cmds.append(cmd)
+                if not allow_implicit_lineto and len(cmd.data) > 1:
+                    new_cmd = Lineto('L', cmd.data[1:])
+                    new_cmd.start_point = cmd.data[0]
+                    new_cmd.repr_relative = repr_relative
+                    del cmd.data[1:]
+                    cmds.append(new_cmd)
+                continue
+
+            assert prev_cmd is not None
+            line_continues = prev_cmd.fn == 'L' or (allow_implicit_lineto and prev_cmd.fn == 'M')
+
+            if fn == 'A' and collapse_elliptical_arc:
+                assert isinstance(cmd, EllipticalArc)
+                ps = [p for arc in cmd.data for p in arc.converted_to_curve_points()]
+                if prev_cmd.fn == 'C':
+                    prev_cmd.data += ps
                 else:
-                    cmds.append(cmd)
-
-            elif cmd.fn == 'L':
-                if ((allow_implicit_lineto and prev_cmd.fn == 'M') or
-                    prev_cmd.fn == 'L'):
-                    prev_cmd.data += cmd.data
+                    new_cmd = Curveto('C', ps)
+                    new_cmd.start_point = cmd.start_point
+                    new_cmd.repr_relative = repr_relative
+                    cmds.append(new_cmd)
+
+            elif fn in 'HV' and collapse_hv_lineto:
+                if line_continues:
+                    prev_cmd.data.append(cmd.end_point)
                 else:
-                    cmds.append(cmd)
+                    new_cmd = Lineto('L', [cmd.end_point])
+                    new_cmd.start_point = cmd.start_point
+                    new_cmd.repr_relative = repr_relative
+                    cmds.append(new_cmd)
 
-            elif cmd.fn == prev_cmd.fn:
-                if cmd.fn in 'HVZ':
+            elif fn == 'L' and line_continues:
+                prev_cmd.data += cmd.data
+
+            elif fn == prev_cmd.fn:
+                if fn in 'HVZ':
                     prev_cmd.data = cmd.data[-1:]
                 else:
                     prev_cmd.data += cmd.data
-                    
+
             else:
-                if cmd.fn in 'HVZ':
+                if fn in 'HVZ':
                     cmd.data = cmd.data[-1:]
-                    
+                cmd.repr_relative = repr_relative
                 cmds.append(cmd)
-            
-        for cmd in cmds:
-            cmd.repr_relative = repr_relative
 
         self.data = cmds
+        if use_shorthand:
+            self.shorthand_curves()
+
+    def simplify(self, tolerance: float) -> None:
+        """
+        Remove points of runs of straight lines (implicit linetos of a
+        moveto and L/H/V commands) whose distance from the simplified
+        polyline is within `tolerance`, by the Ramer-Douglas-Peucker
+        algorithm. A simplified run is replaced with one lineto command.
+        """
+        if not self._absolutized:
+            self.absolutize(called_internally=True)
+
+        self.data = simplified_commands(self.data, tolerance)
+
+    def fit_curves(self, tolerance: float) -> None:
+        """
+        Replace runs of straight lines (implicit linetos of a moveto and
+        L/H/V commands) with cubic bezier curves within `tolerance`, by
+        Schneider's algorithm. Runs are split at corners. A run is
+        replaced only when the curves are shorter than the lines.
+        """
+        if not self._absolutized:
+            self.absolutize(called_internally=True)
+
+        self.data = fitted_commands(self.data, tolerance)
+
+    def optimize(self) -> None:
+        """
+        Remove degenerate and redundant commands: lines of zero length,
+        middle points of collinear lines, lines closed by a closepath and
+        movetos which draw nothing. Curves with control points on their
+        chords become lines, and lines become H/V when they can.
+        Coordinates are compared within the current precision.
+        """
+        if not self._absolutized:
+            self.absolutize(called_internally=True)
+
+        self.data = optimized_commands(self.data)
+
+    def shorthand_curves(self) -> None:
+        """
+        Write a cubic curve as `S` when its first control point is the
+        reflection of the previous one, and as `Q` or `T` when it is a
+        degree elevated quadratic curve. Control points are compared
+        within the current precision.
+        """
+        if not self._absolutized:
+            self.absolutize(called_internally=True)
+
+        self.data = shorthand_commands(self.data)
 
     def segmented_points(self) -> list[TupledPoint]:
         """
@@ -232,17 +409,206 @@ You can continue to transform by the followings:
             last_cmd = type(cmd)
         return ps
 
+    def segments(self) -> Iterator[Segment]:
+        """
+        Iterate drawing segments as records `(opcode, x0, y0, ..., x, y)`
+        in absolute coords. See `svgpdtools.segments` for the records.
+        This method does not modify the pathdata.
+        """
+        return iter_segments(self.data)
 
-def _collapse_implicit_lineto(moveto: Command) -> list[Command]:
-    assert isinstance(moveto, Moveto)
-    
-    if len(moveto.data) < 2:
-        return [moveto]
+    def segment_buffers(self, ops: Optional[bytearray] = None,
+                        coords: Optional[array] = None) -> tuple[bytearray, array]:
+        """
+        Append segment records to `ops` (opcodes as ASCII bytes) and
+        `coords` (`array('d')` of the values following each opcode), then
+        return them. New buffers are created if they are not given.
+        """
+        if ops is None:
+            ops = bytearray()
+        if coords is None:
+            coords = array('d')
+        fill_segment_buffers(self.data, ops, coords)
+        return ops, coords
+
+    def bbox(self) -> Optional[Rect]:
+        """
+        Return the exact bounding box of the pathdata, or None if it is
+        empty. The extrema of curves and elliptical arcs are solved
+        analytically. Bounding boxes are cached per command until the
+        pathdata is modified.
+        """
+        box = None
+        for b in self._command_bboxes():
+            if b is not None:
+                box = b if box is None else union_box(box, b)
+        return None if box is None else Rect(*box)
 
-    lineto = Lineto('L', moveto.data[1:])
-    lineto.start_point = moveto.start_point
-    moveto.data = moveto.data[0:1]
-    return [moveto, lineto]
+    def subpath_bboxes(self) -> list[Rect]:
+        """
+        Return the exact bounding box of each subpath. A subpath starts
+        with a moveto command, or with the command following a closepath.
+        """
+        rects: list[Rect] = []
+        box: Optional[Box] = None
+        prev_cmd = None
+        for cmd, b in zip(self.data, self._command_bboxes()):
+            if box is not None and (isinstance(cmd, Moveto) or isinstance(prev_cmd, Close)):
+                rects.append(Rect(*box))
+                box = None
+            if b is not None:
+                box = b if box is None else union_box(box, b)
+            prev_cmd = cmd
+        if box is not None:
+            rects.append(Rect(*box))
+        return rects
+
+    def clip_to_rect(self, rect: Rect, *, split=False) -> None:
+        """
+        Drop the subpaths which do not intersect `rect`, using the cached
+        bounding boxes. A subpath following a closepath of a dropped
+        subpath gets a moveto command.
+
+        :param split: if True, also split the segments of subpaths crossing
+            the boundary of `rect` and drop the pieces outside. Those
+            subpaths are opened, so this suits stroked pathdata.
+            (default False)
+        """
+        if not self._absolutized:
+            self.absolutize(called_internally=True)
+
+        self.data = clipped_commands(self.data, self._command_bboxes(), rect, split=split)
+
+    def cull_subpaths(self, min_area: float, *, scale: float = 1.) -> None:
+        """
+        Drop the subpaths too small to see at a render resolution. A
+        subpath is dropped when its bounding box, scaled by `scale` (e.g.
+        pixels per user unit), fits in a unit square and covers less than
+        `min_area`. The cached bounding boxes are used.
+        """
+        if not self._absolutized:
+            self.absolutize(called_internally=True)
+
+        self.data = culled_commands(self.data, self._command_bboxes(), min_area, scale=scale)
+
+    def contains(self, x: float, y: float, fill_rule: FillRule = 'nonzero') -> bool:
+        """
+        Return whether a point is inside the fill of the pathdata, by the
+        winding number of the segments computed analytically. Open
+        subpaths are closed as the SVG does.
+
+        :param fill_rule: 'nonzero' or 'evenodd'. (default 'nonzero')
+        """
+        return is_inside(winding_number(self._winding_pieces(), x, y), fill_rule)
+
+    def contains_many(self, points: Iterable[Sequence[float]], fill_rule: FillRule = 'nonzero') -> list[bool]:
+        """
+        Return `contains` for each `(x, y)` point. `points` may be a NumPy
+        array of shape (n, 2), and the points are tested at once with
+        NumPy when it is installed.
+        """
+        return [is_inside(w, fill_rule) for w in winding_numbers(self._winding_pieces(), points)]
+
+    def nearest(self, x: float, y: float) -> Optional[Closest]:
+        """
+        Return the closest point on the pathdata to `(x, y)` as a
+        `svgpdtools.closest.Closest` of the segment index (of `segments()`),
+        the parameter `t`, the point and the distance, or None if nothing
+        is drawn. The segments are pruned by their bounding boxes, and
+        curves and elliptical arcs are solved by Newton's method. The
+        index of the segments is cached until the pathdata is modified.
+        """
+        return self._closest_index().closest(x, y)
+
+    def nearest_many(self, points: Iterable[Sequence[float]]) -> list[Optional[Closest]]:
+        """
+        Return `nearest` for each `(x, y)` point.
+        """
+        return self._closest_index().closest_many(points)
+
+    def intersections(self, other: Sequence[Command], *, tolerance: float = 1e-9) -> list[Intersection]:
+        """
+        Return the intersections with another pathdata as
+        `svgpdtools.intersect.Intersection` of the segment indices (of
+        `segments()`) and the parameters of both, and the point. Candidate
+        segments are found by a sweep over their bounding boxes, and are
+        solved by bezier clipping. Points closer than `tolerance` are
+        merged; overlapping collinear parts are not reported.
+        """
+        return intersections(self.data, other, tolerance=tolerance)
+
+    def flatten(self, tolerance: float = .1) -> Polyline:
+        """
+        Approximate the pathdata with polylines whose distance from the
+        curves is within `tolerance`. Return `(coords, offsets)`, where
+        `coords` is an `array('d')` of `x, y` pairs and `offsets` is an
+        `array('q')` of the first point indexes of the subpaths followed by
+        the number of points. See `svgpdtools.polyline`.
+        """
+        return flatten(self.data, tolerance)
+
+    def tessellate(self, tolerance: float = .1, fill_rule: FillRule = 'nonzero') -> Mesh:
+        """
+        Triangulate the fill of the pathdata, whose curves are flattened
+        within `tolerance`, for the fill rule `'nonzero'` or `'evenodd'`.
+        Return `(vertices, indices)`, where `vertices` is an `array('f')`
+        of `x, y` pairs and `indices` is an `array('I')` of three vertex
+        indexes per triangle. See `svgpdtools.tessellate`.
+        """
+        return tessellate(self.data, tolerance, fill_rule)
+
+    def length(self) -> float:
+        """
+        Return the total arc length of the pathdata. Curves and elliptical
+        arcs are integrated with Gauss-Legendre quadrature.
+        """
+        return self._length_index().total
+
+    def segment_lengths(self) -> list[float]:
+        """
+        Return the arc length of each record of `segments()`. Movetos are 0.
+        """
+        return list(self._length_index().lengths)
+
+    def point_at_length(self, s: float) -> Point:
+        """
+        Return the point at the arc length `s` from the beginning. `s` is
+        clamped into `[0, length()]`. The cumulative lengths of segments
+        are cached until the pathdata is modified, so repeated queries
+        take O(log n) of the number of segments.
+        """
+        return self._length_index().point_at(s)
+
+    def sample(self, n: int) -> list[Point]:
+        """
+        Return `n` points evenly spaced along the pathdata, including both
+        ends.
+        """
+        return self._length_index().sample(n)
+
+    def _length_index(self) -> LengthIndex:
+        index = self._caches.get('length_index')
+        if index is None:
+            index = self._caches['length_index'] = LengthIndex(self.data)
+        return index
+
+    def _winding_pieces(self) -> list[Piece]:
+        pieces = self._caches.get('winding_pieces')
+        if pieces is None:
+            pieces = self._caches['winding_pieces'] = monotone_pieces(self.data)
+        return pieces
+
+    def _closest_index(self) -> ClosestIndex:
+        index = self._caches.get('closest_index')
+        if index is None:
+            index = self._caches['closest_index'] = ClosestIndex(self.data)
+        return index
+
+    def _command_bboxes(self) -> list[Optional[Box]]:
+        boxes = self._caches.get('bboxes')
+        if boxes is None:
+            boxes = self._caches['bboxes'] = command_bboxes(self.data)
+        return boxes
 
 
 class temporary_repr_relative:
@@ -0,0 +1,282 @@
+"""
+Flattening of pathdata to polylines.
+
+Curves are subdivided uniformly in their parameter into the smallest
+number of pieces whose chord error is within the tolerance: Wang's formula
+for beziers, and the sagitta of the angle step for elliptical arcs.
+
+The results are packed: `coords` is an `array('d')` of `x, y` pairs, and
+`offsets` is an `array('q')` of the indexes of the first points of the
+subpaths followed by the number of points. The points of the subpath `i`
+are `coords[offsets[i]*2:offsets[i+1]*2]`. A closed subpath ends with its
+start point.
+"""
+from __future__ import annotations
+from array import array
+from collections.abc import Iterable, Sequence
+import math
+
+from .command import Command
+from .segments import iter_segments, fill_segment_buffers, SEGMENT_SIZES
+from .ellipticalarc import center_parameterization
+
+
+Polyline = tuple[array, array]
+
+
+def flatten(cmds: Sequence[Command], tolerance: float) -> Polyline:
+    """
+    Return `(coords, offsets)` of the polylines approximating commands
+    within `tolerance`.
+    """
+    if not tolerance > 0:
+        raise ValueError(f'tolerance should be positive: {tolerance}')
+
+    coords = array('d')
+    offsets = array('q')
+    is_open = False
+    for seg in iter_segments(cmds):
+        op = seg[0]
+        if op == 'M':
+            offsets.append(len(coords) // 2)
+            coords.extend(seg[1:])
+            is_open = True
+            continue
+
+        if not is_open:
+            # drawing after a closepath starts a new subpath
+            offsets.append(len(coords) // 2)
+            coords.extend(seg[1:3])
+            is_open = True
+
+        if op == 'L' or op == 'Z':
+            coords.extend(seg[3:])
+            is_open = op == 'L'
+        elif op == 'C':
+            _flatten_cubic(coords, tolerance, *seg[1:])
+        elif op == 'Q':
+            _flatten_quadratic(coords, tolerance, *seg[1:])
+        else:
+            _flatten_arc(coords, tolerance, *seg[1:])
+
+    offsets.append(len(coords) // 2)
+    return coords, offsets
+
+
+def flatten_many(pds: Iterable[Sequence[Command]], tolerance: float) -> tuple[array, array, array]:
+    """
+    Flatten many pathdata into one packed buffer. Return
+    `(coords, offsets, path_offsets)`, where `coords` and `offsets` are
+    the same as `flatten()` for all subpaths of all pathdata, and the
+    subpaths of the pathdata `i` are `offsets[path_offsets[i]:path_offsets[i+1]]`.
+
+    When NumPy is installed, the points of all curves are evaluated as
+    arrays at once.
+    """
+    if not tolerance > 0:
+        raise ValueError(f'tolerance should be positive: {tolerance}')
+
+    pds = list(pds)
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+    if numpy is None:
+        coords = array('d')
+        offsets = array('q')
+        path_offsets = array('q', [0])
+        for pd in pds:
+            cs, offs = flatten(pd, tolerance)
+            base = len(coords) // 2
+            offsets.extend(base + o for o in offs[:-1])
+            coords.extend(cs)
+            path_offsets.append(len(offsets))
+        offsets.append(len(coords) // 2)
+        return coords, offsets, path_offsets
+
+    ops = bytearray()
+    values = array('d')
+    seg_offsets = [0]
+    for pd in pds:
+        fill_segment_buffers(pd, ops, values)
+        seg_offsets.append(len(ops))
+    return _flatten_buffers_numpy(numpy, ops, values, seg_offsets, tolerance)
+
+
+def cubic_segments_count(x0: float, y0: float, x1: float, y1: float,
+                         x2: float, y2: float, x3: float, y3: float,
+                         tolerance: float) -> int:
+    """
+    The number of uniform pieces of a cubic bezier by Wang's formula.
+    """
+    ddx = max(abs(x0 - 2 * x1 + x2), abs(x1 - 2 * x2 + x3))
+    ddy = max(abs(y0 - 2 * y1 + y2), abs(y1 - 2 * y2 + y3))
+    return max(1, math.ceil(math.sqrt(.75 * math.hypot(ddx, ddy) / tolerance)))
+
+
+def quadratic_segments_count(x0: float, y0: float, x1: float, y1: float,
+                             x2: float, y2: float, tolerance: float) -> int:
+    """
+    The number of uniform pieces of a quadratic bezier by Wang's formula.
+    """
+    dd = math.hypot(x0 - 2 * x1 + x2, y0 - 2 * y1 + y2)
+    return max(1, math.ceil(math.sqrt(.25 * dd / tolerance)))
+
+
+def arc_segments_count(rx: float, ry: float, dtheta: float, tolerance: float) -> int:
+    """
+    The number of uniform pieces of an elliptical arc whose sagitta on
+    the larger radius is within the tolerance.
+    """
+    r = max(rx, ry)
+    if tolerance >= r:
+        step = math.pi / 2
+    else:
+        step = 2 * math.acos(1 - tolerance / r)
+    return max(1, math.ceil(abs(dtheta) / step))
+
+
+def _flatten_cubic(coords: array, tolerance: float,
+                   x0: float, y0: float, x1: float, y1: float,
+                   x2: float, y2: float, x3: float, y3: float) -> None:
+    n = cubic_segments_count(x0, y0, x1, y1, x2, y2, x3, y3, tolerance)
+    for i in range(1, n):
+        t = i / n
+        mt = 1 - t
+        a, b, c, d = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+        coords.append(a * x0 + b * x1 + c * x2 + d * x3)
+        coords.append(a * y0 + b * y1 + c * y2 + d * y3)
+    coords.append(x3)
+    coords.append(y3)
+
+
+def _flatten_quadratic(coords: array, tolerance: float,
+                       x0: float, y0: float, x1: float, y1: float,
+                       x2: float, y2: float) -> None:
+    n = quadratic_segments_count(x0, y0, x1, y1, x2, y2, tolerance)
+    for i in range(1, n):
+        t = i / n
+        mt = 1 - t
+        a, b, c = mt * mt, 2 * mt * t, t * t
+        coords.append(a * x0 + b * x1 + c * x2)
+        coords.append(a * y0 + b * y1 + c * y2)
+    coords.append(x2)
+    coords.append(y2)
+
+
+def _arc_points(tolerance: float, x0: float, y0: float, rx: float, ry: float,
+                rotation: float, is_large_arc: bool, is_sweep: bool,
+                x: float, y: float) -> list[float]:
+    phi = math.radians(rotation)
+    center = center_parameterization(x0, y0, rx, ry, phi, bool(is_large_arc), bool(is_sweep), x, y)
+    if center is None:
+        return [x, y]
+
+    cx, cy, rx, ry, theta1, dtheta = center
+    cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+    n = arc_segments_count(rx, ry, dtheta, tolerance)
+    ps = []
+    for i in range(1, n):
+        theta = theta1 + dtheta * i / n
+        cos_t, sin_t = math.cos(theta), math.sin(theta)
+        ps.append(cx + rx * cos_phi * cos_t - ry * sin_phi * sin_t)
+        ps.append(cy + rx * sin_phi * cos_t + ry * cos_phi * sin_t)
+    ps.append(x)
+    ps.append(y)
+    return ps
+
+
+def _flatten_arc(coords: array, tolerance: float, *args) -> None:
+    coords.extend(_arc_points(tolerance, *args))
+
+
+def _flatten_buffers_numpy(np, ops: bytearray, values: array, seg_offsets: list[int],
+                           tolerance: float) -> tuple[array, array, array]:
+    opcodes = np.frombuffer(bytes(ops), dtype=np.uint8)
+    vals = np.frombuffer(values, dtype=np.float64)
+    nseg = len(opcodes)
+    sizes = np.zeros(256, dtype=np.int64)
+    for c, size in SEGMENT_SIZES.items():
+        sizes[ord(c)] = size
+    starts = np.concatenate(([0], np.cumsum(sizes[opcodes])[:-1])).astype(np.int64)
+
+    is_c = opcodes == ord('C')
+    is_q = opcodes == ord('Q')
+    is_a = opcodes == ord('A')
+    is_m = opcodes == ord('M')
+
+    # the number of points each segment emits
+    counts = np.ones(nseg, dtype=np.int64)
+    sel_c = np.flatnonzero(is_c)
+    if len(sel_c):
+        p = [vals[starts[sel_c] + k] for k in range(8)]
+        ddx = np.maximum(np.abs(p[0] - 2 * p[2] + p[4]), np.abs(p[2] - 2 * p[4] + p[6]))
+        ddy = np.maximum(np.abs(p[1] - 2 * p[3] + p[5]), np.abs(p[3] - 2 * p[5] + p[7]))
+        counts[sel_c] = np.maximum(1, np.ceil(np.sqrt(.75 * np.hypot(ddx, ddy) / tolerance)))
+    sel_q = np.flatnonzero(is_q)
+    if len(sel_q):
+        p = [vals[starts[sel_q] + k] for k in range(6)]
+        dd = np.hypot(p[0] - 2 * p[2] + p[4], p[1] - 2 * p[3] + p[5])
+        counts[sel_q] = np.maximum(1, np.ceil(np.sqrt(.25 * dd / tolerance)))
+    arc_points = {}
+    for i in np.flatnonzero(is_a).tolist():
+        s = int(starts[i])
+        ps = _arc_points(tolerance, *vals[s:s+9].tolist())
+        arc_points[i] = ps
+        counts[i] = len(ps) // 2
+
+    # A drawing segment following a closepath, or at the beginning of a
+    # pathdata, starts a new subpath with its start point.
+    prev_closed = np.ones(nseg, dtype=bool)
+    prev_closed[1:] = opcodes[:-1] == ord('Z')
+    prev_closed[np.asarray(seg_offsets[:-1], dtype=np.int64)[np.diff(seg_offsets) > 0]] = True
+    needs_start = prev_closed & ~is_m
+    out_counts = counts + needs_start
+    out_starts = np.concatenate(([0], np.cumsum(out_counts)[:-1])).astype(np.int64)
+    total = int(out_counts.sum()) if nseg else 0
+    out = np.empty((total, 2), dtype=np.float64)
+
+    sel = np.flatnonzero(needs_start)
+    out[out_starts[sel], 0] = vals[starts[sel]]
+    out[out_starts[sel], 1] = vals[starts[sel] + 1]
+    first = out_starts + needs_start
+
+    # every segment ends with its end point
+    ends = starts + sizes[opcodes]
+    last = first + counts - 1
+    out[last, 0] = vals[ends - 2]
+    out[last, 1] = vals[ends - 1]
+
+    for sel, degree in ((sel_c, 3), (sel_q, 2)):
+        n = counts[sel] - 1
+        if not len(sel) or not n.sum():
+            continue
+        seg = np.repeat(np.arange(len(sel)), n)
+        local = np.arange(len(seg)) - np.repeat(np.cumsum(n) - n, n) + 1
+        t = local / np.repeat(counts[sel], n)
+        mt = 1 - t
+        s = starts[sel][seg]
+        pos = first[sel][seg] + local - 1
+        if degree == 3:
+            w = (mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t)
+        else:
+            w = (mt * mt, 2 * mt * t, t * t)
+        for axis in (0, 1):
+            acc = np.zeros(len(seg))
+            for k, wk in enumerate(w):
+                acc += wk * vals[s + 2 * k + axis]
+            out[pos, axis] = acc
+
+    for i, ps in arc_points.items():
+        f = int(first[i])
+        out[f:f+len(ps)//2] = np.asarray(ps).reshape(-1, 2)
+
+    # subpath offsets
+    sub_seg = np.flatnonzero(is_m | needs_start)
+    offsets = np.concatenate((out_starts[sub_seg], [total])).astype(np.int64)
+    seg_bounds = np.asarray(seg_offsets, dtype=np.int64)
+    path_offsets = np.searchsorted(sub_seg, seg_bounds).astype(np.int64)
+
+    return array('d', out.ravel().tobytes()), array('q', offsets.tobytes()), \
+        array('q', path_offsets.tobytes())
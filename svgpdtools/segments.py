@@ -0,0 +1,340 @@
+"""
+Read-only views of pathdata as drawing segments in absolute coordinates.
+
+Each segment is a record `(opcode, x0, y0, ..., x, y)` where `(x0, y0)` is
+the current point before the segment::
+
+    ('M', x, y)                                      start of a subpath
+    ('L', x0, y0, x, y)                              line
+    ('Q', x0, y0, x1, y1, x, y)                      quadratic bezier
+    ('C', x0, y0, x1, y1, x2, y2, x, y)              cubic bezier
+    ('A', x0, y0, rx, ry, phi, large, sweep, x, y)   elliptical arc
+    ('Z', x0, y0, x, y)                              line closing a subpath
+
+Relative commands, H/V, S/T and implicit linetos are resolved on the fly:
+H/V become 'L', S becomes 'C' and T becomes 'Q' with their reflected
+control points. The pathdata is never modified.
+
+A prepared segment (`prepared_segment`) is a record in the form for
+evaluation, which the modules measuring, clipping and intersecting
+segments share with `segment_point`, `segment_derivatives`,
+`closest_parameter`, `quadratic_roots` and `split_bezier`.
+"""
+from __future__ import annotations
+from array import array
+from collections.abc import Iterator, Sequence
+from typing import Any
+import math
+
+from .command import Command
+from .ellipticalarc import center_parameterization
+
+
+Segment = tuple[Any, ...]
+
+# the number of values following the opcode
+SEGMENT_SIZES = {'M': 2, 'L': 4, 'Z': 4, 'Q': 6, 'C': 8, 'A': 9}
+
+# the iterations of `closest_parameter`
+_MAX_ITERATIONS = 64
+# the golden-section ratio
+_GOLDEN = (3 - math.sqrt(5)) / 2
+
+
+def iter_segments(cmds: Sequence[Command]) -> Iterator[Segment]:
+    """
+    Iterate segment records of commands.
+    """
+    for _, seg in iter_indexed_segments(cmds):
+        yield seg
+
+
+def iter_indexed_segments(cmds: Sequence[Command]) -> Iterator[tuple[int, Segment]]:
+    """
+    Iterate pairs of the index of a command and a segment record of it.
+    """
+    cx = cy = 0.
+    sx = sy = 0.
+    # the last control point and its kind ('C' or 'Q') for S/T
+    lx = ly = 0.
+    last = ''
+    for i, cmd in enumerate(cmds):
+        fn = cmd.fn
+        fn_ = fn.upper()
+        rel = fn.islower()
+        data: Any = cmd.data
+
+        if fn_ == 'Z':
+            yield i, ('Z', cx, cy, sx, sy)
+            cx, cy = sx, sy
+            last = ''
+
+        elif fn_ == 'M':
+            for j, p in enumerate(data):
+                x, y = p.x, p.y
+                if rel and not (j == 0 and i == 0):
+                    x, y = cx + x, cy + y
+                if j == 0:
+                    yield i, ('M', x, y)
+                    sx, sy = x, y
+                else:
+                    yield i, ('L', cx, cy, x, y)
+                cx, cy = x, y
+            last = ''
+
+        elif fn_ == 'L':
+            for p in data:
+                x, y = p.x, p.y
+                if rel:
+                    x, y = cx + x, cy + y
+                yield i, ('L', cx, cy, x, y)
+                cx, cy = x, y
+            last = ''
+
+        elif fn_ in 'HV':
+            is_h = fn_ == 'H'
+            for n in data:
+                x, y = cx, cy
+                if is_h:
+                    x = cx + n if rel else n
+                else:
+                    y = cy + n if rel else n
+                yield i, ('L', cx, cy, x, y)
+                cx, cy = x, y
+            last = ''
+
+        elif fn_ == 'C' or fn_ == 'S':
+            step = 3 if fn_ == 'C' else 2
+            for j in range(0, len(data), step):
+                if step == 3:
+                    p1, p2, p = data[j], data[j+1], data[j+2]
+                    x1, y1 = p1.x, p1.y
+                    if rel:
+                        x1, y1 = cx + x1, cy + y1
+                else:
+                    p2, p = data[j], data[j+1]
+                    if last == 'C':
+                        x1, y1 = 2 * cx - lx, 2 * cy - ly
+                    else:
+                        x1, y1 = cx, cy
+                x2, y2, x, y = p2.x, p2.y, p.x, p.y
+                if rel:
+                    x2, y2, x, y = cx + x2, cy + y2, cx + x, cy + y
+                yield i, ('C', cx, cy, x1, y1, x2, y2, x, y)
+                cx, cy, lx, ly = x, y, x2, y2
+                last = 'C'
+
+        elif fn_ == 'Q' or fn_ == 'T':
+            step = 2 if fn_ == 'Q' else 1
+            for j in range(0, len(data), step):
+                if step == 2:
+                    p1, p = data[j], data[j+1]
+                    x1, y1 = p1.x, p1.y
+                    if rel:
+                        x1, y1 = cx + x1, cy + y1
+                else:
+                    p = data[j]
+                    if last == 'Q':
+                        x1, y1 = 2 * cx - lx, 2 * cy - ly
+                    else:
+                        x1, y1 = cx, cy
+                x, y = p.x, p.y
+                if rel:
+                    x, y = cx + x, cy + y
+                yield i, ('Q', cx, cy, x1, y1, x, y)
+                cx, cy, lx, ly = x, y, x1, y1
+                last = 'Q'
+
+        elif fn_ == 'A':
+            # `to_point` of an item is always kept in absolute coords
+            for a in data:
+                x, y = a.to_point.x, a.to_point.y
+                yield i, ('A', cx, cy, a.rx, a.ry, a.x_axis_rotation,
+                          a.is_large_arc, a.is_sweep, x, y)
+                cx, cy = x, y
+            last = ''
+
+        else:
+            raise Exception(f'Unknown draw command: {fn}')
+
+
+def fill_segment_buffers(cmds: Sequence[Command], ops: bytearray, coords: array) -> None:
+    """
+    Append segment records of commands to buffers. Each opcode is appended
+    to `ops` as an ASCII byte, and the values following it to `coords`.
+    Arc flags are stored as 0. or 1.
+    """
+    for seg in iter_segments(cmds):
+        ops.append(ord(seg[0]))
+        coords.extend(seg[1:])
+
+
+# A prepared segment is a segment record in the form for evaluation.
+# Arcs are ('E', cx, cy, rx, ry, cos_phi, sin_phi, theta1, delta_theta),
+# and closepaths and degenerate arcs are lines.
+PreparedSegment = tuple[Any, ...]
+
+
+def prepared_segment(seg: Segment) -> PreparedSegment:
+    """
+    Return the prepared segment of a segment record.
+    """
+    op = seg[0]
+    if op == 'Z':
+        return ('L', *seg[1:])
+    if op == 'A':
+        _, x0, y0, rx, ry, rotation, is_large_arc, is_sweep, x, y = seg
+        phi = math.radians(rotation)
+        center = center_parameterization(x0, y0, rx, ry, phi, bool(is_large_arc), bool(is_sweep), x, y)
+        if center is None:
+            return ('L', x0, y0, x, y)
+        cx, cy, rx, ry, theta1, dtheta = center
+        return ('E', cx, cy, rx, ry, math.cos(phi), math.sin(phi), theta1, dtheta)
+    return seg
+
+
+def segment_point(seg: PreparedSegment, t: float) -> tuple[float, float]:
+    """
+    Return the point of a prepared segment at the parameter `t`.
+    """
+    op = seg[0]
+    mt = 1 - t
+    if op == 'C':
+        _, x0, y0, x1, y1, x2, y2, x3, y3 = seg
+        a, b, c, d = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+        return a * x0 + b * x1 + c * x2 + d * x3, a * y0 + b * y1 + c * y2 + d * y3
+    if op == 'Q':
+        _, x0, y0, x1, y1, x2, y2 = seg
+        a, b, c = mt * mt, 2 * mt * t, t * t
+        return a * x0 + b * x1 + c * x2, a * y0 + b * y1 + c * y2
+    if op == 'E':
+        _, cx, cy, rx, ry, cos_phi, sin_phi, theta1, dtheta = seg
+        theta = theta1 + dtheta * t
+        cos_t, sin_t = math.cos(theta), math.sin(theta)
+        return (cx + rx * cos_phi * cos_t - ry * sin_phi * sin_t,
+                cy + rx * sin_phi * cos_t + ry * cos_phi * sin_t)
+    if op == 'L':
+        _, x0, y0, x1, y1 = seg
+        return x0 + (x1 - x0) * t, y0 + (y1 - y0) * t
+    return seg[1], seg[2]
+
+
+def quadratic_roots(a: float, b: float, c: float) -> tuple[float, ...]:
+    """
+    Return the real roots of `a*t^2 + b*t + c`, or of the linear equation
+    when `a` is nearly 0.
+    """
+    if abs(a) < 1e-12:
+        if b == 0:
+            return ()
+        return (-c / b,)
+    disc = b * b - 4 * a * c
+    if disc < 0:
+        return ()
+    sq = math.sqrt(disc)
+    return (-b + sq) / (2 * a), (-b - sq) / (2 * a)
+
+
+def split_bezier(ps: list[tuple[float, float]], t: float) -> tuple[list, list]:
+    """
+    Split the control points of a bezier curve of any degree at the
+    parameter `t` by de Casteljau's algorithm.
+    """
+    left, right = [ps[0]], [ps[-1]]
+    while len(ps) > 1:
+        ps = [(a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t) for a, b in zip(ps, ps[1:])]
+        left.append(ps[0])
+        right.append(ps[-1])
+    return left, right[::-1]
+
+
+def squared_distance(seg: PreparedSegment, x: float, y: float, t: float) -> float:
+    """
+    Return the squared distance from `(x, y)` to the point of a prepared
+    segment at the parameter `t`.
+    """
+    px, py = segment_point(seg, t)
+    return (px - x) ** 2 + (py - y) ** 2
+
+
+def segment_derivatives(seg: PreparedSegment, t: float) -> tuple[tuple[float, float], ...]:
+    """
+    Return the point, the first and the second derivatives of a prepared
+    segment at the parameter `t`.
+    """
+    op = seg[0]
+    mt = 1 - t
+    if op == 'C':
+        _, x0, y0, x1, y1, x2, y2, x3, y3 = seg
+        a, b, c = 3 * mt * mt, 6 * mt * t, 3 * t * t
+        d1 = (a * (x1 - x0) + b * (x2 - x1) + c * (x3 - x2),
+              a * (y1 - y0) + b * (y2 - y1) + c * (y3 - y2))
+        d2 = (6 * (mt * (x2 - 2 * x1 + x0) + t * (x3 - 2 * x2 + x1)),
+              6 * (mt * (y2 - 2 * y1 + y0) + t * (y3 - 2 * y2 + y1)))
+        return segment_point(seg, t), d1, d2
+    if op == 'Q':
+        _, x0, y0, x1, y1, x2, y2 = seg
+        d1 = (2 * (mt * (x1 - x0) + t * (x2 - x1)), 2 * (mt * (y1 - y0) + t * (y2 - y1)))
+        d2 = (2 * (x2 - 2 * x1 + x0), 2 * (y2 - 2 * y1 + y0))
+        return segment_point(seg, t), d1, d2
+    if op == 'E':
+        _, cx, cy, rx, ry, cos_phi, sin_phi, theta1, dtheta = seg
+        theta = theta1 + dtheta * t
+        cos_t, sin_t = math.cos(theta), math.sin(theta)
+        # the point relative to the center, rotated by 90 degrees per
+        # derivative
+        ux = rx * cos_phi * cos_t - ry * sin_phi * sin_t
+        uy = rx * sin_phi * cos_t + ry * cos_phi * sin_t
+        vx = -rx * cos_phi * sin_t - ry * sin_phi * cos_t
+        vy = -rx * sin_phi * sin_t + ry * cos_phi * cos_t
+        return (cx + ux, cy + uy), (vx * dtheta, vy * dtheta), \
+            (-ux * dtheta * dtheta, -uy * dtheta * dtheta)
+    _, x0, y0, x1, y1 = seg
+    return segment_point(seg, t), (x1 - x0, y1 - y0), (0., 0.)
+
+
+def closest_parameter(seg: PreparedSegment, x: float, y: float, t: float, lo=0., hi=1.) -> float:
+    """
+    Return the parameter within `[lo, hi]` of a prepared segment at a
+    local minimum of the distance to `(x, y)`, starting from `t`, by
+    Newton's method with golden-section steps when it leaves the bracket.
+    The result is never farther than `t`.
+    """
+    best, best_d = t, squared_distance(seg, x, y, t)
+    newton = True
+    for _ in range(_MAX_ITERATIONS):
+        if hi - lo <= 1e-15:
+            break
+        t = math.nan
+        if newton:
+            (px, py), (dx, dy), (ddx, ddy) = segment_derivatives(seg, best)
+            ex, ey = px - x, py - y
+            f = ex * dx + ey * dy
+            fp = dx * dx + dy * dy + ex * ddx + ey * ddy
+            if fp > 0:
+                t = best - f / fp
+                if t == best:
+                    # a minimum, as the second derivative is positive
+                    break
+        if not lo < t < hi:
+            # a golden-section step into the larger side of the bracket
+            t = best + _GOLDEN * (hi - best) if hi - best > best - lo else best - _GOLDEN * (best - lo)
+            newton = False
+        else:
+            newton = True
+
+        d = squared_distance(seg, x, y, t)
+        # the bracket stays around the least distance found
+        if d < best_d:
+            if t < best:
+                hi = best
+            else:
+                lo = best
+            best, best_d = t, d
+        else:
+            if t < best:
+                lo = t
+            else:
+                hi = t
+            newton = False
+    return best
@@ -0,0 +1,82 @@
+"""
+Shorthand forms of curves in output.
+
+A cubic whose first control point is the reflection of the previous
+second control point is written as `S`, and a cubic which is a degree
+elevated quadratic is written as `Q`, or as `T` when its control point is
+the reflection of the previous one. Control points are compared within
+half a unit of the last digit of the current precision, so the shorthand
+draws the same as the formatted input.
+"""
+from __future__ import annotations
+from collections.abc import Sequence
+
+from .command import Command, Curveto
+from .graphics import Point
+from .segments import iter_indexed_segments
+from .utils import precision_epsilon
+
+
+def shorthand_commands(cmds: Sequence[Command]) -> list[Command]:
+    """
+    Return commands whose curves are written in the shortest of C/S/Q/T.
+    The commands should be absolutized. The other commands are kept as
+    they are.
+    """
+    eps = precision_epsilon()
+
+    def same(x0: float, y0: float, x1: float, y1: float) -> bool:
+        return abs(x1 - x0) <= eps and abs(y1 - y0) <= eps
+
+    results: list[Command] = []
+    # the kind ('C' or 'Q') and the point of the last control point drawn
+    last = ''
+    lx = ly = 0.
+    prev_index = -1
+    # whether the last result is a curveto command built here
+    built = False
+    for i, seg in iter_indexed_segments(cmds):
+        op = seg[0]
+        if op != 'C' and op != 'Q':
+            if i != prev_index:
+                results.append(cmds[i])
+            prev_index = i
+            last = ''
+            built = False
+            continue
+
+        x0, y0, x, y = seg[1], seg[2], seg[-2], seg[-1]
+        if op == 'C':
+            _, _, _, x1, y1, x2, y2, _, _ = seg
+            # the control point of a quadratic elevated to the cubic
+            qx1, qy1 = (3 * x1 - x0) / 2, (3 * y1 - y0) / 2
+            qx2, qy2 = (3 * x2 - x) / 2, (3 * y2 - y) / 2
+            if same(qx1, qy1, qx2, qy2):
+                op, x1, y1 = 'Q', (qx1 + qx2) / 2, (qy1 + qy2) / 2
+        else:
+            _, _, _, x1, y1, _, _ = seg
+
+        rx, ry = (2 * x0 - lx, 2 * y0 - ly) if last == op else (x0, y0)
+        is_reflected = same(rx, ry, x1, y1)
+        if op == 'C':
+            fn = 'S' if is_reflected else 'C'
+            ps = [Point(x2, y2), Point(x, y)] if is_reflected else \
+                 [Point(x1, y1), Point(x2, y2), Point(x, y)]
+            lx, ly = x2, y2
+        else:
+            fn = 'T' if is_reflected else 'Q'
+            ps = [Point(x, y)] if is_reflected else [Point(x1, y1), Point(x, y)]
+            lx, ly = (rx, ry) if is_reflected else (x1, y1)
+        last = op
+
+        if built and results[-1].fn == fn:
+            results[-1].data += ps
+        else:
+            cmd = Curveto(fn, ps)
+            cmd.start_point = Point(x0, y0)
+            cmd.repr_relative = cmds[i].repr_relative
+            results.append(cmd)
+        prev_index = i
+        built = True
+
+    return results
@@ -0,0 +1,175 @@
+"""
+Simplification of runs of straight lines by Ramer-Douglas-Peucker.
+
+A run is a sequence of implicit linetos of a moveto and L/H/V commands
+in a subpath. The algorithm is iterative with an explicit stack, so runs
+of millions of points do not hit the recursion limit. When NumPy is
+installed, the distances of long spans are computed as arrays.
+"""
+from __future__ import annotations
+from collections.abc import Callable, Sequence
+from typing import Any, Optional
+import math
+
+from .command import Command, Moveto, Lineto, HorizontalAndVerticalLineto
+from .graphics import Point
+
+
+# spans with at least this number of points are measured with NumPy
+_VECTORIZE_MIN = 512
+
+
+def rdp_indexes(xs: Sequence[float], ys: Sequence[float], tolerance: float) -> list[int]:
+    """
+    Return the indexes of the points kept by Ramer-Douglas-Peucker. The
+    first and last points are always kept. A point is removed when its
+    distance from the kept chord is not greater than `tolerance`.
+    """
+    if tolerance < 0:
+        raise ValueError(f'tolerance should not be negative: {tolerance}')
+
+    n = len(xs)
+    if n < 3:
+        return list(range(n))
+
+    np: Any = None
+    if n >= _VECTORIZE_MIN:
+        try:
+            import numpy as np
+        except ImportError:
+            pass
+    if np is not None:
+        xs, ys = np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+
+    keep = bytearray(n)
+    keep[0] = keep[-1] = 1
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        if np is not None and b - a >= _VECTORIZE_MIN:
+            i, d = _farthest_numpy(np, xs, ys, a, b)
+        else:
+            i, d = _farthest(xs, ys, a, b)
+        if d > tolerance:
+            keep[i] = 1
+            stack.append((i, b))
+            stack.append((a, i))
+
+    return [i for i in range(n) if keep[i]]
+
+
+def _farthest(xs, ys, a: int, b: int) -> tuple[int, float]:
+    ax, ay, bx, by = float(xs[a]), float(ys[a]), float(xs[b]), float(ys[b])
+    dx, dy = bx - ax, by - ay
+    d2 = dx * dx + dy * dy
+    far, far_d = a + 1, -1.
+    for i in range(a + 1, b):
+        px, py = float(xs[i]) - ax, float(ys[i]) - ay
+        if d2 == 0:
+            d = math.hypot(px, py)
+        else:
+            t = min(1., max(0., (px * dx + py * dy) / d2))
+            d = math.hypot(px - t * dx, py - t * dy)
+        if d > far_d:
+            far, far_d = i, d
+    return far, far_d
+
+
+def _farthest_numpy(np, xs, ys, a: int, b: int) -> tuple[int, float]:
+    ax, ay = xs[a], ys[a]
+    dx, dy = xs[b] - ax, ys[b] - ay
+    px, py = xs[a+1:b] - ax, ys[a+1:b] - ay
+    d2 = dx * dx + dy * dy
+    if d2 == 0:
+        ds = np.hypot(px, py)
+    else:
+        t = np.clip((px * dx + py * dy) / d2, 0., 1.)
+        ds = np.hypot(px - t * dx, py - t * dy)
+    i = int(np.argmax(ds))
+    return a + 1 + i, float(ds[i])
+
+
+def simplified_commands(cmds: Sequence[Command], tolerance: float) -> list[Command]:
+    """
+    Return commands whose runs of straight lines are simplified. The
+    commands should be absolutized. A simplified run is replaced with one
+    lineto command, and a moveto of the run keeps only its first point.
+    Runs without removable points are kept as they are.
+    """
+    def simplified(xs: list[float], ys: list[float]) -> Optional[Command]:
+        indexes = rdp_indexes(xs, ys, tolerance)
+        if len(indexes) == len(xs):
+            return None
+        return Lineto('L', [Point(xs[i], ys[i]) for i in indexes[1:]])
+
+    return replace_line_runs(cmds, simplified)
+
+
+def replace_line_runs(cmds: Sequence[Command],
+                      replace: Callable[[list[float], list[float]], Optional[Command]]) -> list[Command]:
+    """
+    Return commands whose runs of straight lines are replaced. The
+    commands should be absolutized. `replace` receives the coordinates of
+    a run including its start point, and returns a command drawing the
+    run from the start point, or None to keep the run as it is. When a
+    run is replaced, a moveto of the run keeps only its first point.
+    """
+    results: list[Command] = []
+    run: list[Command] = []
+    xs: list[float] = []
+    ys: list[float] = []
+
+    def flush() -> None:
+        if not run:
+            return
+        cmd = replace(xs, ys)
+        if cmd is None:
+            results.extend(run if not isinstance(run[0], Moveto) else run[1:])
+        else:
+            first = run[0]
+            if isinstance(first, Moveto):
+                del first.data[1:]
+            cmd.start_point = Point(xs[0], ys[0])
+            cmd.repr_relative = first.repr_relative
+            results.append(cmd)
+        run.clear()
+        xs.clear()
+        ys.clear()
+
+    for cmd in cmds:
+        fn = cmd.fn
+        if fn == 'M':
+            flush()
+            results.append(cmd)
+            if len(cmd.data) > 1:
+                # the moveto is already in the results; it is kept in the
+                # run to be trimmed
+                run.append(cmd)
+                for p in cmd.data:
+                    xs.append(p.x)
+                    ys.append(p.y)
+            continue
+
+        if fn == 'L' or fn == 'H' or fn == 'V':
+            if not run:
+                sp = cmd.start_point
+                xs.append(sp.x)
+                ys.append(sp.y)
+            run.append(cmd)
+            if isinstance(cmd, HorizontalAndVerticalLineto):
+                for n in cmd.data:
+                    xs.append(n if fn == 'H' else xs[-1])
+                    ys.append(n if fn == 'V' else ys[-1])
+            else:
+                for p in cmd.data:
+                    xs.append(p.x)
+                    ys.append(p.y)
+            continue
+
+        flush()
+        results.append(cmd)
+
+    flush()
+    return results
@@ -0,0 +1,417 @@
+"""
+Spatial indexes over the bounding boxes of path segments.
+
+An entry is `(key, index)`: the key a pathdata is inserted with, and the
+index of a record of `PathData.segments()`. Moveto records draw nothing
+and are not indexed. Inserting a key again replaces its entries, so a
+re-transformed pathdata is updated by inserting it again.
+
+- `GridIndex` buckets the boxes into square cells. Inserting and removing
+  are cheap, and queries are fast when the segments are of similar size.
+  Boxes covering many cells are kept in a list scanned by every query.
+- `RTreeIndex` packs the boxes into R-trees by Sort-Tile-Recursive.
+  Inserted entries wait in a small buffer, which is packed into a new
+  tree merged with the smaller trees, so there are O(log n) trees of
+  decreasing sizes. Removed entries are marked until they outnumber the
+  others and all entries are packed again. Updates cost logarithmic time
+  on average.
+
+`nearest` is a best-first search by the distance to the boxes. A
+`distance` function can give the exact distance to an entry, which must
+not be less than the distance to its box.
+"""
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Hashable, Iterable, Iterator, Sequence
+from typing import Optional
+import heapq, itertools, math
+
+from .command import Command
+from .segments import iter_segments
+from .graphics import Rect
+from .bounds import Box, segment_bbox
+
+
+Entry = tuple[Hashable, int]
+DistanceFunction = Callable[[Hashable, int], float]
+
+
+def segment_boxes(cmds: Sequence[Command]) -> Iterator[tuple[int, Box]]:
+    """
+    Iterate `(index, box)` of the drawing records of `PathData.segments()`.
+    """
+    for i, seg in enumerate(iter_segments(cmds)):
+        if seg[0] != 'M':
+            yield i, segment_bbox(seg)
+
+
+def box_distance(box: Box, x: float, y: float) -> float:
+    """
+    Return the distance from a point to a box, 0 if it is inside.
+    """
+    dx = max(box[0] - x, 0., x - box[2])
+    dy = max(box[1] - y, 0., y - box[3])
+    return math.hypot(dx, dy)
+
+
+class _SegmentIndex(ABC):
+    def __init__(self) -> None:
+        # entry id -> (key, segment index, box)
+        self._entries: dict[int, tuple[Hashable, int, Box]] = {}
+        self._ids: dict[Hashable, list[int]] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._ids
+
+    def insert(self, key: Hashable, pd: Sequence[Command]) -> None:
+        """
+        Index the segments of a pathdata under `key`, replacing the
+        entries of a pathdata inserted with the same key.
+        """
+        self.insert_boxes(key, segment_boxes(pd))
+
+    def insert_boxes(self, key: Hashable, boxes: Iterable[tuple[int, Box]]) -> None:
+        """
+        Index `(index, box)` pairs under `key`, replacing its entries.
+        """
+        if key in self._ids:
+            self.remove(key)
+        ids = []
+        for index, box in boxes:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (key, index, box)
+            ids.append(entry_id)
+        self._ids[key] = ids
+        self._added(ids)
+
+    def remove(self, key: Hashable) -> None:
+        """
+        Remove the entries of `key`. Raise KeyError if it is not indexed.
+        """
+        ids = self._ids.pop(key)
+        self._removed([(entry_id, self._entries.pop(entry_id)[2]) for entry_id in ids])
+
+    def query_point(self, x: float, y: float, tolerance: float = 0.) -> list[Entry]:
+        """
+        Return the entries whose boxes are within `tolerance` of a point.
+        """
+        return self.query_rect(Rect(x - tolerance, y - tolerance, x + tolerance, y + tolerance))
+
+    def query_rect(self, rect: Rect) -> list[Entry]:
+        """
+        Return the entries whose boxes intersect `rect`.
+        """
+        q = (rect.min_x, rect.min_y, rect.max_x, rect.max_y)
+        results = []
+        for entry_id in self._candidates(q):
+            key, index, box = self._entries[entry_id]
+            if _intersects(q, box):
+                results.append((key, index))
+        return results
+
+    def nearest(self, x: float, y: float, *,
+                k: int = 1,
+                max_distance: float = math.inf,
+                distance: Optional[DistanceFunction] = None) -> list[tuple[float, Entry]]:
+        """
+        Return up to `k` pairs of `(distance, entry)` nearest to a point,
+        in ascending order of the distance.
+
+        :param max_distance: entries farther than this are not returned.
+        :param distance: a function of `(key, index)` returning the
+            distance from the point to the segment. (default the distance
+            to the box)
+        """
+        results: list[tuple[float, Entry]] = []
+        heap: list[tuple[float, int]] = []
+        for bound, entry_id in self._nearest_boxes(x, y, max_distance):
+            # entries come in ascending order of the box distance, which
+            # is a lower bound of the exact distances
+            while heap and heap[0][0] <= bound:
+                d, popped = heapq.heappop(heap)
+                results.append((d, self._entry(popped)))
+                if len(results) == k:
+                    return results
+            key, index, _ = self._entries[entry_id]
+            d = bound if distance is None else distance(key, index)
+            if d <= max_distance:
+                heapq.heappush(heap, (d, entry_id))
+
+        while heap and len(results) < k:
+            d, popped = heapq.heappop(heap)
+            results.append((d, self._entry(popped)))
+        return results
+
+    def _entry(self, entry_id: int) -> Entry:
+        key, index, _ = self._entries[entry_id]
+        return key, index
+
+    @abstractmethod
+    def _added(self, ids: list[int]) -> None: ...
+
+    @abstractmethod
+    def _removed(self, removed: list[tuple[int, Box]]) -> None: ...
+
+    @abstractmethod
+    def _candidates(self, q: Box) -> Iterable[int]: ...
+
+    # (box distance, entry id) in ascending order of the distance
+    @abstractmethod
+    def _nearest_boxes(self, x: float, y: float, max_distance: float) -> Iterator[tuple[float, int]]: ...
+
+
+class GridIndex(_SegmentIndex):
+    """
+    Spatial index of segment boxes bucketed into square cells of
+    `cell_size`. A box covering more than `max_cells` cells is kept out
+    of the cells.
+    """
+    def __init__(self, cell_size: float, *, max_cells: int = 64) -> None:
+        if not cell_size > 0:
+            raise ValueError(f'cell_size should be positive: {cell_size}')
+        super().__init__()
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self._cells: dict[tuple[int, int], set[int]] = {}
+        self._large: set[int] = set()
+        # the range of the cells ever used, which bounds the rings of
+        # `nearest`
+        self._extent = (0, 0, 0, 0)
+
+    def _cell_range(self, box: Box) -> tuple[int, int, int, int]:
+        s = self.cell_size
+        return (math.floor(box[0] / s), math.floor(box[1] / s),
+                math.floor(box[2] / s), math.floor(box[3] / s))
+
+    def _added(self, ids: list[int]) -> None:
+        for entry_id in ids:
+            x0, y0, x1, y1 = self._cell_range(self._entries[entry_id][2])
+            if (x1 - x0 + 1) * (y1 - y0 + 1) > self.max_cells:
+                self._large.add(entry_id)
+                continue
+            if self._cells:
+                ex0, ey0, ex1, ey1 = self._extent
+                self._extent = min(ex0, x0), min(ey0, y0), max(ex1, x1), max(ey1, y1)
+            else:
+                self._extent = x0, y0, x1, y1
+            for cy in range(y0, y1 + 1):
+                for cx in range(x0, x1 + 1):
+                    self._cells.setdefault((cx, cy), set()).add(entry_id)
+
+    def _removed(self, removed: list[tuple[int, Box]]) -> None:
+        for entry_id, box in removed:
+            if entry_id in self._large:
+                self._large.discard(entry_id)
+                continue
+            x0, y0, x1, y1 = self._cell_range(box)
+            for cy in range(y0, y1 + 1):
+                for cx in range(x0, x1 + 1):
+                    cell = self._cells[cx, cy]
+                    cell.discard(entry_id)
+                    if not cell:
+                        del self._cells[cx, cy]
+
+    def _candidates(self, q: Box) -> Iterable[int]:
+        x0, y0, x1, y1 = self._cell_range(q)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self._cells):
+            cells: Iterable[set[int]] = (cell for (cx, cy), cell in self._cells.items()
+                                         if x0 <= cx <= x1 and y0 <= cy <= y1)
+        else:
+            cells = (self._cells[c] for c in itertools.product(range(x0, x1 + 1), range(y0, y1 + 1))
+                     if c in self._cells)
+        found = set(self._large)
+        for cell in cells:
+            found |= cell
+        return found
+
+    def _nearest_boxes(self, x: float, y: float, max_distance: float) -> Iterator[tuple[float, int]]:
+        # cells are visited in rings around the cell of the point; an
+        # entry is yielded once no unvisited ring can hold a nearer box
+        s = self.cell_size
+        px, py = math.floor(x / s), math.floor(y / s)
+        if self._cells:
+            x0, y0, x1, y1 = self._extent
+            max_ring = max(abs(px - x0), abs(px - x1), abs(py - y0), abs(py - y1))
+        else:
+            max_ring = -1
+
+        seen: set[int] = set()
+        heap: list[tuple[float, int]] = []
+
+        def push(entry_id: int) -> None:
+            if entry_id not in seen:
+                seen.add(entry_id)
+                heapq.heappush(heap, (box_distance(self._entries[entry_id][2], x, y), entry_id))
+
+        for entry_id in self._large:
+            push(entry_id)
+        for ring in range(max_ring + 1):
+            # the nearest point of a cell outside this ring
+            bound = min(x - (px - ring) * s, (px + ring + 1) * s - x,
+                        y - (py - ring) * s, (py + ring + 1) * s - y)
+            for c in _ring_cells(px, py, ring):
+                for entry_id in self._cells.get(c, ()):
+                    push(entry_id)
+            while heap and heap[0][0] <= bound:
+                d, entry_id = heapq.heappop(heap)
+                if d > max_distance:
+                    return
+                yield d, entry_id
+            if bound > max_distance:
+                return
+        while heap:
+            d, entry_id = heapq.heappop(heap)
+            if d > max_distance:
+                return
+            yield d, entry_id
+
+
+class RTreeIndex(_SegmentIndex):
+    """
+    Spatial index of segment boxes in R-trees packed by Sort-Tile-
+    Recursive, with up to `node_size` children per node.
+    """
+    def __init__(self, *, node_size: int = 16) -> None:
+        if node_size < 2:
+            raise ValueError(f'node_size should be at least 2: {node_size}')
+        super().__init__()
+        self.node_size = node_size
+        # the trees and their entry ids, in descending order of the size
+        self._trees: list[tuple[_Node, list[int]]] = []
+        self._pending: set[int] = set()
+        self._dead: set[int] = set()
+
+    def pack(self) -> None:
+        """
+        Pack all entries into one tree.
+        """
+        ids = list(self._entries)
+        self._trees = [self._tree(ids)] if ids else []
+        self._pending.clear()
+        self._dead.clear()
+
+    def _tree(self, ids: list[int]) -> tuple[_Node, list[int]]:
+        return _str_pack([(self._entries[i][2], i) for i in ids], self.node_size), ids
+
+    def _added(self, ids: list[int]) -> None:
+        self._pending.update(ids)
+        if len(self._pending) <= 4 * self.node_size:
+            return
+
+        ids = list(self._pending)
+        self._pending.clear()
+        # the smaller trees are merged like the digits of a binary
+        # counter, so an entry is packed O(log n) times
+        trees = self._trees
+        while trees and len(trees[-1][1]) <= 2 * len(ids):
+            _, merged = trees.pop()
+            ids += [i for i in merged if i not in self._dead]
+            self._dead.difference_update(merged)
+        trees.append(self._tree(ids))
+
+    def _removed(self, removed: list[tuple[int, Box]]) -> None:
+        for entry_id, _ in removed:
+            if entry_id in self._pending:
+                self._pending.discard(entry_id)
+            else:
+                self._dead.add(entry_id)
+        if len(self._dead) > len(self._entries):
+            self.pack()
+
+    def _candidates(self, q: Box) -> Iterable[int]:
+        found = [i for i in self._pending if _intersects(q, self._entries[i][2])]
+        stack = [root for root, _ in self._trees]
+        while stack:
+            box, children, is_leaf = stack.pop()
+            if not _intersects(q, box):
+                continue
+            if is_leaf:
+                found.extend(i for b, i in children if i not in self._dead and _intersects(q, b))
+            else:
+                stack.extend(children)
+        return found
+
+    def _nearest_boxes(self, x: float, y: float, max_distance: float) -> Iterator[tuple[float, int]]:
+        counter = itertools.count()
+        # (distance, tie breaker, node or None, entry id)
+        heap: list[tuple[float, int, Optional[_Node], int]] = []
+        for entry_id in self._pending:
+            heap.append((box_distance(self._entries[entry_id][2], x, y), next(counter), None, entry_id))
+        for root, _ in self._trees:
+            heap.append((box_distance(root[0], x, y), next(counter), root, -1))
+        heapq.heapify(heap)
+
+        while heap:
+            d, _, node, entry_id = heapq.heappop(heap)
+            if d > max_distance:
+                return
+            if node is None:
+                yield d, entry_id
+                continue
+            _, children, is_leaf = node
+            if is_leaf:
+                for b, i in children:
+                    if i not in self._dead:
+                        heapq.heappush(heap, (box_distance(b, x, y), next(counter), None, i))
+            else:
+                for child in children:
+                    heapq.heappush(heap, (box_distance(child[0], x, y), next(counter), child, -1))
+
+
+# (box, children, is_leaf); the children of a leaf are (box, entry id)
+_Node = tuple[Box, list, bool]
+
+
+def _str_pack(items: list[tuple[Box, int]], node_size: int) -> Optional[_Node]:
+    if not items:
+        return None
+    nodes: list[_Node] = [(_union(b for b, _ in group), group, True)
+                          for group in _str_groups(items, node_size)]
+    while len(nodes) > 1:
+        nodes = [(_union(n[0] for n in group), group, False)
+                 for group in _str_groups(nodes, node_size)]
+    return nodes[0]
+
+
+def _str_groups(items: list, node_size: int) -> list[list]:
+    # sort by the center x into vertical slices of about sqrt(n / size)
+    # nodes each, then by the center y within a slice
+    n_nodes = math.ceil(len(items) / node_size)
+    n_slices = math.ceil(math.sqrt(n_nodes))
+    slice_size = n_slices * node_size
+    items = sorted(items, key=lambda item: item[0][0] + item[0][2])
+    groups = []
+    for i in range(0, len(items), slice_size):
+        vertical = sorted(items[i:i+slice_size], key=lambda item: item[0][1] + item[0][3])
+        groups.extend(vertical[j:j+node_size] for j in range(0, len(vertical), node_size))
+    return groups
+
+
+def _union(boxes: Iterable[Box]) -> Box:
+    min_x = min_y = math.inf
+    max_x = max_y = -math.inf
+    for b in boxes:
+        min_x, min_y = min(min_x, b[0]), min(min_y, b[1])
+        max_x, max_y = max(max_x, b[2]), max(max_y, b[3])
+    return min_x, min_y, max_x, max_y
+
+
+def _intersects(a: Box, b: Box) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def _ring_cells(px: int, py: int, ring: int) -> Iterator[tuple[int, int]]:
+    if ring == 0:
+        yield px, py
+        return
+    for cx in range(px - ring, px + ring + 1):
+        yield cx, py - ring
+        yield cx, py + ring
+    for cy in range(py - ring + 1, py + ring):
+        yield px - ring, cy
+        yield px + ring, cy
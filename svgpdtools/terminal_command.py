@@ -1,5 +1,5 @@
 from __future__ import annotations
-import argparse, pathlib, weakref, errno, sys, traceback, re
+import argparse, pathlib, weakref, errno, sys, traceback, re, contextlib
 import xml.sax as SAX
 from xml.sax import make_parser
 from xml.sax.handler import ContentHandler
@@ -10,11 +10,20 @@ from collections.abc import Iterator
 from typing import Any, Protocol, Optional, Union, TextIO
 
 from svgpdtools import PathData, Transform, precision
+from svgpdtools.fastpath import transform_d, normalize_d, normalized_pathdata
+from svgpdtools.lod import Level, level_strings
+from svgpdtools.tile import Spool, write_tiles
+from svgpdtools.tessellate import Mesh, merge_meshes
+from svgpdtools.winding import FillRule
+from svgpdtools.columnar import PathColumns
+from svgpdtools.corpus import CorpusBuilder
+from svgpdtools import npy, columnar
 import svgpdtools.parser as myparser
 from svgpdtools.pathdata import temporary_repr_relative, PDTransformFailed
 from svgpdtools.command import Command, Moveto, Lineto, Curveto, HorizontalAndVerticalLineto,\
     EllipticalArc, EllipticalArcItem, Close
-from svgpdtools.utils import number_repr
+from svgpdtools.utils import number_repr, current_precision, precision_for_scale, temporary_precision
+from svgpdtools.graphics import Rect
 
 
 def _arg_parses() -> argparse.ArgumentParser:
@@ -26,7 +35,12 @@ def _arg_parses() -> argparse.ArgumentParser:
 Available commands:
   transform
   normalize
-  view''',
+  view
+  lod
+  tile
+  tessellate
+  export
+  corpus''',
         add_help=False,
         exit_on_error=False,
     )
@@ -98,11 +112,38 @@ Convert pathdata to the following representations:
         action='store_true',
         help='If the path-element has a transform attribute, apply that transformation to the coordinates and remove that attribute.',
     )
+    normalize.add_argument(
+        '--collapse-group-transforms',
+        action='store_true',
+        help='Also apply the transforms of the ancestor groups (g, a, switch) to the coordinates, and remove them from the groups. The other elements get them in their transform attributes, and a nested svg-element or an element with an id (which a use-element may clone) is wrapped in a transformed group. Groups and path-elements referring to “url()” (clip paths, masks, filters, markers or paints) keep a transform attribute, and the contents of defs, symbol, clipPath, mask, pattern and marker elements are left as they are. Implies “--collapse-transform-attribute”.',
+    )
     normalize.add_argument(
         '--allow-implicit-lineto',
         action='store_true',
         help='Convert a moveto and following lineto commands into one moveto command.',
     )
+    normalize.add_argument(
+        '--simplify',
+        type=float,
+        metavar='EPS',
+        help='Remove points of straight line runs within the distance EPS (Ramer–Douglas–Peucker).',
+    )
+    normalize.add_argument(
+        '--fit-curves',
+        type=float,
+        metavar='EPS',
+        help='Replace straight line runs with curves within the distance EPS.',
+    )
+    normalize.add_argument(
+        '--shorthand',
+        action='store_true',
+        help='Write curves in the shorthand forms (S/Q/T) when they draw the same.',
+    )
+    normalize.add_argument(
+        '--optimize',
+        action='store_true',
+        help='Remove degenerate and redundant commands (zero-length lines, collinear points, flat curves, empty movetos).',
+    )
 
     common_to_trns_norm = parser.add_argument_group(
         'Common to “transform” and “normalize”'
@@ -117,11 +158,161 @@ Convert pathdata to the following representations:
         action='store_true',
         help='Convert a horizontal- or vertical-lineto command to a lineto command.',
     )
+    common_to_trns_norm.add_argument(
+        '--clip-rect',
+        type=float,
+        nargs=4,
+        metavar=('X', 'Y', 'W', 'H'),
+        help='Drop subpaths outside the rectangle, in the coordinates of the resulting pathdata (e.g. the viewBox).',
+    )
+    common_to_trns_norm.add_argument(
+        '--clip-split',
+        action='store_true',
+        help='With “--clip-rect”, also split segments at the boundary and drop the pieces outside. Split subpaths are opened, so use it for strokes.',
+    )
+    common_to_trns_norm.add_argument(
+        '--target-size',
+        type=float,
+        metavar='PX',
+        help='Render size in pixels of the larger side of the viewBox. Subpaths smaller than a pixel are dropped, and the precision is lowered to what the size shows.',
+    )
+    common_to_trns_norm.add_argument(
+        '--cull-area',
+        type=float,
+        metavar='PX2',
+        default=.25,
+        help='With “--target-size”, drop subpaths covering less than this area in square pixels. (default: %(default)s)',
+    )
 
     view = parser.add_argument_group(
         'Command “view”',
         'Search path-elements from the input, and print each path-element nicely formatted.',
     )
+    view.add_argument(
+        '--bbox',
+        action='store_true',
+        help='Show the bounding box of each pathdata as “x y width height”.',
+    )
+
+    lod = parser.add_argument_group(
+        'Command “lod”',
+        '''\
+Write each path-element in levels of detail. Each pathdata is parsed and
+normalized once (with the options of “normalize”), then simplified,
+optimized and formatted per level; “--optimize” is always applied, at the
+precision of each level. “--clip-rect” and “--clip-split” clip
+the pathdata before the levels; “--simplify” and “--target-size” are not
+allowed, since the levels set the tolerances and precisions. Without
+“--output”, levels after the first follow the element as siblings tagged
+with a “data-lod” attribute.''',
+    )
+    lod.add_argument(
+        '--levels',
+        type=Level.from_string,
+        nargs='+',
+        metavar='TOL[:PREC]',
+        help='Simplification tolerance and precision of each level, e.g. “0:3 0.5:2 2:1”. A level without PREC uses “--precision”.',
+    )
+    lod.add_argument(
+        '-o', '--output',
+        metavar='<pattern>',
+        help='Write each level into a file. “{level}” in the pattern is replaced with the level number, and is required with more than one level.',
+    )
+
+    tile = parser.add_argument_group(
+        'Command “tile”',
+        '''\
+Write the path-elements into a z/x/y grid of SVG tiles, as
+<out-dir>/<z>/<x>/<y>.svg. The grid is a square over the viewBox (or the
+bounding box of the paths). Paths are spooled into a temporary file, and
+the tiles are written in parallel. The transforms of the paths and their
+ancestors are applied, and the inherited properties of the ancestors are
+copied onto the paths. The contents of defs, symbol, clipPath, mask,
+pattern and marker elements are skipped. “--clip-split” and
+“--cull-area” apply to each tile.''',
+    )
+    tile.add_argument(
+        '--out-dir',
+        type=pathlib.Path,
+        metavar='<dir>',
+        help='Directory to write the tiles into.',
+    )
+    tile.add_argument(
+        '--zoom',
+        type=int,
+        nargs='+',
+        metavar='Z',
+        default=[0],
+        help='Zoom levels to write. A level Z has 2^Z by 2^Z tiles. (default: 0)',
+    )
+    tile.add_argument(
+        '--tile-size',
+        type=int,
+        metavar='PX',
+        default=256,
+        help='Width and height of a tile in pixels. (default: %(default)d)',
+    )
+    tile.add_argument(
+        '--jobs',
+        type=int,
+        metavar='N',
+        help='Number of processes writing the tiles. (default: the number of CPUs)',
+    )
+
+    tessellate = parser.add_argument_group(
+        'Command “tessellate”',
+        '''\
+Triangulate the fill of the path-elements into packed buffers for GPU
+upload. The transform attributes, those of the ancestors, and the
+<transform-list> are applied to the pathdata, and the contents of defs,
+symbol, clipPath, mask, pattern and marker elements are skipped.
+“--output” is required, and
+“{buffer}” in the pattern is replaced with “vertices” (float32 x, y
+pairs), “indices” (uint32, three per triangle) and “offsets” (int64, the
+first triangle of each path and the number of triangles). A file ending
+with “.npy” is written as a NumPy array, and any other as raw
+little-endian data.
+usage: svgpdtools tessellate [options] -o <pattern> [--] ["<transform-list>"]''',
+    )
+    tessellate.add_argument(
+        '--tolerance',
+        type=float,
+        metavar='EPS',
+        default=.1,
+        help='Distance within which curves are flattened. (default: %(default)s)',
+    )
+    tessellate.add_argument(
+        '--fill-rule',
+        choices=['nonzero', 'evenodd'],
+        help='Fill rule of all paths. (default: the fill-rule of each path-element)',
+    )
+
+    export = parser.add_argument_group(
+        'Command “export”',
+        '''\
+Write the pathdata of all path-elements as columnar arrays (see
+svgpdtools.columnar): into “--output” as a .npz file, or into “--out-dir”
+as a .npy file per column, which NumPy maps with mmap_mode='r'. The
+coordinates are stored as written: those of lowercase commands are
+relative to the current point, except the end points of elliptical arcs,
+which are always absolute. With “--collapse-transform-attribute”, the
+transform attributes, those of the ancestors included, are applied to
+the coordinates.''',
+    )
+    export.add_argument(
+        '--float32',
+        action='store_true',
+        help='Store the coordinates as float32 instead of float64.',
+    )
+
+    parser.add_argument_group(
+        'Command “corpus”',
+        '''\
+Parse the pathdata of the path-elements once into a memory-mapped corpus
+file written to “--output” (see svgpdtools.corpus). Identical pathdata
+strings are stored once, and are looked up by their hashes. “--float32”
+stores the coordinates as float32.''',
+    )
     
     return parser
 
@@ -204,9 +395,28 @@ class _ArgsProto(Protocol):
     repr_absolute: bool
     transform: str
     collapse_transform_attribute: bool
+    collapse_group_transforms: bool
     collapse_elliptical_arc: bool
     collapse_hv_lineto: bool
     allow_implicit_lineto: bool
+    simplify: Optional[float]
+    fit_curves: Optional[float]
+    optimize: bool
+    shorthand: bool
+    clip_rect: Optional[list[float]]
+    clip_split: bool
+    target_size: Optional[float]
+    cull_area: float
+    bbox: bool
+    levels: Optional[list[Level]]
+    output: Optional[str]
+    out_dir: Optional[pathlib.Path]
+    zoom: list[int]
+    tile_size: int
+    jobs: Optional[int]
+    tolerance: float
+    fill_rule: Optional[FillRule]
+    float32: bool
 
 class _Args: pass
 
@@ -251,6 +461,7 @@ def command(name: str, args: _ArgsProto) -> None:
             target_indexes = args.index,
             repr_relative = args.repr_relative,
             repr_absolute = args.repr_absolute,
+            show_bbox = args.bbox,
         )
 
     elif name == 'normalize':
@@ -260,7 +471,16 @@ def command(name: str, args: _ArgsProto) -> None:
             collapse_hv_lineto = args.collapse_hv_lineto,
             collapse_elliptical_arc = args.collapse_elliptical_arc,
             collapse_transform_attribute = args.collapse_transform_attribute,
+            collapse_group_transforms = args.collapse_group_transforms,
             allow_implicit_lineto = args.allow_implicit_lineto,
+            simplify = args.simplify,
+            fit_curves = args.fit_curves,
+            optimize = args.optimize,
+            use_shorthand = args.shorthand,
+            clip_rect = _clip_rect(args),
+            clip_split = args.clip_split,
+            target_size = args.target_size,
+            cull_area = args.cull_area,
         )
         
     elif name == 'transform':
@@ -272,8 +492,40 @@ def command(name: str, args: _ArgsProto) -> None:
             repr_absolute = args.repr_absolute,
             collapse_hv_lineto = args.collapse_hv_lineto,
             collapse_elliptical_arc = args.collapse_elliptical_arc,
+            clip_rect = _clip_rect(args),
+            clip_split = args.clip_split,
+            target_size = args.target_size,
+            cull_area = args.cull_area,
         )
 
+    elif name == 'lod':
+        _lod_command(input, args)
+        return
+
+    elif name == 'tile':
+        _tile_command(input, args)
+        return
+
+    elif name == 'tessellate':
+        _tessellate_command(input, args)
+        return
+
+    elif name == 'export':
+        _export_command(input, args)
+        return
+
+    elif name == 'corpus':
+        if args.output is None:
+            raise argparse.ArgumentError(None, 'the command “corpus” requires --output')
+        with CorpusBuilder(args.output, 'f' if args.float32 else 'd') as builder:
+            handler = PathCorpusHandler(
+                builder = builder,
+                target_indexes = args.index,
+            )
+            parser = _ParserDelegate(handler)
+            parser.parse(input)
+        return
+
     else:
         raise _UnknownCommand(name)
     
@@ -281,6 +533,145 @@ def command(name: str, args: _ArgsProto) -> None:
     parser.parse(input)
 
 
+def _lod_command(input: Union[TextIO, pathlib.Path], args: _ArgsProto) -> None:
+    if not args.levels:
+        raise argparse.ArgumentError(None, 'the command “lod” requires --levels')
+    if args.output is not None and len(args.levels) > 1 and '{level}' not in args.output:
+        raise argparse.ArgumentError(None, 'the command “lod” requires --output with “{level}” for more than one level')
+    if args.simplify is not None or args.target_size is not None:
+        raise argparse.ArgumentError(None, 'the command “lod” does not take --simplify or --target-size; use the tolerances and precisions of --levels')
+
+    with contextlib.ExitStack() as stack:
+        outputs: list[TextIO]
+        if args.output is None:
+            outputs = [sys.stdout]
+        else:
+            outputs = [stack.enter_context(open(args.output.replace('{level}', str(i)), 'w', encoding='utf-8'))
+                       for i in range(len(args.levels))]
+        handler = PathLODHandler(
+            outputs = outputs,
+            levels = args.levels,
+            target_indexes = args.index,
+            repr_relative = args.repr_relative,
+            collapse_hv_lineto = args.collapse_hv_lineto,
+            collapse_elliptical_arc = args.collapse_elliptical_arc,
+            collapse_transform_attribute = args.collapse_transform_attribute,
+            allow_implicit_lineto = args.allow_implicit_lineto,
+            fit_curves = args.fit_curves,
+            use_shorthand = args.shorthand,
+            clip_rect = _clip_rect(args),
+            clip_split = args.clip_split,
+        )
+        parser = _ParserDelegate(handler)
+        parser.parse(input)
+
+
+def _tile_command(input: Union[TextIO, pathlib.Path], args: _ArgsProto) -> None:
+    if args.out_dir is None:
+        raise argparse.ArgumentError(None, 'the command “tile” requires --out-dir')
+
+    with Spool() as spool:
+        handler = PathSpoolHandler(
+            spool = spool,
+            target_indexes = args.index,
+        )
+        parser = _ParserDelegate(handler)
+        parser.parse(input)
+        write_tiles(
+            spool, args.out_dir, args.zoom,
+            extent = handler.extent,
+            tile_size = args.tile_size,
+            split = args.clip_split,
+            cull_area = args.cull_area,
+            max_workers = args.jobs,
+        )
+
+
+def _tessellate_command(input: Union[TextIO, pathlib.Path], args: _ArgsProto) -> None:
+    if args.output is None or '{buffer}' not in args.output:
+        raise argparse.ArgumentError(None, 'the command “tessellate” requires --output with “{buffer}”')
+
+    transform_list = args.transform.strip('\'"')
+    handler = PathMeshHandler(
+        target_indexes = args.index,
+        transform = Transform.concat(myparser.transforms(transform_list)) if transform_list else None,
+        tolerance = args.tolerance,
+        fill_rule = args.fill_rule,
+    )
+    parser = _ParserDelegate(handler)
+    parser.parse(input)
+
+    vertices, indices, offsets = merge_meshes(handler.meshes)
+    npy.save(args.output.replace('{buffer}', 'vertices'), vertices, (len(vertices) // 2, 2))
+    npy.save(args.output.replace('{buffer}', 'indices'), indices, (len(indices) // 3, 3))
+    npy.save(args.output.replace('{buffer}', 'offsets'), offsets)
+
+
+def _export_command(input: Union[TextIO, pathlib.Path], args: _ArgsProto) -> None:
+    if (args.output is None) == (args.out_dir is None):
+        raise argparse.ArgumentError(None, 'the command “export” requires either --output or --out-dir')
+    if args.output is not None and not args.output.endswith('.npz'):
+        raise argparse.ArgumentError(None, 'the output of the command “export” should be a .npz file')
+
+    handler = PathExportHandler(
+        columns = PathColumns('f' if args.float32 else 'd'),
+        target_indexes = args.index,
+        collapse_transform_attribute = args.collapse_transform_attribute,
+    )
+    parser = _ParserDelegate(handler)
+    parser.parse(input)
+    columnar.save(handler.columns, args.output if args.output is not None else args.out_dir)
+
+
+def _clip_rect(args: _ArgsProto) -> Optional[Rect]:
+    if args.clip_rect is None:
+        return None
+    x, y, w, h = args.clip_rect
+    return Rect(x, y, x + w, y + h)
+
+
+def _postprocessed_d(pd: PathData, *,
+                     clip_rect: Optional[Rect],
+                     clip_split: bool,
+                     scale: Optional[float],
+                     cull_area: float) -> str:
+    # `scale` is pixels per unit of the pathdata
+    if clip_rect is not None:
+        pd.clip_to_rect(clip_rect, split=clip_split)
+    if scale is None or scale <= 0:
+        return str(pd)
+
+    pd.cull_subpaths(cull_area, scale=scale)
+    with temporary_precision(min(current_precision(), precision_for_scale(scale))):
+        return str(pd)
+
+
+def _view_box(attrs: AttributesImpl) -> Optional[Rect]:
+    """
+    Return the viewBox of a svg element, or None if it has no valid one.
+    """
+    try:
+        x, y, w, h = (float(n) for n in re.split(r'[\s,]+', attrs['viewBox'].strip()))
+    except (KeyError, ValueError):
+        return None
+    return Rect(x, y, x + w, y + h) if w > 0 and h > 0 else None
+
+
+def _viewport_size(attrs: AttributesImpl) -> Optional[float]:
+    """
+    Return the larger side of the viewBox of a svg element, or of its
+    width and height in user units.
+    """
+    if 'viewBox' in attrs.keys():
+        view_box = _view_box(attrs)
+        return None if view_box is None else max(view_box.width, view_box.height)
+    try:
+        w, h = (float(re.sub(r'px$', '', attrs[k].strip())) for k in ('width', 'height'))
+    except (KeyError, ValueError):
+        return None
+    return max(w, h) if max(w, h) > 0 else None
+
+
 class PathTransformHandler(XMLGenerator):
     def __init__(self, *,
                  target_indexes: list[int],
@@ -288,12 +679,24 @@ class PathTransformHandler(XMLGenerator):
                  repr_relative: bool,
                  repr_absolute: bool,
                  collapse_hv_lineto: bool,
-                 collapse_elliptical_arc: bool) -> None:
+                 collapse_elliptical_arc: bool,
+                 clip_rect: Optional[Rect] = None,
+                 clip_split: bool = False,
+                 target_size: Optional[float] = None,
+                 cull_area: float = .25) -> None:
         self.transform = transform
         self.repr_relative = repr_relative
         self.repr_absolute = repr_absolute
         self.collapse_hv_lineto = collapse_hv_lineto
         self.collapse_elliptical_arc = collapse_elliptical_arc
+        self.clip_rect = clip_rect
+        self.clip_split = clip_split
+        self.target_size = target_size
+        self.cull_area = cull_area
+        # pixels per user unit of the outermost svg element
+        self.px_per_unit: Optional[float] = None
+        # the CTMs of the open elements, which scale their pathdata
+        self.ctms = _CTMStack() if target_size is not None else None
         
         self.delegate = None
         
@@ -302,6 +705,11 @@ class PathTransformHandler(XMLGenerator):
         super().__init__(sys.stdout, encoding='utf-8', short_empty_elements=True)
         
     def startElement(self, name: str, attrs: AttributesImpl) -> None:
+        if name == 'svg' and self.target_size is not None and self.px_per_unit is None:
+            size = _viewport_size(attrs)
+            self.px_per_unit = 0. if size is None else self.target_size / size
+        parent_ctm = None if self.ctms is None else self.ctms.push_element(name, attrs)
+
         if name != 'path':
             super().startElement(name, attrs)
             return
@@ -313,29 +721,53 @@ class PathTransformHandler(XMLGenerator):
             return
 
         _attrs = {}
+        d = ''
         transforms = [self.transform]
         for k in attrs.keys():
             if k == 'd':
-                pd = myparser.pathdata(attrs[k])
+                d = attrs[k]
             elif k == 'transform':
                 transforms.extend(myparser.transforms(attrs[k]))
             else:
                 _attrs[k] = attrs[k]
 
-        pd.transform(
-            Transform.concat(transforms),
-            collapse_elliptical_arc=self.collapse_elliptical_arc,
-            collapse_hv_lineto=self.collapse_hv_lineto,
-        )
+        if self.clip_rect is None and not self.px_per_unit:
+            _attrs['d'] = transform_d(
+                d,
+                Transform.concat(transforms),
+                collapse_elliptical_arc=self.collapse_elliptical_arc,
+                collapse_hv_lineto=self.collapse_hv_lineto,
+                repr_relative=self.repr_relative,
+                repr_absolute=self.repr_absolute,
+            )
+            super().startElement(name, AttributesImpl(_attrs))
+            return
 
+        pd = myparser.pathdata(d)
+        pd.transform(Transform.concat(transforms),
+                     collapse_hv_lineto=self.collapse_hv_lineto,
+                     collapse_elliptical_arc=self.collapse_elliptical_arc)
         if self.repr_absolute:
             pd.absolutize()
+        # the transforms of the ancestors scale the pathdata
+        scale = self.px_per_unit
+        if scale and parent_ctm is not None:
+            scale *= parent_ctm.scale_factor()
         with temporary_repr_relative(self.repr_relative):
-            pd_str = str(pd)
-
-        _attrs['d'] = pd_str
+            _attrs['d'] = _postprocessed_d(
+                pd,
+                clip_rect=self.clip_rect,
+                clip_split=self.clip_split,
+                scale=scale,
+                cull_area=self.cull_area,
+            )
         super().startElement(name, AttributesImpl(_attrs))
 
+    def endElement(self, name: str) -> None:
+        super().endElement(name)
+        if self.ctms is not None:
+            self.ctms.pop()
+
     def endDocument(self):
         sys.stdout.write('\n')
 
@@ -347,12 +779,35 @@ class PathNormalizeHandler(XMLGenerator):
                  collapse_transform_attribute: bool,
                  collapse_elliptical_arc: bool,
                  collapse_hv_lineto: bool,
-                 allow_implicit_lineto: bool) -> None:
+                 allow_implicit_lineto: bool,
+                 collapse_group_transforms: bool = False,
+                 simplify: Optional[float] = None,
+                 fit_curves: Optional[float] = None,
+                 optimize: bool = False,
+                 use_shorthand: bool = False,
+                 clip_rect: Optional[Rect] = None,
+                 clip_split: bool = False,
+                 target_size: Optional[float] = None,
+                 cull_area: float = .25) -> None:
         self.repr_relative = repr_relative
         self.collapse_transform_attribute = collapse_transform_attribute
         self.collapse_hv_lineto = collapse_hv_lineto
         self.collapse_elliptical_arc = collapse_elliptical_arc
         self.allow_implicit_lineto = allow_implicit_lineto
+        self.simplify = simplify
+        self.fit_curves = fit_curves
+        self.optimize = optimize
+        self.use_shorthand = use_shorthand
+        self.clip_rect = clip_rect
+        self.clip_split = clip_split
+        self.target_size = target_size
+        self.cull_area = cull_area
+        # pixels per user unit of the outermost svg element
+        self.px_per_unit: Optional[float] = None
+        self.ctms = _CTMStack() if collapse_group_transforms else None
+        # the CTMs of the open elements as written in the input, which
+        # scale their pathdata
+        self.input_ctms = _CTMStack() if target_size is not None else None
 
         self.delegate = None
 
@@ -361,6 +816,18 @@ class PathNormalizeHandler(XMLGenerator):
         super().__init__(sys.stdout, encoding='utf-8', short_empty_elements=True)
         
     def startElement(self, name: str, attrs: AttributesImpl) -> None:
+        if name == 'svg' and self.target_size is not None and self.px_per_unit is None:
+            size = _viewport_size(attrs)
+            self.px_per_unit = 0. if size is None else self.target_size / size
+
+        if self.input_ctms is not None:
+            self.input_ctms.push_element(name, attrs)
+
+        # the CTM of the parent to apply to the pathdata
+        ctm, bake = None, False
+        if self.ctms is not None:
+            attrs, ctm, bake = self._start_ctm_level(name, attrs)
+
         if name != 'path':
             super().startElement(name, attrs)
             return
@@ -368,49 +835,610 @@ class PathNormalizeHandler(XMLGenerator):
         index = self.index
         self.index += 1
         if self.target_indexes and index not in self.target_indexes:
+            if bake:
+                attrs = self.ctms.with_ctm(attrs)
             super().startElement(name, attrs)
             return
         
         _attrs = {}
+        d = ''
         transforms = []
         for k in attrs.keys():
             if k == 'd':
-                pd = myparser.pathdata(attrs[k])
+                d = attrs[k]
             elif k == 'transform':
                 transforms = myparser.transforms(attrs[k])
             else:
                 _attrs[k] = attrs[k]
+        if ctm is not None:
+            transforms.insert(0, ctm)
 
+        transform = None
         if transforms:
-            if self.collapse_transform_attribute:
-                pd.transform(
-                    Transform.concat(transforms),
-                    collapse_elliptical_arc=self.collapse_elliptical_arc,
-                    collapse_hv_lineto=self.collapse_hv_lineto,
-                )
+            if self.collapse_transform_attribute or bake:
+                transform = Transform.concat(transforms)
             else:
                 _attrs['transform'] = ' '.join([str(t) for t in transforms])
 
-        pd.normalize(
+        options = dict(
+            transform=transform,
             repr_relative=self.repr_relative,
             collapse_hv_lineto=self.collapse_hv_lineto,
             collapse_elliptical_arc=self.collapse_elliptical_arc,
             allow_implicit_lineto=self.allow_implicit_lineto,
+            simplify=self.simplify,
+            fit_curves=self.fit_curves,
+            optimize=self.optimize,
+            use_shorthand=self.use_shorthand,
         )
-        _attrs['d'] = str(pd)
+        if self.clip_rect is None and not self.px_per_unit:
+            _attrs['d'] = normalize_d(d, **options)
+        else:
+            # the pathdata is scaled by the CTM of the input but the
+            # transforms applied to it
+            scale = self.px_per_unit
+            if scale and self.input_ctms is not None:
+                input_ctm = self.input_ctms.levels[-1].ctm
+                if input_ctm is not None:
+                    scale *= input_ctm.scale_factor()
+                if transform is not None:
+                    applied = transform.scale_factor()
+                    scale = scale / applied if applied else 0.
+            _attrs['d'] = _postprocessed_d(
+                normalized_pathdata(d, **options),
+                clip_rect=self.clip_rect,
+                clip_split=self.clip_split,
+                scale=scale,
+                cull_area=self.cull_area,
+            )
         super().startElement(name, AttributesImpl(_attrs))
 
+    def endElement(self, name: str) -> None:
+        super().endElement(name)
+        if self.input_ctms is not None:
+            self.input_ctms.pop()
+        if self.ctms is not None and self.ctms.pop().wrapped:
+            super().endElement('g')
+
     def endDocument(self):
         sys.stdout.write('\n')
 
+    def _start_ctm_level(self, name: str, attrs: AttributesImpl) -> tuple[AttributesImpl, Optional[Transform], bool]:
+        """
+        Push the CTM of the children of an element. Return the attributes to
+        write, and for a path-element the CTM of its parent and whether
+        the transforms are applied to its pathdata.
+        """
+        ctms = self.ctms
+        assert ctms is not None
+        parent = ctms.top
+        if parent is None or parent.template or name in _TEMPLATE_ELEMENTS:
+            # the root, and the contents drawn where they are referred
+            ctms.push(None, template = parent is not None)
+            return attrs, None, False
+
+        ctm = parent.ctm
+        if name == 'svg' or 'id' in attrs:
+            # a nested viewport cannot be baked, and a use-element draws an
+            # element with an id without the transforms of its ancestors, so
+            # they are wrapped in the CTM
+            if ctm is not None:
+                super().startElement('g', AttributesImpl({'transform': ctms.ctm_repr()}))
+            ctms.push(None, wrapped = ctm is not None)
+            return attrs, None, False
+
+        if name in _GROUP_ELEMENTS and not _refers_url(attrs):
+            own = attrs.get('transform')
+            if own is not None:
+                t = Transform.concat(myparser.transforms(own))
+                ctm = t if ctm is None else ctm * t
+            ctms.push(ctm)
+            return AttributesImpl({k: attrs[k] for k in attrs.keys() if k != 'transform'}), None, False
+
+        ctms.push(None)
+        if name == 'path' and not _refers_url(attrs):
+            return attrs, ctm, True
+        return ctms.with_ctm(attrs), None, False
+
+
+class PathLODHandler(ContentHandler):
+    """
+    Forward the document to a XMLGenerator per output. With one output,
+    the levels of a path-element are written as siblings; otherwise each
+    output gets one level.
+    """
+    def __init__(self, *,
+                 outputs: list[TextIO],
+                 levels: list[Level],
+                 target_indexes: list[int],
+                 repr_relative: bool,
+                 collapse_transform_attribute: bool,
+                 collapse_elliptical_arc: bool,
+                 collapse_hv_lineto: bool,
+                 allow_implicit_lineto: bool,
+                 fit_curves: Optional[float] = None,
+                 use_shorthand: bool = False,
+                 clip_rect: Optional[Rect] = None,
+                 clip_split: bool = False) -> None:
+        self.outputs = outputs
+        self.generators = [XMLGenerator(out, encoding='utf-8', short_empty_elements=True) for out in outputs]
+        self.levels = levels
+        self.repr_relative = repr_relative
+        self.collapse_transform_attribute = collapse_transform_attribute
+        self.collapse_hv_lineto = collapse_hv_lineto
+        self.collapse_elliptical_arc = collapse_elliptical_arc
+        self.allow_implicit_lineto = allow_implicit_lineto
+        self.fit_curves = fit_curves
+        self.use_shorthand = use_shorthand
+        self.clip_rect = clip_rect
+        self.clip_split = clip_split
+
+        self.delegate = None
+
+        self.target_indexes = target_indexes
+        self.index = 0
+        # attributes of the sibling levels written after the current path
+        self.siblings: list[dict[str, str]] = []
+        super().__init__()
+
+    def startDocument(self):
+        for g in self.generators:
+            g.startDocument()
+
+    def endDocument(self):
+        for g, out in zip(self.generators, self.outputs):
+            g.endDocument()
+            out.write('\n')
+
+    def characters(self, content):
+        for g in self.generators:
+            g.characters(content)
+
+    def ignorableWhitespace(self, content):
+        for g in self.generators:
+            g.ignorableWhitespace(content)
+
+    def processingInstruction(self, target, data):
+        for g in self.generators:
+            g.processingInstruction(target, data)
+
+    def endElement(self, name: str) -> None:
+        for g in self.generators:
+            g.endElement(name)
+        if name == 'path' and self.siblings:
+            g = self.generators[0]
+            for attrs in self.siblings:
+                g.startElement(name, AttributesImpl(attrs))
+                g.endElement(name)
+            self.siblings = []
+
+    def startElement(self, name: str, attrs: AttributesImpl) -> None:
+        index = self.index
+        if name == 'path':
+            self.index += 1
+        if name != 'path' or (self.target_indexes and index not in self.target_indexes):
+            for g in self.generators:
+                g.startElement(name, attrs)
+            return
+
+        _attrs = {}
+        d = ''
+        transforms = []
+        for k in attrs.keys():
+            if k == 'd':
+                d = attrs[k]
+            elif k == 'transform':
+                transforms = myparser.transforms(attrs[k])
+            else:
+                _attrs[k] = attrs[k]
+
+        transform = None
+        if transforms:
+            if self.collapse_transform_attribute:
+                transform = Transform.concat(transforms)
+            else:
+                _attrs['transform'] = ' '.join([str(t) for t in transforms])
+
+        pd = normalized_pathdata(
+            d,
+            transform=transform,
+            repr_relative=self.repr_relative,
+            collapse_hv_lineto=self.collapse_hv_lineto,
+            collapse_elliptical_arc=self.collapse_elliptical_arc,
+            allow_implicit_lineto=self.allow_implicit_lineto,
+            fit_curves=self.fit_curves,
+        )
+        if self.clip_rect is not None:
+            pd.clip_to_rect(self.clip_rect, split=self.clip_split)
+        ds = level_strings(pd, self.levels, use_shorthand=self.use_shorthand)
+
+        if len(self.generators) > 1:
+            for g, level_d in zip(self.generators, ds):
+                g.startElement(name, AttributesImpl({**_attrs, 'd': level_d}))
+            return
+
+        variants = [{**_attrs, 'd': level_d, 'data-lod': str(i)} for i, level_d in enumerate(ds)]
+        if 'id' in _attrs:
+            # ids stay unique
+            for i, variant in enumerate(variants[1:], 1):
+                variant['id'] = f"{_attrs['id']}-lod{i}"
+        self.generators[0].startElement(name, AttributesImpl(variants[0]))
+        self.siblings = variants[1:]
+
+
+class PathSpoolHandler(ContentHandler):
+    """
+    Spool the path-elements into a `svgpdtools.tile.Spool`, applying their
+    transform attributes and those of their ancestors to the pathdata. The
+    inherited properties set by the ancestors are written onto each path
+    as presentation attributes, with the stroke lengths scaled by the
+    transforms. The contents of template elements such as defs and
+    clipPath are not drawn, so they are not spooled. `extent` is the viewBox
+    of the outermost svg element.
+    """
+    def __init__(self, *,
+                 spool: Spool,
+                 target_indexes: list[int]) -> None:
+        self.spool = spool
+        self.extent: Optional[Rect] = None
+        self._has_root = False
+        self.ctms = _CTMStack()
+        # the inherited properties of the open elements
+        self._properties: list[dict[str, str]] = [{}]
+
+        self.delegate = None
+
+        self.target_indexes = target_indexes
+        self.index = 0
+        super().__init__()
+
+    def startElement(self, name: str, attrs: AttributesImpl) -> None:
+        if name == 'svg' and not self._has_root:
+            self._has_root = True
+            self.extent = _view_box(attrs)
+        parent_ctm = self.ctms.push_element(name, attrs)
+        properties = {**self._properties[-1], **_inherited_properties(attrs)}
+        self._properties.append(properties)
+
+        if name != 'path':
+            return
+
+        index = self.index
+        self.index += 1
+        if self.target_indexes and index not in self.target_indexes:
+            return
+
+        if self.ctms.levels[-1].template:
+            return
+
+        pd, _attrs = _baked_pathdata(attrs, parent_ctm)
+        self.spool.add(pd, _with_properties(_attrs, properties, self.ctms.levels[-1].ctm))
+
+    def endElement(self, name: str) -> None:
+        self.ctms.pop()
+        self._properties.pop()
+
+
+class PathMeshHandler(ContentHandler):
+    """
+    Triangulate the path-elements, applying their transform attributes,
+    those of their ancestors and then `transform` to the pathdata. `meshes`
+    is the `(vertices, indices)` of each drawn path-element, in the
+    document order; the contents of template elements such as defs and
+    clipPath are skipped. The fill rule is `fill_rule`, or else the
+    inherited fill-rule property.
+    """
+    def __init__(self, *,
+                 target_indexes: list[int],
+                 transform: Optional[Transform] = None,
+                 tolerance: float = .1,
+                 fill_rule: Optional[FillRule] = None) -> None:
+        self.meshes: list[Mesh] = []
+        self.transform = transform
+        self.tolerance = tolerance
+        self.fill_rule = fill_rule
+        self._fill_rules: list[FillRule] = ['nonzero']
+        self.ctms = _CTMStack()
+
+        self.delegate = None
+
+        self.target_indexes = target_indexes
+        self.index = 0
+        super().__init__()
+
+    def endElement(self, name: str) -> None:
+        self._fill_rules.pop()
+        self.ctms.pop()
+
+    def startElement(self, name: str, attrs: AttributesImpl) -> None:
+        fill_rule = _fill_rule(attrs) or self._fill_rules[-1]
+        self._fill_rules.append(fill_rule)
+        parent_ctm = self.ctms.push_element(name, attrs)
+        if name != 'path':
+            return
+
+        index = self.index
+        self.index += 1
+        if self.target_indexes and index not in self.target_indexes:
+            return
+
+        if self.ctms.levels[-1].template:
+            return
+
+        pd, _ = _baked_pathdata(attrs, parent_ctm)
+        if self.transform is not None:
+            pd.transform(self.transform, noexception=True, collapse_elliptical_arc=True)
+        self.meshes.append(pd.tessellate(self.tolerance, self.fill_rule or fill_rule))
+
+
+class PathExportHandler(ContentHandler):
+    """
+    Append the pathdata of the path-elements to `svgpdtools.columnar.PathColumns`
+    with their element indexes. With `collapse_transform_attribute`, the
+    transform attributes of the path-elements and their ancestors are
+    applied to the pathdata.
+    """
+    def __init__(self, *,
+                 columns: PathColumns,
+                 target_indexes: list[int],
+                 collapse_transform_attribute=False) -> None:
+        self.columns = columns
+        self.collapse_transform_attribute = collapse_transform_attribute
+        self.ctms = _CTMStack() if collapse_transform_attribute else None
+
+        self.delegate = None
+
+        self.target_indexes = target_indexes
+        self.index = 0
+        super().__init__()
+
+    def endElement(self, name: str) -> None:
+        if self.ctms is not None:
+            self.ctms.pop()
+
+    def startElement(self, name: str, attrs: AttributesImpl) -> None:
+        parent_ctm = None
+        if self.ctms is not None:
+            parent_ctm = self.ctms.push_element(name, attrs)
+        if name != 'path':
+            return
+
+        index = self.index
+        self.index += 1
+        if self.target_indexes and index not in self.target_indexes:
+            return
+
+        if self.collapse_transform_attribute:
+            pd, _ = _baked_pathdata(attrs, parent_ctm)
+        else:
+            pd = myparser.pathdata(attrs.get('d', ''))
+        self.columns.append(pd, index)
+
+
+class PathCorpusHandler(ContentHandler):
+    """
+    Add the pathdata strings of the path-elements to a
+    `svgpdtools.corpus.CorpusBuilder` with their element indexes.
+    """
+    def __init__(self, *,
+                 builder: CorpusBuilder,
+                 target_indexes: list[int]) -> None:
+        self.builder = builder
+
+        self.delegate = None
+
+        self.target_indexes = target_indexes
+        self.index = 0
+        super().__init__()
+
+    def startElement(self, name: str, attrs: AttributesImpl) -> None:
+        if name != 'path':
+            return
+
+        index = self.index
+        self.index += 1
+        if self.target_indexes and index not in self.target_indexes:
+            return
+        self.builder.add(attrs.get('d', ''), index)
+
+
+# elements whose transforms are applied to their descendants
+_GROUP_ELEMENTS = frozenset(('g', 'a', 'switch'))
+# elements whose contents are drawn only where they are referred
+_TEMPLATE_ELEMENTS = frozenset(('defs', 'symbol', 'clipPath', 'mask', 'pattern', 'marker',
+                                'linearGradient', 'radialGradient', 'filter'))
+
+
+@dataclass
+class _CTMLevel:
+    # the CTM of the children, None for the identity
+    ctm: Optional[Transform]
+    # in the contents of a template element
+    template: bool = False
+    # wrapped in a group written for the CTM of the parent
+    wrapped: bool = False
+    ctm_repr: Optional[str] = None
+
+
+class _CTMStack:
+    """
+    Current transformation matrices (CTM) of the open elements. Each level
+    keeps the CTM of its children composed once, and its transform
+    function once written, so all descendants of a group share them.
+    """
+    def __init__(self) -> None:
+        self.levels: list[_CTMLevel] = []
+
+    @property
+    def top(self) -> Optional[_CTMLevel]:
+        return self.levels[-1] if self.levels else None
+
+    def push(self, ctm: Optional[Transform], *, template=False, wrapped=False) -> None:
+        self.levels.append(_CTMLevel(ctm, template, wrapped))
+
+    def pop(self) -> _CTMLevel:
+        return self.levels.pop()
+
+    def push_element(self, name: str, attrs: AttributesImpl) -> Optional[Transform]:
+        """
+        Push the CTM of the children of an element, its transform attribute
+        composed onto the CTM of its parent, and return the CTM of the
+        parent. The level is marked as a template in a template element.
+        """
+        top = self.top
+        parent = None if top is None else top.ctm
+        ctm = parent
+        own = attrs.get('transform')
+        if own is not None:
+            t = Transform.concat(myparser.transforms(own))
+            ctm = t if ctm is None else ctm * t
+        template = top is not None and (top.template or name in _TEMPLATE_ELEMENTS)
+        self.push(ctm, template=template)
+        return parent
+
+    def ctm_repr(self, depth: int = -1) -> str:
+        """
+        Return the CTM of a level as a transform function.
+        """
+        level = self.levels[depth]
+        if level.ctm_repr is None:
+            t = level.ctm
+            assert t is not None
+            level.ctm_repr = str(Transform.matrix(t.a, t.b, t.c, t.d, t.e, t.f))
+        return level.ctm_repr
+
+    def with_ctm(self, attrs: AttributesImpl) -> AttributesImpl:
+        """
+        Return the attributes of the element of the top level with the CTM
+        of its parent prepended to the transform attribute.
+        """
+        if self.levels[-2].ctm is None:
+            return attrs
+        _attrs = {k: attrs[k] for k in attrs.keys()}
+        own = _attrs.get('transform')
+        ctm = self.ctm_repr(-2)
+        _attrs['transform'] = ctm if own is None else f'{ctm} {own}'
+        return AttributesImpl(_attrs)
+
+
+def _refers_url(attrs: AttributesImpl) -> bool:
+    """
+    Return True if an element refers to a clip path, a mask, a filter, a
+    marker or a paint server, which are drawn in its coordinates.
+    """
+    return any(attrs.get(k, 'none') != 'none' for k in ('clip-path', 'mask', 'filter')) or \
+        any('url(' in attrs[k] for k in attrs.keys())
+
+
+def _baked_pathdata(attrs: AttributesImpl,
+                    ctm: Optional[Transform] = None) -> tuple[PathData, dict[str, str]]:
+    """
+    Return the pathdata of a path-element with its transform attribute
+    applied, after it the CTM of its parent if given, and the other
+    attributes.
+    """
+    _attrs = {}
+    d = ''
+    transforms = [] if ctm is None else [ctm]
+    for k in attrs.keys():
+        if k == 'd':
+            d = attrs[k]
+        elif k == 'transform':
+            transforms.extend(myparser.transforms(attrs[k]))
+        else:
+            _attrs[k] = attrs[k]
+
+    pd = myparser.pathdata(d)
+    if transforms:
+        pd.transform(Transform.concat(transforms), noexception=True, collapse_elliptical_arc=True)
+    return pd, _attrs
+
+
+# the inherited properties which affect the rendering of a path
+_INHERITED_PROPERTIES = frozenset((
+    'clip-rule', 'color', 'fill', 'fill-opacity', 'fill-rule', 'marker-start', 'marker-mid',
+    'marker-end', 'paint-order', 'shape-rendering', 'stroke', 'stroke-dasharray',
+    'stroke-dashoffset', 'stroke-linecap', 'stroke-linejoin', 'stroke-miterlimit',
+    'stroke-opacity', 'stroke-width', 'visibility',
+))
+
+
+def _inherited_properties(attrs: AttributesImpl) -> dict[str, str]:
+    """
+    Return the inherited properties set by an element, from its
+    presentation attributes and then its style attribute.
+    """
+    properties = {k: attrs[k].strip() for k in attrs.keys() if k in _INHERITED_PROPERTIES}
+    for declaration in attrs.get('style', '').split(';'):
+        name, _, value = declaration.partition(':')
+        if name.strip() in _INHERITED_PROPERTIES:
+            properties[name.strip()] = value.strip()
+    return {k: v for k, v in properties.items() if v and v != 'inherit'}
+
+
+def _with_properties(attrs: dict[str, str], properties: dict[str, str],
+                     ctm: Optional[Transform]) -> dict[str, str]:
+    """
+    Return the attributes of a path-element with the inherited properties
+    as presentation attributes, and without them in its style attribute.
+    The stroke lengths are scaled by `ctm` applied to the pathdata.
+    """
+    _attrs = {k: v for k, v in attrs.items() if k not in _INHERITED_PROPERTIES and k != 'style'}
+    style = ';'.join(declaration for declaration in attrs.get('style', '').split(';')
+                     if declaration.strip() and declaration.partition(':')[0].strip() not in _INHERITED_PROPERTIES)
+    if style:
+        _attrs['style'] = style
+
+    properties = dict(properties)
+    scale = 1. if ctm is None else ctm.scale_factor()
+    if scale != 1.:
+        if properties.get('stroke', 'none') != 'none':
+            properties.setdefault('stroke-width', '1')
+        for k in ('stroke-width', 'stroke-dasharray', 'stroke-dashoffset'):
+            if k in properties:
+                properties[k] = _scaled_lengths(properties[k], scale)
+    _attrs.update(properties)
+    return _attrs
+
+
+def _scaled_lengths(value: str, scale: float) -> str:
+    """
+    Return a length or a list of lengths in user units multiplied by
+    `scale`. A value with other units is returned as it is.
+    """
+    try:
+        lengths = [float(re.sub(r'px$', '', v)) for v in re.split(r'[\s,]+', value.strip())]
+    except ValueError:
+        return value
+    return ' '.join(number_repr(v * scale) for v in lengths)
+
+
+def _fill_rule(attrs: AttributesImpl) -> Optional[FillRule]:
+    """
+    Return the fill-rule of an element, from its style attribute or its
+    presentation attribute, or None if it is not set or is inherited.
+    """
+    values = [attrs.get('fill-rule', '')]
+    for declaration in attrs.get('style', '').split(';'):
+        name, _, value = declaration.partition(':')
+        if name.strip() == 'fill-rule':
+            values.insert(0, value)
+    for value in values:
+        value = value.strip()
+        if value == 'nonzero' or value == 'evenodd':
+            return value
+    return None
+
 
 class PathViewHandler(ContentHandler):
     def __init__(self, *,
                  target_indexes: list[int],
                  repr_relative: bool,
-                 repr_absolute: bool,) -> None:
+                 repr_absolute: bool,
+                 show_bbox: bool = False) -> None:
         self.repr_relative = repr_relative
         self.repr_absolute = repr_absolute
+        self.show_bbox = show_bbox
         
         self.delegate = None
 
@@ -429,7 +1457,10 @@ class PathViewHandler(ContentHandler):
 %if transform:
     transform="${transform}"
 %endif
-    d="${d}"/>''')
+    d="${d}"/>
+%if bbox:
+<!-- bbox: ${bbox} -->
+%endif''')
 
         import subprocess
         tput_result = subprocess.run(['tput', 'cols'], capture_output=True, text=True)
@@ -452,6 +1483,8 @@ class PathViewHandler(ContentHandler):
         for k in attrs.keys():
             if k == 'd':
                 _attrs['d'] = self._boxed_pd(attrs[k])
+                if self.show_bbox and (bbox := myparser.pathdata(attrs[k]).bbox()):
+                    _attrs['bbox'] = str(bbox)
             elif k == 'transform':
                 _attrs[k] = self._boxed_transforms(attrs[k])
             else:
@@ -0,0 +1,184 @@
+"""
+Tessellation of filled pathdata into triangles.
+
+The pathdata is flattened by `svgpdtools.polyline.flatten`, and every
+subpath is closed for filling, as the SVG does. The plane is cut into
+horizontal slabs at the y coordinates of the vertices and of the crossings
+of the edges, so within a slab the edges never cross and are ordered by
+x. Sweeping a slab from left to right, the winding number after each edge
+tells whether the span up to the next edge is filled, with either fill
+rule; holes and self-intersections need no special case. A filled span
+is a trapezoid between two edges, and it is extended downwards for as long
+as the same two edges bound it, so a convex polygon is one trapezoid per
+pair of its vertices' y coordinates at most.
+
+A trapezoid becomes two triangles, or one when a side shrinks to a point.
+The results are packed for GPU buffers: `vertices` is an `array('f')` of
+`x, y` pairs (float32), shared by the triangles meeting at the same point,
+and `indices` is an `array('I')` of three vertex indexes per triangle
+(uint32), counter-clockwise in a y-down coordinate system.
+"""
+from __future__ import annotations
+from array import array
+from collections.abc import Iterable, Sequence
+
+from .command import Command
+from .polyline import Polyline, flatten
+from .winding import FillRule, is_inside
+
+
+Mesh = tuple[array, array]
+
+# (top y, bottom y, x at top, x at bottom, direction)
+_Edge = tuple[float, float, float, float, int]
+
+
+def tessellate(cmds: Sequence[Command], tolerance: float = .1,
+               fill_rule: FillRule = 'nonzero') -> Mesh:
+    """
+    Return `(vertices, indices)` of the triangles filling commands, whose
+    curves are flattened within `tolerance`.
+    """
+    return tessellate_polylines(flatten(cmds, tolerance), fill_rule)
+
+
+def tessellate_polylines(polyline: Polyline, fill_rule: FillRule = 'nonzero') -> Mesh:
+    """
+    Return `(vertices, indices)` of the triangles filling polylines of
+    `(coords, offsets)` (see `svgpdtools.polyline`).
+    """
+    is_inside(0, fill_rule)
+    mesh = _MeshBuilder()
+    edges = sorted(_edges(*polyline))
+    if not edges:
+        return mesh.vertices, mesh.indices
+
+    ys = sorted({y for e in edges for y in e[:2]})
+    active: list[int] = []
+    k = 0
+    # the trapezoids still open: (left edge, right edge) -> top y
+    opened: dict[tuple[int, int], float] = {}
+    for y0, y1 in zip(ys, ys[1:]):
+        active = [i for i in active if edges[i][1] > y0]
+        while k < len(edges) and edges[k][0] <= y0:
+            active.append(k)
+            k += 1
+        while y0 < y1:
+            ym = _first_crossing(edges, active, y0, y1)
+            spans = _filled_spans(edges, active, y0, ym, fill_rule)
+            for pair in [p for p in opened if p not in spans]:
+                mesh.add_trapezoid(edges[pair[0]], edges[pair[1]], opened.pop(pair), y0)
+            for pair in spans:
+                opened.setdefault(pair, y0)
+            y0 = ym
+    for (left, right), top in opened.items():
+        mesh.add_trapezoid(edges[left], edges[right], top, ys[-1])
+    return mesh.vertices, mesh.indices
+
+
+def _edges(coords: Sequence[float], offsets: Sequence[int]) -> list[_Edge]:
+    edges: list[_Edge] = []
+    for i in range(len(offsets) - 1):
+        start, end = offsets[i], offsets[i+1]
+        if end - start < 2:
+            continue
+        px, py = coords[2*end-2], coords[2*end-1]
+        for j in range(start, end):
+            x, y = coords[2*j], coords[2*j+1]
+            if py < y:
+                edges.append((py, y, px, x, 1))
+            elif y < py:
+                edges.append((y, py, x, px, -1))
+            px, py = x, y
+    return edges
+
+
+def _x_at(e: _Edge, y: float) -> float:
+    y0, y1, x0, x1, _ = e
+    if y == y0:
+        return x0
+    if y == y1:
+        return x1
+    return x0 + (x1 - x0) * (y - y0) / (y1 - y0)
+
+
+def _first_crossing(edges: list[_Edge], active: list[int], y0: float, y1: float) -> float:
+    # the lowest y in (y0, y1) where two edges cross, or y1; two edges
+    # cross in a slab only if they are out of order at its bottom, and
+    # then some neighbours in the order at its top are too
+    xs = sorted((_x_at(edges[i], y0), _x_at(edges[i], y1)) for i in active)
+    ym = y1
+    k = 0
+    while k < len(xs) - 1:
+        (ta, ba), (tb, bb) = xs[k], xs[k+1]
+        if ba > bb:
+            # the gap tb - ta closes linearly to ba - bb < 0 at y1
+            y = y0 + (y1 - y0) * (tb - ta) / ((tb - ta) + (ba - bb))
+            if y <= y0:
+                # they meet at y0 within the rounding errors, so they are
+                # in the order below it
+                xs[k], xs[k+1] = xs[k+1], xs[k]
+                k = max(k - 1, 0)
+                continue
+            ym = min(ym, y)
+        k += 1
+    return ym
+
+
+def _filled_spans(edges: list[_Edge], active: list[int], y0: float, y1: float,
+                  fill_rule: FillRule) -> set[tuple[int, int]]:
+    ym = (y0 + y1) / 2
+    order = sorted(active, key=lambda i: _x_at(edges[i], ym))
+    spans = set()
+    w = 0
+    for a, b in zip(order, order[1:]):
+        w += edges[a][4]
+        if is_inside(w, fill_rule):
+            spans.add((a, b))
+    return spans
+
+
+class _MeshBuilder:
+    def __init__(self) -> None:
+        self.vertices = array('f')
+        self.indices = array('I')
+        self._ids: dict[tuple[float, float], int] = {}
+
+    def vertex(self, x: float, y: float) -> int:
+        i = self._ids.get((x, y))
+        if i is None:
+            i = self._ids[x, y] = len(self.vertices) // 2
+            self.vertices.extend((x, y))
+        return i
+
+    def add_trapezoid(self, left: _Edge, right: _Edge, y0: float, y1: float) -> None:
+        if y0 >= y1:
+            return
+        tl, tr = _x_at(left, y0), _x_at(right, y0)
+        bl, br = _x_at(left, y1), _x_at(right, y1)
+        if tl < tr:
+            a, b, c = self.vertex(tl, y0), self.vertex(bl, y1), self.vertex(tr, y0)
+            self.indices.extend((a, b, c))
+            if bl < br:
+                self.indices.extend((c, b, self.vertex(br, y1)))
+        elif bl < br:
+            self.indices.extend((self.vertex(tl, y0), self.vertex(bl, y1), self.vertex(br, y1)))
+
+
+def merge_meshes(meshes: Iterable[Mesh]) -> tuple[array, array, array]:
+    """
+    Pack many meshes into one buffer. Return `(vertices, indices,
+    triangle_offsets)`, where the indices of each mesh are shifted to its
+    vertices, and the triangles of the mesh `i` are
+    `indices[triangle_offsets[i]*3:triangle_offsets[i+1]*3]`.
+    """
+    vertices = array('f')
+    indices = array('I')
+    offsets = array('q', [0])
+    for vs, ids in meshes:
+        base = len(vertices) // 2
+        vertices.extend(vs)
+        indices.extend(i + base for i in ids)
+        offsets.append(len(indices) // 3)
+    return vertices, indices, offsets
+
@@ -0,0 +1,288 @@
+"""
+Tiling of a document into a z/x/y grid of small SVG documents.
+
+Paths are spooled into a temporary file as `svgpdtools.wire` blobs
+followed by their attributes, and only the offsets and bounding boxes are
+kept in memory, so a huge document is never held as a whole. The grid
+covers a square from the top-left corner of the extent; at zoom `z` its
+side is divided into 2**z tiles, and `x`, `y` count from that corner.
+
+A path goes to each tile its bounding box intersects, and is clipped
+there by `PathData.clip_to_rect`. The subpaths smaller than a pixel of
+the tile are dropped by `PathData.cull_subpaths`, and the precision is
+lowered to what the tile size shows. Tiles without any path are not
+written. The tiles are written by a pool of workers, each reading the
+paths of its tiles back from the spool file.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Optional, Union
+from array import array
+from xml.sax.saxutils import XMLGenerator
+from xml.sax.xmlreader import AttributesImpl
+import json, math, os, pathlib, struct, tempfile
+
+from .pathdata import PathData
+from .graphics import Rect
+from .batch import ExecutorKind, executor_pool
+from .utils import current_precision, precision_for_scale, temporary_precision
+from . import wire
+
+
+SVG_NAMESPACE = 'http://www.w3.org/2000/svg'
+
+# the size of a blob and of the attributes following it
+_RECORD = struct.Struct('<II')
+
+TileKey = tuple[int, int, int]
+
+
+class Spool:
+    """
+    Append-only file of pathdata blobs and attributes, with the offset and
+    the bounding box of each path in memory. Empty pathdata are not
+    spooled. The file is removed by `close()`.
+    """
+    def __init__(self, dir: Union[str, os.PathLike, None] = None) -> None:
+        fd, name = tempfile.mkstemp(prefix='svgpdtools-', suffix='.spool', dir=dir)
+        self.path = pathlib.Path(name)
+        self._file = os.fdopen(fd, 'w+b')
+        self.offsets = array('q')
+        # min_x, min_y, max_x, max_y of each path
+        self.boxes = array('d')
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __enter__(self) -> Spool:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add(self, pd: PathData, attrs: dict[str, str]) -> Optional[int]:
+        """
+        Spool a pathdata with the other attributes of its element, and
+        return its index, or None if it has no bounding box.
+        """
+        bbox = pd.bbox()
+        if bbox is None:
+            return None
+
+        blob = wire.dumps(pd)
+        meta = json.dumps(attrs, ensure_ascii=False).encode('utf-8')
+        self.offsets.append(self._file.seek(0, os.SEEK_END))
+        self._file.write(_RECORD.pack(len(blob), len(meta)))
+        self._file.write(blob)
+        self._file.write(meta)
+        self.boxes.extend((bbox.min_x, bbox.min_y, bbox.max_x, bbox.max_y))
+        return len(self.offsets) - 1
+
+    def bbox(self, index: int) -> Rect:
+        return Rect(*self.boxes[4*index:4*index+4])
+
+    def extent(self) -> Optional[Rect]:
+        """
+        Return the union of the bounding boxes, or None if it is empty.
+        """
+        if not self.offsets:
+            return None
+        bs = self.boxes
+        return Rect(min(bs[0::4]), min(bs[1::4]), max(bs[2::4]), max(bs[3::4]))
+
+    def read(self, index: int) -> tuple[PathData, dict[str, str]]:
+        """
+        Return the pathdata and the attributes of a spooled path.
+        """
+        self._file.flush()
+        return _read_record(self._file, self.offsets[index])
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+            self.path.unlink(missing_ok=True)
+
+
+def tile_rect(extent: Rect, z: int, x: int, y: int) -> Rect:
+    """
+    Return the rectangle of the tile `z/x/y` of the grid over `extent`.
+    """
+    side = _tile_side(extent, z)
+    min_x = extent.min_x + x * side
+    min_y = extent.min_y + y * side
+    return Rect(min_x, min_y, min_x + side, min_y + side)
+
+
+def tiles_of(extent: Rect, z: int, box: Rect) -> Iterator[tuple[int, int]]:
+    """
+    Iterate `(x, y)` of the tiles at zoom `z` intersecting `box`.
+    """
+    side = _tile_side(extent, z)
+    n = 1 << z
+    if not box.intersects(tile_rect(extent, 0, 0, 0)):
+        return
+
+    def index(v: float, origin: float) -> int:
+        return min(max(math.floor((v - origin) / side), 0), n - 1)
+
+    x0, x1 = index(box.min_x, extent.min_x), index(box.max_x, extent.min_x)
+    y0, y1 = index(box.min_y, extent.min_y), index(box.max_y, extent.min_y)
+    for y in range(y0, y1 + 1):
+        for x in range(x0, x1 + 1):
+            yield x, y
+
+
+def tile_path(out_dir: Union[str, os.PathLike], z: int, x: int, y: int) -> pathlib.Path:
+    return pathlib.Path(out_dir) / str(z) / str(x) / f'{y}.svg'
+
+
+def write_tiles(spool: Spool, out_dir: Union[str, os.PathLike], zooms: Iterable[int], *,
+                extent: Optional[Rect] = None,
+                tile_size: int = 256,
+                split=False,
+                cull_area: float = .25,
+                executor: ExecutorKind = 'auto',
+                max_workers: Optional[int] = None,
+                precision: Optional[int] = None) -> list[pathlib.Path]:
+    """
+    Write the tiles of the spooled paths as `<out_dir>/<z>/<x>/<y>.svg`,
+    and return the paths of the written files.
+
+    :param extent: the rectangle divided into tiles, e.g. the viewBox of
+        the document. (default the union of the bounding boxes)
+    :param tile_size: the width and height of a tile in pixels.
+    :param split: if True, split the segments at the tile boundary (see
+        `PathData.clip_to_rect`). (default False)
+    :param cull_area: drop subpaths covering less than this area in square
+        pixels of the tile.
+    :param executor: 'thread', 'process' or 'serial'. 'auto' uses threads
+        on a free-threaded build and processes otherwise. (default 'auto')
+    :param max_workers: the number of workers. (default `os.cpu_count()`)
+    :param precision: the highest precision for formatting. (default the
+        current precision of the calling thread)
+    """
+    if tile_size <= 0:
+        raise ValueError(f'tile_size should be positive: {tile_size}')
+    zooms = sorted(set(zooms))
+    if any(z < 0 for z in zooms):
+        raise ValueError(f'zoom levels should not be negative: {zooms}')
+
+    if extent is None:
+        extent = spool.extent()
+    if extent is None or not zooms:
+        return []
+    spool.flush()
+
+    options = _Options(
+        spool_path = str(spool.path),
+        out_dir = str(out_dir),
+        tile_size = tile_size,
+        split = split,
+        cull_area = cull_area,
+        precision = current_precision() if precision is None else precision,
+    )
+    jobs: list[_Job] = []
+    for z in zooms:
+        buckets: dict[tuple[int, int], array] = {}
+        for i in range(len(spool)):
+            for xy in tiles_of(extent, z, spool.bbox(i)):
+                bucket = buckets.get(xy)
+                if bucket is None:
+                    bucket = buckets[xy] = array('q')
+                bucket.append(spool.offsets[i])
+        for (x, y), offsets in sorted(buckets.items()):
+            jobs.append(((z, x, y), _as_tuple(tile_rect(extent, z, x, y)), offsets))
+    if not jobs:
+        return []
+
+    pool, workers = executor_pool(executor, max_workers, len(jobs))
+    if pool is None:
+        return _write_chunk(jobs, options)
+
+    chunksize = max(1, len(jobs) // (workers * 4))
+    chunks = [jobs[i:i+chunksize] for i in range(0, len(jobs), chunksize)]
+    results: list[pathlib.Path] = []
+    with pool:
+        for rs in pool.map(_write_chunk, chunks, [options] * len(chunks)):
+            results.extend(rs)
+    return results
+
+
+@dataclass(frozen=True)
+class _Options:
+    spool_path: str
+    out_dir: str
+    tile_size: int
+    split: bool
+    cull_area: float
+    precision: int
+
+
+# (z, x, y), the rectangle of the tile and the offsets of its paths
+_Job = tuple[TileKey, tuple[float, float, float, float], Sequence[int]]
+
+
+def _tile_side(extent: Rect, z: int) -> float:
+    side = max(extent.width, extent.height) / (1 << z)
+    return side if side > 0 else 1.
+
+
+def _as_tuple(rect: Rect) -> tuple[float, float, float, float]:
+    return rect.min_x, rect.min_y, rect.max_x, rect.max_y
+
+
+def _read_record(f, offset: int) -> tuple[PathData, dict[str, str]]:
+    f.seek(offset)
+    blob_size, meta_size = _RECORD.unpack(f.read(_RECORD.size))
+    pd = wire.loads(f.read(blob_size))
+    attrs = json.loads(f.read(meta_size).decode('utf-8'))
+    return pd, attrs
+
+
+def _write_chunk(jobs: Sequence[_Job], options: _Options) -> list[pathlib.Path]:
+    results = []
+    with open(options.spool_path, 'rb') as f:
+        for (z, x, y), bounds, offsets in jobs:
+            rect = Rect(*bounds)
+            scale = options.tile_size / rect.width
+            elements = []
+            with temporary_precision(min(options.precision, precision_for_scale(scale))):
+                for offset in offsets:
+                    pd, attrs = _read_record(f, offset)
+                    pd.clip_to_rect(rect, split=options.split)
+                    pd.cull_subpaths(options.cull_area, scale=scale)
+                    if pd.bbox() is not None:
+                        elements.append({**attrs, 'd': str(pd)})
+                view_box = repr(rect)
+            if not elements:
+                continue
+
+            path = tile_path(options.out_dir, z, x, y)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as out:
+                _write_document(out, view_box, options.tile_size, elements)
+            results.append(path)
+    return results
+
+
+def _write_document(out, view_box: str, tile_size: int, elements: list[dict[str, str]]) -> None:
+    g = XMLGenerator(out, encoding='utf-8', short_empty_elements=True)
+    g.startDocument()
+    g.startElement('svg', AttributesImpl({
+        'xmlns': SVG_NAMESPACE,
+        'viewBox': view_box,
+        'width': str(tile_size),
+        'height': str(tile_size),
+    }))
+    for attrs in elements:
+        g.characters('\n')
+        g.startElement('path', AttributesImpl(attrs))
+        g.endElement('path')
+    g.characters('\n')
+    g.endElement('svg')
+    g.endDocument()
+    out.write('\n')
@@ -85,6 +85,14 @@ class Transform:
         f = self.b * other.e + self.d * other.f + self.f
         return Transform(a, b, c, d, e, f)
 
+    def scale_factor(self) -> float:
+        """
+        Return the geometric mean of the scales of this transform, the
+        square root of the absolute determinant. Areas are scaled by its
+        square.
+        """
+        return math.sqrt(abs(self.a * self.d - self.b * self.c))
+
     def inversed(self) -> Transform:
         det = self.a * self.d - self.b * self.c
         assert not math.isclose(det, 0, abs_tol=1e-7)
@@ -100,7 +108,7 @@ class Transform:
     @staticmethod
     def matrix(a: float, b: float, c: float, d: float, e: float, f: float) -> Transform:
         t = Transform(a, b, c, d, e, f)
-        t._org_repr_form = _OrgReprForm('matrix', list(locals().values()))
+        t._org_repr_form = _OrgReprForm('matrix', [a, b, c, d, e, f])
         return t
     
     @staticmethod
@@ -1,5 +1,5 @@
-from typing import Protocol
-import math
+from typing import Protocol, Literal, Optional
+import math, threading
 
 
 class PointLike(Protocol):
@@ -9,12 +9,60 @@ class PointLike(Protocol):
 
 DEFAULT_PRECISION = 6
 _precision_ = DEFAULT_PRECISION
+_local = threading.local()
 
 def precision(value: int) -> None:
     assert value >= 0
     global _precision_
     _precision_ = value
-    
+
+def current_precision() -> int:
+    """
+    Return the precision used by the calling thread. A value set by
+    `temporary_precision` takes priority over the process-wide value set by
+    `precision(int)`.
+    """
+    return getattr(_local, 'precision', _precision_)
+
+def precision_epsilon() -> float:
+    """
+    Return half a unit of the last digit of the current precision. Numbers
+    closer than this may be formatted to the same string.
+    """
+    return .5 * 10 ** -current_precision()
+
+
+def precision_for_scale(scale: float, max_error: float = 1 / 16) -> int:
+    """
+    Return the least precision whose rounding errors, scaled by `scale`
+    (e.g. pixels per user unit), are within `max_error`.
+    """
+    assert scale > 0 and max_error > 0
+    return max(0, math.ceil(math.log10(.5 * scale / max_error)))
+
+
+class temporary_precision:
+    """
+    Context manager to override the precision only in the current thread.
+    Threads formatting pathdata concurrently should use this rather than
+    `precision(int)`.
+    """
+    def __init__(self, value: int) -> None:
+        assert value >= 0
+        self.value = value
+        self._old_value: Optional[int]
+
+    def __enter__(self) -> None:
+        self._old_value = getattr(_local, 'precision', None)
+        _local.precision = self.value
+
+    def __exit__(self, *exc) -> Literal[False]:
+        if self._old_value is None:
+            del _local.precision
+        else:
+            _local.precision = self._old_value
+        return False
+
 
 
 def number_repr(num: float) -> str:
@@ -24,22 +72,23 @@ def number_repr(num: float) -> str:
     formatting, this function uses the fixed-point notation and the
     precision. Then trimming trailing zeros after the decimal point.
     """
-    if _precision_ == 0:
+    prec = current_precision()
+    if prec == 0:
         return str(round(num))
 
     s = str(num)
-    pos = -1
-    for c in s:
-        if pos > -1 and c.isnumeric():
-            pos += 1
-            continue
-        
-        if c == '.':
-            pos = 0
-        
-    if pos >= _precision_:
-        s = (f'{{:.{_precision_}f}}').format(num)
-        
+    # `pos` is the number of digits after the decimal point
+    pos = s.find('.')
+    if pos > -1:
+        frac = s[pos+1:]
+        if 'e' in frac:
+            pos = sum(1 for c in frac if c.isnumeric())
+        else:
+            pos = len(frac)
+
+    if pos >= prec:
+        s = f'{num:.{prec}f}'
+
     if s.find('.') > -1:
         s = s.rstrip('0')
         if s[-1] == '.':
@@ -0,0 +1,220 @@
+"""
+Point-in-path tests by winding numbers.
+
+Every subpath is closed for filling, as the SVG does. The segments are
+split into pieces monotonic in y at the extrema of their y coordinates,
+which are solved analytically (beziers from the roots of their
+derivatives, elliptical arcs from their center parameterization). A
+horizontal ray from a point towards +x crosses a piece at most once; a
+piece counts +1 when it goes down (y increasing) and -1 when it goes up,
+and covers the half-open range `[min_y, max_y)`, so a vertex shared by
+two pieces is counted once.
+
+A piece is rejected by the bounding box of its segment. Only a piece
+whose box straddles the point needs the crossing itself, which is exact
+for lines and found by bisection for curves.
+
+`contains_many` sorts the query points by y, so each piece visits only
+the points in its y range. With NumPy, the crossings of a piece are
+computed for all of those points at once.
+"""
+from __future__ import annotations
+from bisect import bisect_left
+from collections.abc import Iterable, Sequence
+from typing import Any, Literal
+import math
+
+from .command import Command
+from .segments import Segment, iter_segments, prepared_segment, segment_point, quadratic_roots
+from .bounds import segment_bbox
+
+
+FillRule = Literal['nonzero', 'evenodd']
+
+# (direction, min_y, max_y, min_x, max_x, prepared segment, t0, t1,
+#  x0, y0, x1, y1) where (x0, y0) and (x1, y1) are the points at t0 and t1
+Piece = tuple[Any, ...]
+
+_BISECTIONS = 52
+
+
+def monotone_pieces(cmds: Sequence[Command]) -> list[Piece]:
+    """
+    Return the pieces monotonic in y of the segments of commands, with
+    the lines closing the open subpaths.
+    """
+    pieces: list[Piece] = []
+    sx = sy = cx = cy = 0.
+    for seg in iter_segments(cmds):
+        if seg[0] == 'M':
+            _append_pieces(pieces, ('L', cx, cy, sx, sy))
+            sx, sy = cx, cy = seg[1], seg[2]
+            continue
+        _append_pieces(pieces, seg)
+        cx, cy = seg[-2], seg[-1]
+    _append_pieces(pieces, ('L', cx, cy, sx, sy))
+    return pieces
+
+
+def winding_number(pieces: Sequence[Piece], x: float, y: float) -> int:
+    """
+    Return the winding number of the pieces around a point.
+    """
+    w = 0
+    for piece in pieces:
+        direction, min_y, max_y, min_x, max_x = piece[:5]
+        if y < min_y or y >= max_y or x >= max_x:
+            continue
+        if x < min_x or _x_at(piece, y) > x:
+            w += direction
+    return w
+
+
+def is_inside(w: int, fill_rule: FillRule) -> bool:
+    if fill_rule == 'nonzero':
+        return w != 0
+    if fill_rule == 'evenodd':
+        return w % 2 == 1
+    raise ValueError(f'Unknown fill rule: {fill_rule}')
+
+
+def winding_numbers(pieces: Sequence[Piece], points: Iterable[Sequence[float]]) -> list[int]:
+    """
+    Return the winding number of the pieces around each `(x, y)` point.
+    `points` may be a NumPy array of shape (n, 2).
+    """
+    try:
+        import numpy
+    except ImportError:
+        return _winding_numbers(pieces, [(float(x), float(y)) for x, y in points])
+    return _winding_numbers_numpy(numpy, pieces, points)
+
+
+def _append_pieces(pieces: list[Piece], seg: Segment) -> None:
+    box = segment_bbox(seg)
+    if box[1] == box[3]:
+        # horizontal segments are never crossed
+        return
+
+    prepared = prepared_segment(seg)
+    ts = sorted(t for t in _y_extrema(prepared) if 0. < t < 1.)
+    bounds = [0., *ts, 1.]
+    ends = [(seg[1], seg[2]), *(segment_point(prepared, t) for t in ts), (seg[-2], seg[-1])]
+    for k in range(len(bounds) - 1):
+        (x0, y0), (x1, y1) = ends[k], ends[k+1]
+        if y0 == y1:
+            continue
+        pieces.append((1 if y1 > y0 else -1, min(y0, y1), max(y0, y1), box[0], box[2],
+                       prepared, bounds[k], bounds[k+1], x0, y0, x1, y1))
+
+
+def _y_extrema(seg: tuple) -> list[float]:
+    # parameters where dy/dt is 0
+    op = seg[0]
+    if op == 'Q':
+        _, _, y0, _, y1, _, y2 = seg
+        d = y0 - 2 * y1 + y2
+        return [] if d == 0 else [(y0 - y1) / d]
+    if op == 'C':
+        _, _, y0, _, y1, _, y2, _, y3 = seg
+        a = -y0 + 3 * y1 - 3 * y2 + y3
+        b = 3 * y0 - 6 * y1 + 3 * y2
+        c = 3 * (y1 - y0)
+        return list(quadratic_roots(3 * a, 2 * b, c))
+    if op == 'E':
+        # y = cy + a * cos(theta) + b * sin(theta)
+        _, _, _, rx, ry, cos_phi, sin_phi, theta1, dtheta = seg
+        if dtheta == 0:
+            return []
+        base = math.atan2(ry * cos_phi, rx * sin_phi)
+        lo, hi = sorted((theta1, theta1 + dtheta))
+        ks = range(math.floor((lo - base) / math.pi), math.ceil((hi - base) / math.pi) + 1)
+        return [(base + k * math.pi - theta1) / dtheta for k in ks]
+    return []
+
+
+def _x_at(piece: Piece, y: float) -> float:
+    _, _, _, _, _, prepared, t0, t1, x0, y0, x1, y1 = piece
+    if prepared[0] == 'L':
+        return x0 + (x1 - x0) * (y - y0) / (y1 - y0)
+
+    below = y0 < y
+    for _ in range(_BISECTIONS):
+        t = (t0 + t1) / 2
+        if (segment_point(prepared, t)[1] < y) == below:
+            t0 = t
+        else:
+            t1 = t
+    return segment_point(prepared, (t0 + t1) / 2)[0]
+
+
+def _winding_numbers(pieces: Sequence[Piece], points: list[tuple[float, float]]) -> list[int]:
+    order = sorted(range(len(points)), key=lambda i: points[i][1])
+    ys = [points[i][1] for i in order]
+    ws = [0] * len(points)
+    for piece in pieces:
+        direction, min_y, max_y, min_x, max_x = piece[:5]
+        for k in range(bisect_left(ys, min_y), bisect_left(ys, max_y)):
+            i = order[k]
+            x, y = points[i]
+            if x >= max_x:
+                continue
+            if x < min_x or _x_at(piece, y) > x:
+                ws[i] += direction
+    return ws
+
+
+def _winding_numbers_numpy(np, pieces: Sequence[Piece], points) -> list[int]:
+    ps = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    order = np.argsort(ps[:, 1], kind='stable')
+    xs, ys = ps[order, 0], ps[order, 1]
+    ws = np.zeros(len(ps), dtype=np.int64)
+    for piece in pieces:
+        direction, min_y, max_y, min_x, max_x = piece[:5]
+        a, b = np.searchsorted(ys, [min_y, max_y], side='left').tolist()
+        if a == b:
+            continue
+        x, y = xs[a:b], ys[a:b]
+        crossed = x < min_x
+        straddled = np.flatnonzero((x >= min_x) & (x < max_x))
+        if len(straddled):
+            crossed[straddled] = _xs_at_numpy(np, piece, y[straddled]) > x[straddled]
+        ws[a:b] += np.where(crossed, direction, 0)
+
+    results = np.empty_like(ws)
+    results[order] = ws
+    return results.tolist()
+
+
+def _xs_at_numpy(np, piece: Piece, y):
+    _, _, _, _, _, prepared, t0, t1, x0, y0, x1, y1 = piece
+    if prepared[0] == 'L':
+        return x0 + (x1 - x0) * (y - y0) / (y1 - y0)
+
+    lo = np.full(len(y), t0)
+    hi = np.full(len(y), t1)
+    below = y0 < y
+    for _ in range(_BISECTIONS):
+        t = (lo + hi) / 2
+        forward = (_points_numpy(np, prepared, t)[1] < y) == below
+        lo = np.where(forward, t, lo)
+        hi = np.where(forward, hi, t)
+    return _points_numpy(np, prepared, (lo + hi) / 2)[0]
+
+
+def _points_numpy(np, seg: tuple, t):
+    op = seg[0]
+    mt = 1 - t
+    if op == 'C':
+        _, x0, y0, x1, y1, x2, y2, x3, y3 = seg
+        a, b, c, d = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+        return a * x0 + b * x1 + c * x2 + d * x3, a * y0 + b * y1 + c * y2 + d * y3
+    if op == 'Q':
+        _, x0, y0, x1, y1, x2, y2 = seg
+        a, b, c = mt * mt, 2 * mt * t, t * t
+        return a * x0 + b * x1 + c * x2, a * y0 + b * y1 + c * y2
+    _, cx, cy, rx, ry, cos_phi, sin_phi, theta1, dtheta = seg
+    theta = theta1 + dtheta * t
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    return (cx + rx * cos_phi * cos_t - ry * sin_phi * sin_t,
+            cy + rx * sin_phi * cos_t + ry * cos_phi * sin_t)
@@ -0,0 +1,222 @@
+"""
+Compact binary encoding of `svgpdtools.PathData`.
+
+A pathdata is encoded into one blob::
+
+    header   16 bytes: magic b'SPD1', flags (uint8), 3 padding bytes,
+             number of commands (uint32), number of coords (uint32)
+    coords   float64 * number of coords
+    counts   uint32 * number of commands (items of each command's data)
+    opcodes  uint8 * number of commands
+
+An opcode is the command letter in ASCII. The bit 0x80 is set when the
+command is shown in relative coords (`repr_relative`). Each item of a
+command's data uses 2 coords (x, y) for points, 1 coord for H/V and 7
+coords (rx, ry, x-axis-rotation, large-arc-flag, sweep-flag, x, y) for
+elliptical arcs. Since the coords start at the offset 16, the blob can be
+viewed as float64 values without copying.
+
+The header is little-endian. The other sections are in the native byte
+order, which is recorded in the flags.
+"""
+from __future__ import annotations
+from array import array
+from typing import Optional, Union
+from multiprocessing.shared_memory import SharedMemory
+import mmap, os, struct, sys
+
+from .pathdata import PathData
+from .command import Command, Moveto, Lineto, Curveto, HorizontalAndVerticalLineto, \
+    EllipticalArc, Close
+from .ellipticalarc import EllipticalArcItem
+from .graphics import Point
+
+
+MAGIC = b'SPD1'
+_HEADER = struct.Struct('<4sB3xII')
+
+_ABSOLUTIZED = 0x01
+_BIG_ENDIAN = 0x02
+
+_REPR_RELATIVE = 0x80
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def dumps(pd: PathData) -> bytes:
+    """
+    Encode a pathdata into a blob.
+    """
+    parts = _encode(pd)
+    buf = bytearray(_encoded_size(parts))
+    _write_into(buf, parts)
+    return bytes(buf)
+
+
+def loads(buf: Buffer) -> PathData:
+    """
+    Decode a blob made by `dumps`. Trailing bytes after the encoded
+    pathdata are ignored.
+    """
+    with memoryview(buf) as mv:
+        flags, opcodes, counts, coords = _read(mv)
+    return _decode(flags, opcodes, counts, coords)
+
+
+def to_shared_memory(pd: PathData, name: Optional[str] = None) -> SharedMemory:
+    """
+    Encode a pathdata into a new `multiprocessing.shared_memory.SharedMemory`
+    block. Another process can decode it by `from_shared_memory(shm.name)`.
+    The caller owns the block and is responsible for `close()` and
+    `unlink()` of it.
+    """
+    parts = _encode(pd)
+    shm = SharedMemory(name=name, create=True, size=_encoded_size(parts))
+    _write_into(shm.buf, parts)
+    return shm
+
+
+def from_shared_memory(name: str) -> PathData:
+    """
+    Decode a pathdata from a shared memory block made by
+    `to_shared_memory`. The block stays owned by its creator: it is only
+    attached while reading, and is not unlinked when this process exits.
+    """
+    if os.name == 'posix' and sys.version_info < (3, 13):
+        return _loads_posix_shm(name)
+    # only POSIX blocks are tracked
+    shm = SharedMemory(name=name, track=False) if sys.version_info >= (3, 13) else SharedMemory(name=name)
+    try:
+        return loads(shm.buf)
+    finally:
+        shm.close()
+
+
+
+def _loads_posix_shm(name: str) -> PathData:
+    # Before Python 3.13, SharedMemory registers an attached block with the
+    # resource tracker, which unlinks it at the exit of the process
+    # (bpo-39959). Unregistering it again would drop the registration of
+    # the creator when it shares the tracker, so the block is mapped
+    # without SharedMemory.
+    import _posixshmem
+    fd = _posixshmem.shm_open('/' + name.lstrip('/'), os.O_RDONLY, mode=0o600)
+    try:
+        with mmap.mmap(fd, os.fstat(fd).st_size, prot=mmap.PROT_READ) as m:
+            return loads(m)
+    finally:
+        os.close(fd)
+
+
+_EncodedParts = tuple[int, bytearray, array, array]
+
+def _encode(pd: PathData) -> _EncodedParts:
+    flags = _ABSOLUTIZED if pd._absolutized else 0
+    if sys.byteorder == 'big':
+        flags |= _BIG_ENDIAN
+    opcodes = bytearray()
+    counts = array('I')
+    coords = array('d')
+
+    for cmd in pd:
+        opcodes.append(ord(cmd.fn) | (_REPR_RELATIVE if cmd.repr_relative else 0))
+        if isinstance(cmd, Close):
+            counts.append(0)
+            continue
+
+        counts.append(len(cmd.data))
+        if isinstance(cmd, HorizontalAndVerticalLineto):
+            coords.extend(cmd.data)
+        elif isinstance(cmd, EllipticalArc):
+            # `to_point` of an item is always kept in absolute coords
+            for a in cmd.data:
+                coords.extend((a.rx, a.ry, a.x_axis_rotation,
+                               float(a.is_large_arc), float(a.is_sweep),
+                               a.to_point.x, a.to_point.y))
+        else:
+            for p in cmd.data:
+                coords.append(p.x)
+                coords.append(p.y)
+
+    return flags, opcodes, counts, coords
+
+
+def _encoded_size(parts: _EncodedParts) -> int:
+    _, opcodes, counts, coords = parts
+    return _HEADER.size + coords.itemsize * len(coords) + counts.itemsize * len(counts) + len(opcodes)
+
+
+def _write_into(buf, parts: _EncodedParts) -> None:
+    flags, opcodes, counts, coords = parts
+    _HEADER.pack_into(buf, 0, MAGIC, flags, len(opcodes), len(coords))
+    pos = _HEADER.size
+    for section in (coords.tobytes(), counts.tobytes(), opcodes):
+        buf[pos:pos+len(section)] = section
+        pos += len(section)
+
+
+def _read(mv: memoryview) -> tuple[int, bytes, array, array]:
+    if len(mv) < _HEADER.size:
+        raise Exception('Too short to be an encoded pathdata.')
+    magic, flags, n_cmds, n_coords = _HEADER.unpack_from(mv, 0)
+    if magic != MAGIC:
+        raise Exception(f'Unknown magic number of an encoded pathdata: {magic!r}')
+
+    coords = array('d')
+    counts = array('I')
+    pos = _HEADER.size
+    end = pos + coords.itemsize * n_coords
+    coords.frombytes(mv[pos:end])
+    pos, end = end, end + counts.itemsize * n_cmds
+    counts.frombytes(mv[pos:end])
+    opcodes = bytes(mv[end:end+n_cmds])
+    if len(opcodes) != n_cmds:
+        raise Exception('Truncated encoded pathdata.')
+
+    if bool(flags & _BIG_ENDIAN) != (sys.byteorder == 'big'):
+        coords.byteswap()
+        counts.byteswap()
+    return flags, opcodes, counts, coords
+
+
+def _decode(flags: int, opcodes: bytes, counts: array, coords: array) -> PathData:
+    pd = PathData()
+    i = 0
+    for op, n in zip(opcodes, counts):
+        fn = chr(op & ~_REPR_RELATIVE)
+        fn_ = fn.lower()
+        cmd: Command
+        if fn_ == 'z':
+            cmd = Close(fn)
+        elif fn_ in 'hv':
+            cmd = HorizontalAndVerticalLineto(fn, coords[i:i+n].tolist())
+            i += n
+        elif fn_ == 'a':
+            items = []
+            for rx, ry, rot, large, sweep, x, y in _chunked(coords[i:i+7*n].tolist(), 7):
+                items.append(EllipticalArcItem((rx, ry), rot, bool(large), bool(sweep), Point(x, y)))
+            i += 7 * n
+            # initialized as absolute coords, then restore the letter
+            cmd = EllipticalArc(fn.upper(), items)
+        else:
+            xys = coords[i:i+2*n].tolist()
+            ps = [Point(xys[j], xys[j+1]) for j in range(0, len(xys), 2)]
+            i += 2 * n
+            if fn_ == 'm':
+                cmd = Moveto(fn, ps)
+            elif fn_ == 'l':
+                cmd = Lineto(fn, ps)
+            else:
+                cmd = Curveto(fn, ps)
+
+        pd.append(cmd)
+        cmd.fn = fn
+        cmd.repr_relative = bool(op & _REPR_RELATIVE)
+
+    pd._absolutized = bool(flags & _ABSOLUTIZED)
+    return pd
+
+
+def _chunked(values: list[float], size: int):
+    for i in range(0, len(values), size):
+        yield values[i:i+size]
@@ -0,0 +1,89 @@
+import unittest, pathlib, tempfile, threading
+
+import svgpdtools as PD
+from svgpdtools import corpus
+from svgpdtools.pathdata import PDTransformFailed
+from svgpdtools.utils import temporary_precision, number_repr
+
+
+class TestBatchTransform(unittest.TestCase):
+    def setUp(self):
+        self.srcs = [
+            'm 10,20 10,-10 v 60 m -10,0 l 20,0 m 20,-60 c -10,0 -20,10 -20,30 0,20 10,30 20,30 C 60,70 70,60 70,40 c 0,-20 -10,-30 -20,-30 z m 0,10 v 40',
+            'M 45,30 Q 35,30 35,40 q 0,10 10,10 z m 10,20 q 10,0 10,-10 0,-10 -10,-10 z',
+            'm 30,45 a 20 20 0 11 20,0 z m 20,0 a 25 15 25 11 -20,0 24 12 345 10 20,0 m 5,-20 -30,0 m 15,0 0,15',
+        ]
+        self.t = 'rotate(60, 40, 40)'
+
+    def _serial(self, precision: int) -> list[str]:
+        results = []
+        with temporary_precision(precision):
+            for d in self.srcs:
+                pd = PD.pathdata_from_string(d)
+                pd.transform(PD.transform_from_string(self.t), noexception=True)
+                results.append(str(pd))
+        return results
+
+    def test_executors(self):
+        jobs = [(d, self.t) for d in self.srcs] * 3
+        expected = self._serial(3) * 3
+        for kind in ('serial', 'thread', 'process'):
+            with self.subTest(executor=kind):
+                results = PD.batch.transform(jobs, executor=kind, max_workers=2,
+                                             chunksize=2, precision=3, noexception=True)
+                self.assertEqual(results, expected)
+
+    def test_transform_object(self):
+        jobs = [(d, PD.transform_from_string(self.t)) for d in self.srcs]
+        results = PD.batch.transform(jobs, executor='thread', max_workers=2, precision=6,
+                                     noexception=True)
+        self.assertEqual(results, self._serial(6))
+
+    def test_repr_relative(self):
+        jobs = [('M 0,0 L 10,0 20,10', 'translate(5)')]
+        results = PD.batch.transform(jobs, executor='serial', repr_relative=True)
+        self.assertEqual(results, ['m 5,0 l 10,0 10,10'])
+        results = PD.batch.transform([('m 0,0 l 10,0', 'translate(5)')], repr_absolute=True)
+        self.assertEqual(results, ['M 5,0 L 15,0'])
+
+    def test_corpus(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = pathlib.Path(tmp) / 'a.spdc'
+            # the last string is not in the corpus and is parsed
+            corpus.build(path, self.srcs[:2])
+            jobs = [(d, self.t) for d in self.srcs]
+            for kind in ('serial', 'thread', 'process'):
+                with self.subTest(executor=kind):
+                    results = PD.batch.transform(jobs, executor=kind, max_workers=2, chunksize=1,
+                                                 precision=3, noexception=True, corpus=path)
+                    self.assertEqual(results, self._serial(3))
+
+            # the float32 coords show that the pathdata come from the corpus
+            corpus.build(path, ['M 0.0025,0'], 'f')
+            with corpus.Corpus(path) as c:
+                results = PD.batch.transform([('M 0.0025,0', 'scale(1)')], precision=3, corpus=c)
+            self.assertEqual(results, ['M 0.002,0'])
+
+    def test_failed(self):
+        jobs = [(d, self.t) for d in self.srcs]
+        for kind in ('thread', 'process'):
+            with self.subTest(executor=kind):
+                with self.assertRaises(PDTransformFailed) as cm:
+                    PD.batch.transform(jobs, executor=kind, max_workers=2, chunksize=1)
+                self.assertIn('horizontal_lineto', cm.exception.message)
+
+    def test_temporary_precision_is_thread_local(self):
+        results = []
+        def format_in_thread():
+            results.append(number_repr(1.23456))
+
+        with temporary_precision(2):
+            th = threading.Thread(target=format_in_thread)
+            th.start()
+            th.join()
+            self.assertEqual(number_repr(1.23456), '1.23')
+        self.assertEqual(results, [number_repr(1.23456)])
+
+
+if __name__ == '__main__':
+    unittest.main()
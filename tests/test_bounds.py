@@ -0,0 +1,130 @@
+import unittest, math, random, copy
+
+import svgpdtools as PD
+import svgpdtools.bounds as B
+from svgpdtools.graphics import Rect
+from svgpdtools.ellipticalarc import center_parameterization
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _sampled_bbox(seg, n=2000):
+    op = seg[0]
+    xs, ys = [], []
+    for i in range(n + 1):
+        t = i / n
+        mt = 1 - t
+        if op == 'C':
+            _, x0, y0, x1, y1, x2, y2, x, y = seg
+            xs.append(mt**3*x0 + 3*mt*mt*t*x1 + 3*mt*t*t*x2 + t**3*x)
+            ys.append(mt**3*y0 + 3*mt*mt*t*y1 + 3*mt*t*t*y2 + t**3*y)
+        elif op == 'Q':
+            _, x0, y0, x1, y1, x, y = seg
+            xs.append(mt*mt*x0 + 2*mt*t*x1 + t*t*x)
+            ys.append(mt*mt*y0 + 2*mt*t*y1 + t*t*y)
+        elif op == 'A':
+            _, x0, y0, rx, ry, rot, fa, fs, x, y = seg
+            phi = math.radians(rot)
+            cx, cy, rx, ry, theta1, dtheta = center_parameterization(x0, y0, rx, ry, phi, fa, fs, x, y)
+            theta = theta1 + dtheta * t
+            xs.append(cx + rx*math.cos(phi)*math.cos(theta) - ry*math.sin(phi)*math.sin(theta))
+            ys.append(cy + rx*math.sin(phi)*math.cos(theta) + ry*math.cos(phi)*math.sin(theta))
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+class TestBounds(unittest.TestCase):
+    def setUp(self):
+        PD.precision(6)
+        self.rnd = random.Random(0)
+
+    def assertBoxAlmostEqual(self, b1, b2, places=3):
+        for v1, v2 in zip(b1, b2):
+            self.assertAlmostEqual(v1, v2, places=places)
+
+    def test_segments_against_sampling(self):
+        u = lambda: self.rnd.uniform(-100, 100)
+        for _ in range(200):
+            for seg in [('C', u(), u(), u(), u(), u(), u(), u(), u()),
+                        ('Q', u(), u(), u(), u(), u(), u()),
+                        ('A', u(), u(), abs(u()) + 1, abs(u()) + 1, u() * 3.6,
+                         self.rnd.random() < .5, self.rnd.random() < .5, u(), u())]:
+                self.assertBoxAlmostEqual(B.segment_bbox(seg), _sampled_bbox(seg), places=1)
+
+    def test_arc_endpoints(self):
+        # the endpoints are on the corrected ellipse
+        x0, y0, x, y = 10., 20., 80., -30.
+        cx, cy, rx, ry, theta1, dtheta = center_parameterization(x0, y0, 5, 3, math.radians(30), False, True, x, y)
+        phi = math.radians(30)
+        theta = theta1 + dtheta
+        self.assertAlmostEqual(cx + rx*math.cos(phi)*math.cos(theta) - ry*math.sin(phi)*math.sin(theta), x)
+        self.assertAlmostEqual(cy + rx*math.sin(phi)*math.cos(theta) + ry*math.cos(phi)*math.sin(theta), y)
+        self.assertIsNone(center_parameterization(1, 1, 5, 5, 0, False, False, 1, 1))
+        self.assertIsNone(center_parameterization(1, 1, 0, 5, 0, False, False, 2, 2))
+
+    def test_pathdata_bbox(self):
+        pd = PD.pathdata_from_string('M 45,30 Q 35,30 35,40 q 0,10 10,10 z m 30,20 h 10 v -60 z')
+        self.assertEqual(pd.bbox(), Rect(35, -10, 85, 50))
+        self.assertEqual(str(pd.bbox()), '35 -10 50 60')
+        self.assertEqual(pd.subpath_bboxes(), [Rect(35, 30, 45, 50), Rect(75, -10, 85, 50)])
+        self.assertIsNone(PD.PathData().bbox())
+
+        pd = PD.pathdata_from_string('m 30,45 a 20 20 0 11 20,0 z')
+        self.assertBoxAlmostEqual(list(vars(pd.bbox()).values()), [20, 45 - 20 - math.sqrt(300), 60, 45])
+
+    def test_cache_invalidation(self):
+        pd = PD.pathdata_from_string('M 0,0 L 10,10')
+        self.assertEqual(pd.bbox(), Rect(0, 0, 10, 10))
+        pd.append(PD.pathdata_from_string('M 0,0 L 20,-5')[1])
+        self.assertEqual(pd.bbox(), Rect(0, -5, 20, 10))
+        del pd[-1]
+        self.assertEqual(pd.bbox(), Rect(0, 0, 10, 10))
+        pd.transform(PD.Transform.translate(5, 5))
+        self.assertEqual(pd.bbox(), Rect(5, 5, 15, 15))
+        pd.normalize()
+        self.assertEqual(pd.bbox(), Rect(5, 5, 15, 15))
+
+        cp = copy.copy(pd)
+        cp.transform(PD.Transform.scale(2))
+        self.assertEqual(pd.bbox(), Rect(5, 5, 15, 15))
+
+    def test_bboxes(self):
+        srcs = [
+            'm 10,20 10,-10 v 60 m -10,0 l 20,0 m 20,-60 c -10,0 -20,10 -20,30 s 10,30 20,30 q 10,0 10,-10 t 0,-20 z m 0,10 v 40',
+            'M 45,30 Q 35,30 35,40 q 0,10 10,10 z m 10,20 q 10,0 10,-10 0,-10 -10,-10 z',
+            'm 30,45 a 20 20 0 11 20,0 z m 20,0 a 25 15 25 11 -20,0 24 12 345 10 20,0 m 5,-20 -30,0 m 15,0 0,15',
+        ]
+        pds = [PD.pathdata_from_string(src) for src in srcs]
+        expected = [pd.bbox() for pd in pds]
+        self.assertEqual(B.bboxes(pds[:1] + [PD.PathData()] + pds[1:]),
+                         expected[:1] + [None] + expected[1:])
+        self.assertEqual(B._bboxes_from_buffers(*_buffers(pds)), expected)
+
+    @unittest.skipUnless(numpy, 'numpy is not installed')
+    def test_bboxes_numpy(self):
+        u = lambda: self.rnd.uniform(-100, 100)
+        pds = []
+        for _ in range(50):
+            d = f'M {u()},{u()}'
+            for _ in range(10):
+                d += self.rnd.choice([f' C {u()},{u()} {u()},{u()} {u()},{u()}',
+                                      f' Q {u()},{u()} {u()},{u()}', f' L {u()},{u()}',
+                                      f' A 300 200 {u()} 0 1 {u()},{u()}', ' z'])
+            pds.append(PD.pathdata_from_string(d))
+        expected = B._bboxes_from_buffers(*_buffers(pds))
+        for r1, r2 in zip(B._bboxes_from_buffers_numpy(numpy, *_buffers(pds)), expected):
+            self.assertBoxAlmostEqual(vars(r1).values(), vars(r2).values(), places=9)
+
+
+def _buffers(pds):
+    ops, coords, offsets = bytearray(), B.array('d'), [0]
+    for pd in pds:
+        pd.segment_buffers(ops, coords)
+        offsets.append(len(ops))
+    return ops, coords, offsets
+
+
+if __name__ == '__main__':
+    unittest.main()
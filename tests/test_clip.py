@@ -0,0 +1,84 @@
+import unittest, math
+
+import svgpdtools as PD
+from svgpdtools.graphics import Rect
+from svgpdtools.clip import clipped_segments
+from svgpdtools.utils import precision_for_scale
+
+
+def _clipped(d: str, rect: Rect, split=False) -> str:
+    pd = PD.pathdata_from_string(d)
+    pd.clip_to_rect(rect, split=split)
+    return str(pd)
+
+
+class TestClip(unittest.TestCase):
+    def setUp(self):
+        PD.precision(6)
+        self.rect = Rect(0, 0, 10, 10)
+
+    def test_culling(self):
+        self.assertEqual(_clipped('M 1,1 L 5,5 Z M 20,20 L 30,30 Z M 2,2 h 1', self.rect), 'M 1,1 L 5,5 Z M 2,2 h 1')
+        self.assertEqual(_clipped('M 20,20 L 30,30 M 40,40 h 1', self.rect), '')
+        # a subpath following a closepath of a dropped one gets a moveto
+        self.assertEqual(_clipped('M 20,20 L 30,30 Z L 5,5', self.rect), 'M 20,20 L 5,5')
+        self.assertEqual(_clipped('m 20,20 l 10,10 z m -15,-15 l 1,1', self.rect), 'm 5,5 l 1,1')
+        # crossing subpaths are kept as they are
+        src = 'M -5,5 L 15,5 L 15,6 L -5,6 Z'
+        self.assertEqual(_clipped(src, self.rect), src)
+
+    def test_split(self):
+        self.assertEqual(_clipped('M -5,5 L 15,5 L 15,6 L -5,6 Z', self.rect, split=True),
+                         'M 0,5 L 10,5 M 10,6 L 0,6')
+        self.assertEqual(_clipped('m -5,5 l 20,0 0,1 -20,0 z', self.rect, split=True), 'm 0,5 l 10,0 m 0,1 l -10,0')
+        self.assertEqual(_clipped('M 2,2 L 4,4 M -5,5 Q 5,-5 15,5', self.rect, split=True),
+                         'M 2,2 L 4,4 M 0,1.25 Q 5,-1.25 10,1.25')
+
+    def test_split_curves(self):
+        rect = Rect(-20, -20, 10, 10)
+        for d in ('M -5,5 C 0,-5 10,15 15,5', 'M 5,-15 A 10 10 0 0 1 5,5 A 10 10 0 0 1 5,-15'):
+            pd = PD.pathdata_from_string(d)
+            pieces = [piece for seg in pd.segments() for piece in clipped_segments(seg, rect)]
+            self.assertTrue(pieces)
+            for piece in pieces:
+                self.assertTrue(rect.min_x - 1e-9 <= piece[1] <= rect.max_x + 1e-9)
+                self.assertTrue(rect.min_x - 1e-9 <= piece[-2] <= rect.max_x + 1e-9)
+
+            pd.clip_to_rect(rect, split=True)
+            box = pd.bbox()
+            self.assertAlmostEqual(box.max_x, 10)
+            self.assertLessEqual(box.min_x, -5 if d.startswith('M -5') else -5 + 1e-9)
+
+        # a half circle clipped at its middle is a quarter
+        pd = PD.pathdata_from_string('M 0,-10 A 10 10 0 0 1 0,10')
+        pd.clip_to_rect(Rect(-20, 0, 20, 20), split=True)
+        self.assertEqual(str(pd), 'M 10,0 A 10 10 0 0 1 0,10')
+        self.assertAlmostEqual(pd.length(), 5 * math.pi)
+
+
+
+class TestCull(unittest.TestCase):
+    def setUp(self):
+        PD.precision(6)
+
+    def test_cull_subpaths(self):
+        pd = PD.pathdata_from_string('M 0,0 h 100 v 100 z M 10,10 h 2 v 2 z M 20,20 h 100 M 30,30 h 2 v 10')
+        pd.cull_subpaths(.25, scale=.1)
+        # a hairline wider than a pixel is kept
+        self.assertEqual(str(pd), 'M 0,0 h 100 v 100 z M 20,20 h 100 M 30,30 h 2 v 10')
+        pd.cull_subpaths(.25, scale=.01)
+        self.assertEqual(str(pd), 'M 0,0 h 100 v 100 z M 20,20 h 100')
+
+        pd = PD.pathdata_from_string('M 0,0 h 1 v 1 z l 100,100')
+        pd.cull_subpaths(1, scale=.5)
+        self.assertEqual(str(pd), 'm 0,0 l 100,100')
+
+    def test_precision_for_scale(self):
+        self.assertEqual(precision_for_scale(.01), 0)
+        self.assertEqual(precision_for_scale(1), 1)
+        self.assertEqual(precision_for_scale(100), 3)
+        self.assertEqual(PD.Transform.scale(4, 9).scale_factor(), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest, math, random
+
+import svgpdtools as PD
+from svgpdtools.closest import Closest
+from svgpdtools.segments import prepared_segment, segment_point
+
+
+_D = ('M 0,0 C 10,20 30,20 40,0 A 20,20 0 0 1 80,0 L 100,50 '
+      'Q 120,80 90,90 T 60,70 a 10,25 30 1 0 -20,-10 Z')
+
+
+def _brute_force(pd, x, y):
+    best = math.inf
+    coords, _ = pd.flatten(.001)
+    for k in range(0, len(coords), 2):
+        best = min(best, math.hypot(coords[k] - x, coords[k+1] - y))
+    return best
+
+
+class TestClosest(unittest.TestCase):
+    def test_nearest(self):
+        pd = PD.pathdata_from_string(_D)
+        segs = list(pd.segments())
+        rnd = random.Random(5)
+        for _ in range(100):
+            x, y = rnd.uniform(-20, 130), rnd.uniform(-40, 110)
+            c = pd.nearest(x, y)
+            self.assertLessEqual(c.distance, _brute_force(pd, x, y) + 1e-9)
+            self.assertAlmostEqual(c.distance, math.hypot(c.x - x, c.y - y))
+            self.assertNotEqual(segs[c.index][0], 'M')
+            self.assertTrue(0 <= c.t <= 1)
+
+    def test_random_segments(self):
+        rnd = random.Random(7)
+
+        def point():
+            return f'{rnd.uniform(0, 100):.2f},{rnd.uniform(0, 100):.2f}'
+
+        ds = ['M83.85 55.23 A50.79 19.07 156.1 1 1 58.61 36.02',
+              'M84.38 45.99 S3.44 95.22 21.22 17.38',
+              'M88.41 93.57 S4.25 12.92 80.72 4.28']
+        points = [(4.1137, 81.5620), (87.019, 54.427), (95.3359, 86.1671)]
+        for _ in range(150):
+            ds.append(rnd.choice([
+                f'M {point()} C {point()} {point()} {point()}',
+                f'M {point()} Q {point()} {point()}',
+                f'M {point()} A {rnd.uniform(5, 60):.2f},{rnd.uniform(5, 60):.2f} {rnd.uniform(0, 180):.1f} '
+                f'{rnd.randint(0, 1)} {rnd.randint(0, 1)} {point()}',
+            ]))
+            points.append((rnd.uniform(-20, 120), rnd.uniform(-20, 120)))
+        for d, (x, y) in zip(ds, points):
+            pd = PD.pathdata_from_string(d)
+            seg = prepared_segment(list(pd.segments())[1])
+            # dense sampling can only overestimate the distance
+            dense = min(math.hypot(px - x, py - y) for px, py in (segment_point(seg, i / 2000) for i in range(2001)))
+            self.assertLessEqual(pd.nearest(x, y).distance, dense + 1e-9, d)
+
+    def test_exact(self):
+        pd = PD.pathdata_from_string('M 0,0 C 10,20 30,20 40,0 A 20,20 0 0 1 80,0 L 100,50')
+        c = pd.nearest(20, 20)
+        self.assertEqual(c.index, 1)
+        self.assertAlmostEqual(c.t, .5)
+        self.assertAlmostEqual(c.distance, 5)
+        c = pd.nearest(60, -30)
+        self.assertEqual((c.index, round(c.t, 9), round(c.x, 9), round(c.y, 9), round(c.distance, 9)),
+                         (2, .5, 60, -20, 10))
+        self.assertEqual(pd.nearest(0, 10).index, 1)
+        self.assertIsNone(PD.pathdata_from_string('M 1,1').nearest(0, 0))
+
+    def test_nearest_many(self):
+        pd = PD.pathdata_from_string(_D)
+        rnd = random.Random(6)
+        points = [(rnd.uniform(-20, 130), rnd.uniform(-40, 110)) for _ in range(50)]
+        points += [(x + .5, y) for x, y in points]
+        results = pd.nearest_many(points)
+        for (x, y), c in zip(points, results):
+            self.assertIsInstance(c, Closest)
+            self.assertAlmostEqual(c.distance, pd.nearest(x, y).distance, places=9)
+
+    def test_cache(self):
+        pd = PD.pathdata_from_string('M 0,0 L 10,0')
+        self.assertAlmostEqual(pd.nearest(5, 5).distance, 5)
+        pd.transform(PD.transform_from_string('translate(0 5)'))
+        self.assertAlmostEqual(pd.nearest(5, 5).distance, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+import unittest, contextlib, io, pathlib, tempfile
+
+import svgpdtools as PD
+from svgpdtools import columnar
+from svgpdtools.columnar import PathColumns
+import svgpdtools.terminal_command as CMD
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+_DS = [
+    'M 10,10 h 10 v 10 a 5,5 0 0 1 -5,5 z',
+    'm 0,0 c 1,2 3,4 5,6 s 1,1 2,2 Q 1,1 3,3 t 4,4',
+    '',
+    'M 0.1,0.2 L 1e3,2.6e-3 0.3,0.7',
+]
+
+
+class TestColumnar(unittest.TestCase):
+    def test_round_trip(self):
+        columns = PathColumns()
+        for i, d in enumerate(_DS):
+            self.assertEqual(columns.append(PD.pathdata_from_string(d), i * 2), i)
+        self.assertEqual(len(columns), 4)
+        self.assertEqual([str(pd) for pd in columns], [str(PD.pathdata_from_string(d)) for d in _DS])
+        self.assertEqual(list(columns.element_index), [0, 2, 4, 6])
+        self.assertEqual(list(columns.command_offsets), [0, 5, 10, 10, 12])
+        self.assertEqual(columns.opcodes[1], ord('h') | 0x80)
+
+        # relative coords are kept, but the end points of arcs are absolute
+        columns = PathColumns()
+        columns.append(PD.pathdata_from_string('m 1,2 l 3,4 h 5 a 1,1 0 0 1 2,2'))
+        self.assertEqual(list(columns.coords), [1, 2, 3, 4, 5, 1, 1, 0, 0, 1, 11, 8])
+
+    def test_float32(self):
+        columns = PathColumns('f')
+        columns.extend(PD.pathdata_from_string(d) for d in _DS)
+        self.assertEqual(columns.coords.itemsize, 4)
+        with PD.utils.temporary_precision(3):
+            self.assertEqual([str(pd) for pd in columns], [str(PD.pathdata_from_string(d)) for d in _DS])
+        with self.assertRaises(ValueError):
+            PathColumns('e')
+
+    def test_transform(self):
+        ds = [d.replace('h 10 v 10', 'l 10,0 0,10') for d in _DS] + ['m 1,2 3,4 z m 5,6 7,8']
+        t = PD.transform_from_string('translate(5 7) rotate(30) scale(2)')
+        columns = PathColumns()
+        columns.extend(PD.pathdata_from_string(d) for d in ds)
+        columns.transform(t)
+        for i, d in enumerate(ds):
+            pd = PD.pathdata_from_string(d)
+            pd.transform(t, noexception=True)
+            self.assertEqual(str(columns.pathdata(i)), str(pd))
+
+        # H/V are kept by a transform without rotation or skew
+        columns = PathColumns()
+        columns.append(PD.pathdata_from_string('M 10,10 h 10 V 5 H 1 v 2'))
+        columns.transform(PD.transform_from_string('translate(1 2) scale(2 -3)'))
+        self.assertEqual(str(columns.pathdata(0)), 'M 21,-28 h 20 V -13 H 3 v -6')
+        with self.assertRaises(Exception):
+            columns.transform(PD.transform_from_string('rotate(90)'))
+
+    def test_transform_arcs(self):
+        columns = PathColumns()
+        columns.append(PD.pathdata_from_string('M 0,0 A 5,5 0 0 1 10,0 a 3,4 30 1 0 2,2'))
+        columns.transform(PD.transform_from_string('scale(2 -3)'))
+        # unlike `PathData.transform`, a circle is scaled into an ellipse
+        self.assertEqual(str(columns.pathdata(0)), 'M 0,0 A 10 15 0 0 0 20,0 a 6.267564 11.487717 -11.553088 1 1 4,-6')
+        columns = PathColumns()
+        columns.append(PD.pathdata_from_string('M 0,0 A 3,5 120 0 1 10,0'))
+        columns.transform(PD.transform_from_string('rotate(30)'))
+        self.assertEqual(str(columns.pathdata(0)), 'M 0,0 A 3 5 150 0 1 8.660254,5')
+
+    @unittest.skipUnless(numpy, 'numpy is not installed')
+    def test_transform_numpy(self):
+        ds = _DS + ['m 1,2 3,4 z m 5,6 7,8', 'M 1,1 a 3,4 20 1 0 5,5 A 2,2 0 0 0 0,0 z']
+        for coord_type in ('d', 'f'):
+            for src in ('translate(5 7) scale(2 -3)', 'matrix(1 2 -3 4 5 6)'):
+                a, b = PathColumns(coord_type), PathColumns(coord_type)
+                for d in ds:
+                    if 'matrix' in src:
+                        d = d.replace('h 10 v 10', 'l 10,0 0,10')
+                    a.append(PD.pathdata_from_string(d))
+                    b.append(PD.pathdata_from_string(d))
+                t = PD.transform_from_string(src)
+                a.transform(t)
+                columnar._transform_coords(b, t)
+                for x, y in zip(a.coords, b.coords):
+                    self.assertAlmostEqual(x, y, delta=abs(x) * 1e-6 if coord_type == 'f' else 1e-9)
+
+    def test_float32_mismatches(self):
+        self.assertEqual(columnar.float32_limit(3), 8388.608)
+        columns = PathColumns()
+        columns.extend(PD.pathdata_from_string(d) for d in _DS)
+        columns.append(PD.pathdata_from_string('M 0.0025,1 L 20000.0001,3'))
+        self.assertEqual(columnar.mismatches(columns, columns.astype('f'), 2), [])
+        # 0.0025 is 0.00249999994 in float32, so it is rounded down
+        self.assertEqual(columnar.mismatches(columns, columns.astype('f'), 3), [4])
+        with PD.utils.temporary_precision(3):
+            self.assertEqual(str(columns.astype('f').pathdata(4)), 'M 0.002,1 L 20000,3')
+        with self.assertRaises(ValueError):
+            columnar.mismatches(columns, PathColumns())
+
+    def test_save_load(self):
+        columns = PathColumns()
+        columns.extend(PD.pathdata_from_string(d) for d in _DS)
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ('a.npz', 'cols'):
+                path = pathlib.Path(tmp) / name
+                columnar.save(columns, path)
+                loaded = columnar.load(path)
+                for column in columnar.COLUMNS:
+                    self.assertEqual(getattr(loaded, column), getattr(columns, column))
+
+            (pathlib.Path(tmp) / 'cols' / 'flags.npy').unlink()
+            with self.assertRaises(FileNotFoundError):
+                columnar.load(pathlib.Path(tmp) / 'cols')
+            arrays = columns.arrays()
+            arrays['coords'] = arrays['coords'][:-1]
+            with self.assertRaises(Exception):
+                PathColumns.from_arrays(arrays)
+
+    @unittest.skipUnless(numpy, 'numpy is not installed')
+    def test_numpy(self):
+        columns = PathColumns('f')
+        columns.extend(PD.pathdata_from_string(d) for d in _DS)
+        with tempfile.TemporaryDirectory() as tmp:
+            columnar.save(columns, pathlib.Path(tmp) / 'cols')
+            coords = numpy.load(pathlib.Path(tmp) / 'cols' / 'coords.npy', mmap_mode='r')
+            self.assertIsInstance(coords, numpy.memmap)
+            self.assertEqual(coords.dtype, numpy.float32)
+            self.assertEqual(coords.tolist(), columns.coords.tolist())
+
+            columnar.save(columns, pathlib.Path(tmp) / 'a.npz')
+            with numpy.load(pathlib.Path(tmp) / 'a.npz') as z:
+                self.assertEqual(sorted(z.files), sorted(columnar.COLUMNS))
+                self.assertEqual(z['command_offsets'].tolist(), list(columns.command_offsets))
+
+
+_SVG = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">
+<path d="M 10,10 h 10 v 10 z"/>
+<rect width="1" height="1"/>
+<path d="m 0,0 l 5,6" transform="translate(10)"/>
+<g transform="scale(2)"><path d="M 1,2 L 3,4" transform="translate(1)"/></g>
+</svg>
+'''
+
+
+class TestExportCommand(unittest.TestCase):
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = pathlib.Path(tmp) / 'src.svg'
+            src.write_text(_SVG)
+            with contextlib.redirect_stdout(io.StringIO()):
+                CMD.main(f'export -f {src} -o {tmp}/a.npz'.split())
+                CMD.main(f'export -f {src} --out-dir {tmp}/cols --float32 --collapse-transform-attribute'.split())
+
+            columns = columnar.load(pathlib.Path(tmp) / 'a.npz')
+            self.assertEqual([str(pd) for pd in columns], ['M 10,10 h 10 v 10 z', 'm 0,0 l 5,6', 'M 1,2 L 3,4'])
+            self.assertEqual(list(columns.element_index), [0, 1, 2])
+
+            columns = columnar.load(pathlib.Path(tmp) / 'cols')
+            self.assertEqual(columns.coords.typecode, 'f')
+            self.assertEqual(str(columns.pathdata(1)), 'm 10,0 l 5,6')
+            # the transforms of the ancestors are applied too
+            self.assertEqual(str(columns.pathdata(2)), 'M 4,4 L 8,8')
+
+    def test_command_errors(self):
+        for args in (['export'], ['export', '-o', 'a.npy'], ['export', '-o', 'a.npz', '--out-dir', 'a']):
+            with self.assertRaises(SystemExit) as cm, contextlib.redirect_stderr(io.StringIO()):
+                CMD.main(args)
+            self.assertEqual(cm.exception.code, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
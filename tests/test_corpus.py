@@ -0,0 +1,140 @@
+import unittest, contextlib, io, pathlib, pickle, tempfile
+from unittest import mock
+
+import svgpdtools as PD
+from svgpdtools import corpus
+from svgpdtools.corpus import Corpus, CorpusBuilder
+import svgpdtools.terminal_command as CMD
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+_DS = [
+    'M 10,10 h 10 v 10 a 5,5 0 0 1 -5,5 z',
+    'm 0,0 c 1,2 3,4 5,6 s 1,1 2,2 Q 1,1 3,3 t 4,4',
+    '',
+    'M 10,10 h 10 v 10 a 5,5 0 0 1 -5,5 z',
+    'M 0.1,0.2 L 1e3,2.5e-3 0.3,0.7',
+]
+
+
+class TestCorpus(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = pathlib.Path(tmp.name) / 'a.spdc'
+
+    def test_build(self):
+        # the repeated `d` string is stored once
+        self.assertEqual(corpus.build(self.path, _DS), 4)
+        with Corpus(self.path) as c:
+            self.assertEqual(len(c), 4)
+            for d in _DS:
+                self.assertEqual(str(c.get(d)), str(PD.pathdata_from_string(d)))
+            self.assertEqual(c.find(_DS[3]), 0)
+            self.assertEqual(c.find(_DS[4]), 3)
+            self.assertIsNone(c.find('M 0,0'))
+            self.assertIsNone(c.get('M 0,0'))
+            self.assertEqual([str(pd) for pd in c], [str(PD.pathdata_from_string(d)) for d in _DS[:3] + _DS[4:]])
+
+            view = c.view(-1)
+            self.assertEqual(view.coords.tolist(), [.1, .2, 1e3, 2.5e-3, .3, .7])
+            self.assertEqual(bytes(view.opcodes), b'ML')
+            view.release()
+            with self.assertRaises(IndexError):
+                c.view(4)
+
+    def test_hash_collision(self):
+        # strings of the same key are told apart by the check
+        with mock.patch.object(corpus, 'hash_d', lambda d: (0, len(d))):
+            corpus.build(self.path, _DS)
+            with Corpus(self.path) as c:
+                self.assertEqual(len(c), 4)
+                for d in _DS:
+                    self.assertEqual(str(c.get(d)), str(PD.pathdata_from_string(d)))
+                self.assertIsNone(c.find('M 0,0'))
+
+    def test_builder(self):
+        with CorpusBuilder(self.path) as builder:
+            self.assertEqual(builder.add(_DS[0], 5), 0)
+            self.assertEqual(builder.add(_DS[1], 7), 1)
+            self.assertEqual(builder.add(_DS[0], 9), 0)
+        with Corpus(self.path) as c:
+            self.assertEqual(list(c.section('element_index')), [5, 7])
+
+        # nothing is written when the block raises
+        other = self.path.with_name('b.spdc')
+        with self.assertRaises(Exception):
+            with CorpusBuilder(other) as builder:
+                builder.add('M 0,0 L 1')
+        self.assertFalse(other.exists())
+
+    def test_float32(self):
+        corpus.build(self.path, _DS, 'f')
+        with Corpus(self.path) as c:
+            self.assertEqual(c.section('coords').format, 'f')
+            with PD.utils.temporary_precision(4):
+                self.assertEqual(str(c.get(_DS[4])), 'M 0.1,0.2 L 1000,0.0025 0.3,0.7')
+        with self.assertRaises(ValueError):
+            CorpusBuilder(self.path, 'e')
+
+    def test_pickle(self):
+        corpus.build(self.path, _DS)
+        with Corpus(self.path) as c:
+            with pickle.loads(pickle.dumps(c)) as copied:
+                self.assertEqual(copied.path, c.path)
+                self.assertEqual(str(copied.pathdata(1)), str(c.pathdata(1)))
+
+    def test_invalid_files(self):
+        corpus.build(self.path, _DS)
+        data = self.path.read_bytes()
+        for broken in (b'', b'XXXX' + data[4:], data[:200]):
+            self.path.write_bytes(broken)
+            with self.assertRaises(Exception):
+                Corpus(self.path)
+
+    @unittest.skipUnless(numpy, 'numpy is not installed')
+    def test_numpy(self):
+        corpus.build(self.path, _DS)
+        with Corpus(self.path) as c:
+            coords = numpy.frombuffer(c.section('coords'), dtype=numpy.float64)
+            offsets = numpy.frombuffer(c.section('coord_offsets'), dtype=numpy.int64)
+            self.assertEqual(coords[offsets[3]:offsets[4]].tolist(), [.1, .2, 1e3, 2.5e-3, .3, .7])
+            del coords, offsets
+
+
+_SVG = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">
+<path d="M 10,10 h 10 v 10 z"/>
+<rect width="1" height="1"/>
+<path d="m 0,0 l 5,6"/>
+<path d="M 10,10 h 10 v 10 z"/>
+</svg>
+'''
+
+
+class TestCorpusCommand(unittest.TestCase):
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = pathlib.Path(tmp) / 'src.svg'
+            src.write_text(_SVG)
+            with contextlib.redirect_stdout(io.StringIO()):
+                CMD.main(f'corpus -f {src} -o {tmp}/a.spdc'.split())
+                CMD.main(f'corpus -f {src} -o {tmp}/b.spdc --float32'.split())
+            with Corpus(pathlib.Path(tmp) / 'a.spdc') as c:
+                self.assertEqual([str(pd) for pd in c], ['M 10,10 h 10 v 10 z', 'm 0,0 l 5,6'])
+                self.assertEqual(list(c.section('element_index')), [0, 1])
+            with Corpus(pathlib.Path(tmp) / 'b.spdc') as c:
+                self.assertEqual(c.section('coords').format, 'f')
+                self.assertEqual(str(c.pathdata(1)), 'm 0,0 l 5,6')
+
+    def test_command_without_output(self):
+        with self.assertRaises(SystemExit) as cm, contextlib.redirect_stderr(io.StringIO()):
+            CMD.main(['corpus'])
+        self.assertEqual(cm.exception.code, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
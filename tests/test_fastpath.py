@@ -0,0 +1,104 @@
+import unittest, itertools, random
+
+import svgpdtools as PD
+from svgpdtools.pathdata import temporary_repr_relative, PDTransformFailed
+from svgpdtools.utils import temporary_precision
+import svgpdtools.fastpath as F
+
+
+def _transform_objects(d, t, rr=False, ra=False, **kw):
+    pd = PD.pathdata_from_string(d)
+    pd.transform(t, **kw)
+    if ra:
+        pd.absolutize()
+    with temporary_repr_relative(rr):
+        return str(pd)
+
+def _normalize_objects(d, t=None, **kw):
+    pd = PD.pathdata_from_string(d)
+    if t is not None:
+        pd.transform(t, collapse_hv_lineto=kw.get('collapse_hv_lineto', False))
+    pd.normalize(**kw)
+    return str(pd)
+
+
+class TestFastPath(unittest.TestCase):
+    def setUp(self):
+        self.srcs = [
+            'm 10,20 10,-10 v 60 m -10,0 l 20,0 m 20,-60 c -10,0 -20,10 -20,30 0,20 10,30 20,30 C 60,70 70,60 70,40 c 0,-20 -10,-30 -20,-30 z m 0,10 v 40',
+            'M 45,30 Q 35,30 35,40 q 0,10 10,10 z m 10,20 q 10,0 10,-10 0,-10 -10,-10 z',
+            'm 0,0 c 100,-300 300,-300 400,0 s 300,300 400,0 q 200,-600 -400,0 t -400,0 400,0 400,0 q 100,-300 -400,0 t -400,0',
+            'm 0,0 h 100 100 50 v 200,50 h-250 v 250 H 3 H 4 V 5 z z M 1.5.5-2e1,3E-1 L.1,.2',
+            '',
+        ]
+        self.transforms = [
+            PD.Transform(),
+            PD.Transform.rotate(33, 4, 5),
+            PD.Transform.matrix(1.3, .2, -.4, .9, 7, -3),
+        ]
+
+    def test_tokenize(self):
+        self.assertEqual(F._tokenize(' M1.5.5-2e1,0 l,1 2, z'),
+                         [('M', [1.5, .5, -20., 0.]), ('l', [1., 2.]), ('z', [])])
+        for src in ['M 1', 'L 1,2', 'M 1,2 H 1,', 'M 1,2 z,', 'M 1e,2', 'x M 1,2',
+                    'M 1,2 A 1 1 0 1 1 3,3', 'M 1,2 L +-3,4', 'M 1,2 C 1,2 3,4']:
+            with self.subTest(src=src):
+                with self.assertRaises(F._Fallback):
+                    F._tokenize(src)
+
+    def test_transform_d(self):
+        for src, (i, t), prec in itertools.product(self.srcs, enumerate(self.transforms), [0, 3, 6]):
+            with temporary_precision(prec):
+                for rr, ra in [(False, False), (True, False), (False, True)]:
+                    with self.subTest(src=src, t=i, prec=prec, rr=rr, ra=ra):
+                        self.assertEqual(
+                            PD.transform_d(src, t, noexception=True, repr_relative=rr, repr_absolute=ra),
+                            _transform_objects(src, t, rr, ra, noexception=True))
+
+    def test_normalize_d(self):
+        for src, (i, t), prec in itertools.product(self.srcs, enumerate([None] + self.transforms), [0, 6]):
+            with temporary_precision(prec):
+                for rr, hv, imp in itertools.product([False, True], repeat=3):
+                    kw = dict(repr_relative=rr, collapse_hv_lineto=hv, allow_implicit_lineto=imp)
+                    if t is not None and not hv and any(c in src for c in 'hHvV'):
+                        continue
+                    with self.subTest(src=src, t=i, prec=prec, **kw):
+                        self.assertEqual(PD.normalize_d(src, transform=t, **kw),
+                                         _normalize_objects(src, t, **kw))
+
+    def test_random(self):
+        rnd = random.Random(0)
+        def num():
+            return f'{rnd.uniform(-50, 50):.{rnd.randint(0, 8)}f}'
+        t = self.transforms[2]
+        for _ in range(100):
+            src = f'{rnd.choice("Mm")} {num()},{num()}'
+            for _ in range(rnd.randint(0, 10)):
+                fn = rnd.choice('MmLlHhVvCcSsQqTtZz')
+                n = {'m': 2, 'l': 2, 't': 2, 'c': 6, 's': 4, 'q': 4, 'h': 1, 'v': 1, 'z': 0}[fn.lower()]
+                src += f' {fn} ' + ' '.join(num() for _ in range(n * rnd.randint(1, 2) if n else 0))
+            with self.subTest(src=src):
+                self.assertEqual(PD.transform_d(src, t, collapse_hv_lineto=True, repr_relative=True),
+                                 _transform_objects(src, t, True, collapse_hv_lineto=True))
+                self.assertEqual(PD.normalize_d(src), _normalize_objects(src))
+
+    def test_fallback(self):
+        PD.precision(3)
+        src = 'm 30,45 a 20 20 0 11 20,0 z m 20,0 a 25 15 25 11 -20,0 24 12 345 10 20,0 m 5,-20 -30,0 m 15,0 0,15'
+        t = self.transforms[1]
+        self.assertEqual(PD.transform_d(src, t, noexception=True, collapse_elliptical_arc=True),
+                         _transform_objects(src, t, noexception=True, collapse_elliptical_arc=True))
+        self.assertEqual(PD.normalize_d(src, collapse_elliptical_arc=True),
+                         _normalize_objects(src, collapse_elliptical_arc=True))
+
+        with self.assertRaises(PDTransformFailed):
+            PD.transform_d(self.srcs[0], t)
+        with self.assertRaises(PDTransformFailed):
+            PD.normalize_d(self.srcs[0], transform=t)
+        with self.assertRaises(Exception) as cm:
+            PD.normalize_d('M 1,2 L 3')
+        self.assertEqual(str(cm.exception), "could not convert string to float: ''")
+
+
+if __name__ == '__main__':
+    unittest.main()
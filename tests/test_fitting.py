@@ -0,0 +1,76 @@
+import unittest, math
+
+import svgpdtools as PD
+from svgpdtools.fitting import fit_cubics
+
+
+def _sampled(cubics, n=50):
+    ps = []
+    for x0, y0, x1, y1, x2, y2, x3, y3 in cubics:
+        for i in range(n + 1):
+            t = i / n
+            mt = 1 - t
+            ps.append((mt**3*x0 + 3*mt*mt*t*x1 + 3*mt*t*t*x2 + t**3*x3,
+                       mt**3*y0 + 3*mt*mt*t*y1 + 3*mt*t*t*y2 + t**3*y3))
+    return ps
+
+
+def _distance_to_segment(px, py, ax, ay, bx, by):
+    dx, dy = bx - ax, by - ay
+    d2 = dx * dx + dy * dy
+    t = 0 if d2 == 0 else max(0, min(1, ((px - ax) * dx + (py - ay) * dy) / d2))
+    return math.hypot(px - ax - t * dx, py - ay - t * dy)
+
+
+class TestFitting(unittest.TestCase):
+    def setUp(self):
+        PD.precision(6)
+
+    def test_circle(self):
+        n = 400
+        xs = [100 * math.cos(2 * math.pi * i / n) for i in range(n + 1)]
+        ys = [100 * math.sin(2 * math.pi * i / n) for i in range(n + 1)]
+        cubics = fit_cubics(xs, ys, .05)
+        self.assertLess(len(cubics), 20)
+        self.assertEqual(cubics[0][:2], (xs[0], ys[0]))
+        self.assertEqual(cubics[-1][-2:], (xs[-1], ys[-1]))
+        for a, b in zip(cubics, cubics[1:]):
+            self.assertEqual(a[-2:], b[:2])
+
+        ps = _sampled(cubics)
+        for x, y in zip(xs, ys):
+            d = min(_distance_to_segment(x, y, *a, *b) for a, b in zip(ps, ps[1:]))
+            self.assertLess(d, .05)
+
+    def test_corners(self):
+        xs = [i for i in range(11)] + [10] * 10
+        ys = [0] * 11 + [i for i in range(1, 11)]
+        cubics = fit_cubics(xs, ys, .01)
+        self.assertIn((10, 0), [c[-2:] for c in cubics])
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            fit_cubics([0, 1], [0, 1], 0)
+        self.assertEqual(fit_cubics([1, 1], [2, 2], 1), [])
+
+    def test_pathdata(self):
+        n = 100
+        d = 'M 0,0 ' + ' '.join(f'L {i},{math.sin(i / 10) * 10}' for i in range(1, n + 1)) + ' C 1,2 3,4 5,6 L 7,8'
+        pd = PD.pathdata_from_string(d)
+        pd.fit_curves(.01)
+        self.assertEqual([cmd.fn for cmd in pd], ['M', 'C', 'C', 'L'])
+        self.assertAlmostEqual(pd[1].end_point.x, 100)
+
+        # short runs are kept
+        src = 'M 0,0 L 10,0 10,10 0,10 Z'
+        pd = PD.pathdata_from_string(src)
+        pd.fit_curves(.1)
+        self.assertEqual(str(pd), src)
+
+    def test_normalize_d(self):
+        d = 'm 0,0 ' + ' '.join(f'{math.cos(i / 10):.6f},{math.sin(i / 10):.6f}' for i in range(60))
+        self.assertTrue(PD.normalize_d(d, fit_curves=.01).startswith('M 0,0 C '))
+
+
+if __name__ == '__main__':
+    unittest.main()
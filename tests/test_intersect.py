@@ -0,0 +1,143 @@
+import unittest, math, random
+
+import svgpdtools as PD
+from svgpdtools.intersect import Intersection, intersections_many, _curves, _swept_pairs
+
+
+def _line_crossing(p, q):
+    (x0, y0), (x1, y1) = p
+    (x2, y2), (x3, y3) = q
+    det = (x1 - x0) * (y3 - y2) - (y1 - y0) * (x3 - x2)
+    if det == 0:
+        return None
+    s = ((x2 - x0) * (y3 - y2) - (y2 - y0) * (x3 - x2)) / det
+    u = ((x2 - x0) * (y1 - y0) - (y2 - y0) * (x1 - x0)) / det
+    if 0 <= s <= 1 and 0 <= u <= 1:
+        return s, u
+    return None
+
+
+class TestIntersect(unittest.TestCase):
+    def test_lines(self):
+        a = PD.pathdata_from_string('M 0,0 L 10,10')
+        b = PD.pathdata_from_string('M 0,10 L 10,0 L 20,0')
+        self.assertEqual(a.intersections(b), [Intersection(1, .5, 1, .5, 5, 5)])
+        self.assertEqual(a.intersections(PD.pathdata_from_string('M 0,1 L 10,11')), [])
+
+        # touching at an end
+        xs = PD.pathdata_from_string('M 0,0 L 10,0').intersections(PD.pathdata_from_string('M 5,0 L 5,5'))
+        self.assertEqual(xs, [Intersection(1, .5, 1, 0, 5, 0)])
+
+        # collinear overlaps have no isolated points
+        self.assertEqual(PD.pathdata_from_string('M 0,0 L 10,0').intersections(
+            PD.pathdata_from_string('M 5,0 L 15,0')), [])
+
+    def test_random_lines(self):
+        rnd = random.Random(3)
+        lines = [((rnd.uniform(0, 100), rnd.uniform(0, 100)), (rnd.uniform(0, 100), rnd.uniform(0, 100)))
+                 for _ in range(40)]
+        pds = [PD.pathdata_from_string('M {},{} L {},{}'.format(*p, *q)) for p, q in lines]
+        expected = set()
+        for i in range(len(lines)):
+            for j in range(i + 1, len(lines)):
+                if _line_crossing(lines[i], lines[j]) is not None:
+                    expected.add((i, j))
+        found = intersections_many(pds)
+        self.assertEqual({(i, j) for i, j, _ in found}, expected)
+        for i, j, x in found:
+            s, u = _line_crossing(lines[i], lines[j])
+            self.assertAlmostEqual(x.ta, s)
+            self.assertAlmostEqual(x.tb, u)
+
+    def test_curves(self):
+        c = PD.pathdata_from_string('M 0,5 C 3,-5 7,15 10,5')
+        xs = c.intersections(PD.pathdata_from_string('M 0,0 L 10,10'))
+        self.assertEqual(len(xs), 3)
+        for x in xs:
+            self.assertAlmostEqual(x.x, x.y)
+            self.assertAlmostEqual(x.ta, x.tb, delta=.02)
+        self.assertAlmostEqual(xs[1].x, 5)
+
+        q = PD.pathdata_from_string('M 0,0 Q 5,10 10,0')
+        xs = q.intersections(PD.pathdata_from_string('M 0,4.9 L 10,4.9'))
+        self.assertEqual([round(x.x, 9) for x in xs], [round(5 - math.sqrt(.5), 9), round(5 + math.sqrt(.5), 9)])
+        # a tangency
+        xs = q.intersections(PD.pathdata_from_string('M 0,5 L 10,5'))
+        self.assertEqual(len(xs), 1)
+        self.assertAlmostEqual(xs[0].x, 5, places=4)
+        self.assertAlmostEqual(xs[0].y, 5)
+
+        a = PD.pathdata_from_string('M 0,0 C 10,10 0,10 10,0')
+        xs = a.intersections(PD.pathdata_from_string('M 0,5 C 10,-5 0,-5 10,5'))
+        self.assertEqual(len(xs), 2)
+        for x in xs:
+            self.assertAlmostEqual(x.y, 2.5)
+
+    def test_arcs(self):
+        circle = PD.pathdata_from_string('M 5,0 A 5,5 0 1 1 -5,0 A 5,5 0 1 1 5,0')
+        xs = circle.intersections(PD.pathdata_from_string('M -10,3 L 10,3'))
+        self.assertEqual([(round(x.x, 12), round(x.y, 12)) for x in xs], [(4, 3), (-4, 3)])
+        for x in xs:
+            # on the exact circle, not on its cubic approximation
+            self.assertAlmostEqual(math.hypot(x.x, x.y), 5, places=12)
+
+    def test_near_tangent(self):
+        # y = x^2 crossing y = eps at +-sqrt(eps)
+        q = PD.pathdata_from_string('M -1,1 Q 0,-1 1,1')
+        for eps in (1e-4, 1e-6, 1e-8):
+            xs = q.intersections(PD.pathdata_from_string(f'M -2,{eps} L 2,{eps}'))
+            self.assertEqual(len(xs), 2)
+            for x, sign in zip(xs, (-1, 1)):
+                self.assertAlmostEqual(x.x, sign * math.sqrt(eps), delta=1e-9)
+
+        # curves apart by 2.5e-7 at the least, which need many subdivisions
+        a = PD.pathdata_from_string('M 0,0 C 1,1 2,1 3,0')
+        self.assertEqual(a.intersections(PD.pathdata_from_string('M 0,1e-6 C 1,1 2,1 3,1e-6')), [])
+        xs = a.intersections(PD.pathdata_from_string('M 0,1.5 C 1,.5 2,.5 3,1.5'))
+        self.assertTrue(xs)
+        for x in xs:
+            self.assertAlmostEqual(x.x, 1.5, places=6)
+            self.assertAlmostEqual(x.y, .75, places=9)
+
+        # curves within the tolerance for a while are not cut short silently
+        with self.assertRaises(Exception):
+            a.intersections(PD.pathdata_from_string('M 0,1e-9 C 1,1 2,1 3,1e-9'))
+
+    def test_many(self):
+        a = PD.pathdata_from_string('M 0,0 L 10,10')
+        b = PD.pathdata_from_string('M 0,10 L 10,0')
+        c = PD.pathdata_from_string('M 0,5 C 3,-5 7,15 10,5')
+        found = intersections_many([a, b, c])
+        self.assertEqual([(i, j) for i, j, _ in found], [(0, 1), (0, 2), (0, 2), (0, 2), (1, 2)])
+        # the point (5, 5) shared by all of them is found for every pair
+        for _, _, x in (found[0], found[2], found[4]):
+            self.assertAlmostEqual(x.x, 5)
+            self.assertAlmostEqual(x.y, 5)
+
+        found = intersections_many([a], [b, c])
+        self.assertEqual([(i, j) for i, j, _ in found], [(0, 0), (0, 1), (0, 1), (0, 1)])
+
+        with self.assertRaises(ValueError):
+            intersections_many([a, b], tolerance=0)
+
+    def test_swept_pairs(self):
+        rnd = random.Random(7)
+        pds = []
+        for _ in range(60):
+            x, y = rnd.uniform(0, 100), rnd.uniform(0, 100)
+            pds.append(PD.pathdata_from_string(f'M {x},{y} l {rnd.uniform(-15, 15)},{rnd.uniform(-15, 15)} '
+                                               f'q {rnd.uniform(-15, 15)},{rnd.uniform(-15, 15)} 5,5'))
+        items = [c for i, pd in enumerate(pds) for c in _curves(pd, i)]
+
+        def overlap(c, d):
+            return c.box[0] <= d.box[2] and d.box[0] <= c.box[2] and \
+                c.box[1] <= d.box[3] and d.box[1] <= c.box[3]
+
+        expected = {frozenset((id(c), id(d))) for k, c in enumerate(items) for d in items[k+1:] if overlap(c, d)}
+        pairs = [frozenset((id(c), id(d))) for c, d in _swept_pairs(items, items)]
+        self.assertEqual(len(pairs), len(set(pairs)))
+        self.assertEqual(set(pairs), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest, contextlib, io, math, pathlib, tempfile
+
+import svgpdtools as PD
+from svgpdtools.lod import Level, level_strings
+import svgpdtools.terminal_command as CMD
+
+
+_SVG = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 10 10">
+<path id="p" d="m 0,0 1.0001,0.0002 1,0.05 1,-0.0502 c 1,4 2.12345,5.12345 3,6"/>
+</svg>'''
+
+
+class TestLOD(unittest.TestCase):
+    def setUp(self):
+        PD.precision(6)
+
+    def test_level(self):
+        self.assertEqual(Level.from_string('0.5:2'), Level(.5, 2))
+        self.assertEqual(Level.from_string('1'), Level(1.))
+        with self.assertRaises(ValueError):
+            Level.from_string('a:1')
+        with self.assertRaises(ValueError):
+            Level(-1, 2)
+
+    def test_level_strings(self):
+        d = 'M 0,0 ' + ' '.join(f'L {i / 7:.4f},{math.sin(i / 20) * 10:.4f}' for i in range(1, 200))
+        pd = PD.pathdata_from_string(d)
+        pd.normalize()
+        src = str(pd)
+        ds = level_strings(pd, [Level(0, 4), Level(.05, 3), Level(.5, 1), Level(2, 0)])
+        self.assertEqual(str(pd), src)
+        self.assertLessEqual(len(ds[0]), len(src))
+        for coarse, fine in zip(ds[1:], ds):
+            self.assertLess(len(coarse), len(fine))
+        self.assertEqual(ds[-1], 'M 0,0 L 5,10 14,-10 23,10 28,-5')
+
+    def _run(self, args: str) -> str:
+        stream = io.StringIO()
+        with tempfile.TemporaryDirectory() as tmp:
+            src = pathlib.Path(tmp) / 'src.svg'
+            src.write_text(_SVG)
+            with contextlib.redirect_stdout(stream):
+                CMD.main(f'lod -f {src} {args}'.replace('{tmp}', tmp).split())
+            outputs = sorted(pathlib.Path(tmp).glob('out-*.svg'))
+            return stream.getvalue() + ''.join(p.read_text() for p in outputs)
+
+    def test_siblings(self):
+        out = self._run('--levels 0:4 0.1:1')
+        self.assertIn('<path id="p" d="M 0,0 L 1.0001,0.0002 2.0001,0.0502 3.0001,0 C 4.0001,4 5.1235,5.1235 6.0001,6" data-lod="0"/>'
+                      '<path id="p-lod1" d="M 0,0 H 3 C 4,4 5.1,5.1 6,6" data-lod="1"/>', out)
+
+    def test_default_precision(self):
+        # a level without a precision takes that of -p
+        out = self._run('--levels 0 -p 2')
+        self.assertIn('<path id="p" d="M 0,0 H 1 L 2,0.05 3,0 C 4,4 5.12,5.12 6,6" data-lod="0"/>', out)
+
+    def test_files(self):
+        out = self._run('--levels 0:4 0.1:1 -r -o {tmp}/out-{level}.svg')
+        self.assertIn('<path id="p" d="m 0,0 l 1.0001,0.0002 1,0.05 1,-0.0502 c 1,4 2.1235,5.1235 3,6"/>', out)
+        self.assertIn('<path id="p" d="m 0,0 h 3 c 1,4 2.1,5.1 3,6"/>', out)
+
+    def test_clip(self):
+        out = self._run('--levels 0:4 --clip-rect 0 0 10 10 --clip-split')
+        self.assertIn('<path id="p" d="M 0,0 L 1.0001,0.0002 2.0001,0.0502 3.0001,0 C 4.0001,4 5.1235,5.1235 6.0001,6" data-lod="0"/>', out)
+        out = self._run('--levels 0:4 0.1:1 --clip-rect 0 0 2.5 10 --clip-split')
+        self.assertIn('<path id="p-lod1" d="M 0,0 H 2.5" data-lod="1"/>', out)
+
+    def test_errors(self):
+        for args in ('--levels 0:4 0.1:1 -o {tmp}/out.svg',
+                     '--levels 0:4 0.1:1 --simplify 0.1',
+                     '--levels 0:4 --target-size 16'):
+            with self.subTest(args=args):
+                with self.assertRaises(SystemExit) as cm, contextlib.redirect_stderr(io.StringIO()):
+                    self._run(args)
+                self.assertEqual(cm.exception.code, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
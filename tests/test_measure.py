@@ -0,0 +1,74 @@
+import unittest, math
+
+import svgpdtools as PD
+import svgpdtools.measure as M
+from svgpdtools.segments import prepared_segment
+
+
+def _polyline_length(pd: PD.PathData) -> float:
+    coords, offsets = pd.flatten(1e-5)
+    total = 0.
+    for i in range(len(offsets) - 1):
+        for j in range(offsets[i], offsets[i+1] - 1):
+            total += math.hypot(coords[j*2+2] - coords[j*2], coords[j*2+3] - coords[j*2+1])
+    return total
+
+
+class TestMeasure(unittest.TestCase):
+    def setUp(self):
+        PD.precision(6)
+        self.src = 'M 0,0 C 0,100 100,100 100,0 S 150,-50 200,0 Q 250,50 300,0 t 50,0 A 80 60 30 1 0 400,100 h -50 z'
+
+    def test_circle(self):
+        pd = PD.pathdata_from_string('M 0,0 a 10 10 0 1 1 0,20 a 10 10 0 1 1 0,-20')
+        self.assertAlmostEqual(pd.length(), 20 * math.pi, places=9)
+
+    def test_length_against_polyline(self):
+        pd = PD.pathdata_from_string(self.src)
+        self.assertAlmostEqual(pd.length(), _polyline_length(pd), places=3)
+        self.assertEqual(len(pd.segment_lengths()), len(list(pd.segments())))
+        self.assertAlmostEqual(sum(pd.segment_lengths()), pd.length(), places=9)
+        self.assertEqual(pd.segment_lengths()[0], 0.)
+
+    def test_point_at_length(self):
+        pd = PD.pathdata_from_string(self.src)
+        lengths = pd.segment_lengths()
+        acc = 0.
+        for seg, n in zip(pd.segments(), lengths):
+            acc += n
+            x, y = seg[-2:]
+            p = pd.point_at_length(acc)
+            self.assertAlmostEqual(p.x, x, places=6)
+            self.assertAlmostEqual(p.y, y, places=6)
+
+        self.assertEqual(pd.point_at_length(-1), PD.graphics.Point(0, 0))
+        self.assertEqual(pd.point_at_length(pd.length() + 1), PD.graphics.Point(0, 0))
+
+        # the length up to a found parameter is the given length
+        seg = prepared_segment(list(pd.segments())[1])
+        for s in (1., 50., 123.4, 199.):
+            t = M._param_at(seg, s, lengths[1])
+            self.assertAlmostEqual(M._length(seg, 0., t), s, places=6)
+
+    def test_sample(self):
+        pd = PD.pathdata_from_string('M 0,0 L 100,0 L 100,100')
+        ps = pd.sample(5)
+        self.assertEqual([tuple(p) for p in ps], [(0, 0), (50, 0), (100, 0), (100, 50), (100, 100)])
+        self.assertEqual(pd.sample(0), [])
+        self.assertEqual(pd.sample(1), [PD.graphics.Point(0, 0)])
+
+    def test_cache(self):
+        pd = PD.pathdata_from_string('M 0,0 L 100,0')
+        self.assertEqual(pd.length(), 100)
+        self.assertIs(pd._length_index(), pd._length_index())
+        pd.transform(PD.Transform.scale(2))
+        self.assertEqual(pd.length(), 200)
+
+    def test_empty(self):
+        self.assertEqual(PD.PathData().length(), 0.)
+        with self.assertRaises(Exception):
+            PD.PathData().point_at_length(0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+import svgpdtools as PD
+from svgpdtools.utils import temporary_precision
+
+
+def _optimized(d: str) -> str:
+    pd = PD.pathdata_from_string(d)
+    pd.optimize()
+    return str(pd)
+
+
+class TestOptimize(unittest.TestCase):
+    def setUp(self):
+        PD.precision(6)
+
+    def test_lines(self):
+        self.assertEqual(_optimized('M 0,0 L 0,0 5,0 10,0 10,10 0,10 0,0 Z'), 'M 0,0 H 10 V 10 H 0 Z')
+        # a turning back is kept
+        self.assertEqual(_optimized('M 0,0 L 10,0 5,0'), 'M 0,0 H 10 5')
+        self.assertEqual(_optimized('M 0,0 L 1,1 2,2 3,3.0000001 4,5'), 'M 0,0 L 3,3 4,5')
+        self.assertEqual(_optimized('m 0,0 l 2,0 1,0 z z'), 'm 0,0 h 3 z')
+
+    def test_gentle_curve(self):
+        # each point is on the line between its neighbours, but the run is
+        # not on one line
+        d = 'M 0,0 L ' + ' '.join(f'{x},{1e-6 * x * x:.9f}' for x in range(1, 2001))
+        with temporary_precision(3):
+            pd = PD.pathdata_from_string(d)
+            pd.optimize()
+            points = [tuple(p) for cmd in pd for p in cmd.data]
+            self.assertGreater(len(points), 5)
+            for x in range(2001):
+                y = 1e-6 * x * x
+                k = next(k for k in range(1, len(points)) if points[k][0] >= x)
+                (x0, y0), (x1, y1) = points[k-1], points[k]
+                self.assertLessEqual(abs(y0 + (y1 - y0) * (x - x0) / (x1 - x0) - y), 5e-4)
+
+    def test_curves(self):
+        self.assertEqual(_optimized('M 0,0 C 1,1 2,2 3,3 c 1,0 2,0 3,0 Q 20,3 30,3'), 'M 0,0 L 3,3 H 30')
+        self.assertEqual(_optimized('M 0,0 C 0,1 1,1 1,0 Q 2,0 2,1'), 'M 0,0 C 0,1 1,1 1,0 Q 2,0 2,1')
+        # the shorthand is resolved
+        self.assertEqual(_optimized('M 0,0 C 0,1 1,1 1,0 S 3,-1 3,0'), 'M 0,0 C 0,1 1,1 1,0 1,-1 3,-1 3,0')
+        self.assertEqual(_optimized('M 0,0 A 5 5 0 0 1 10,0 5 5 0 0 1 20,0 L 30,0.0000001'),
+                         'M 0,0 A 5 5 0 0 1 10,0 5 5 0 0 1 20,0 H 30')
+
+    def test_movetos(self):
+        self.assertEqual(_optimized('M 0,0 M 1,1 L 2,2 M 3,3 M 4,4 L 5,4 M 6,6'), 'M 1,1 L 2,2 M 4,4 H 5')
+        # dots are kept
+        self.assertEqual(_optimized('M 0,0 L 0,0'), 'M 0,0 L 0,0')
+        self.assertEqual(_optimized('M 0,0 Z M 1,1 L 1,1 Z'), 'M 0,0 Z M 1,1 Z')
+
+    def test_precision(self):
+        with temporary_precision(2):
+            self.assertEqual(_optimized('M 0,0 L 0.001,0.002 L 10,0.003'), 'M 0,0 H 10')
+
+    def test_normalize_d(self):
+        self.assertEqual(PD.normalize_d('m 0,0 0,0 5,0 5,0 h 0 v 10 z', optimize=True), 'M 0,0 H 10 V 10 Z')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,4 @@
-import unittest
+import unittest, math
 import svgpdtools as PD
 
 
@@ -79,6 +79,34 @@ class TestPD(unittest.TestCase):
         self.assertEqual(str(self.pd3),
                          'M 30,45 A 20 20 0 1 1 50,45 Z M 50,45 A 25 15 25 1 1 30,45 24 12 345 1 0 50,45 M 55,25 L 25,25 M 40,25 L 40,40')
         
+    def test_out_of_range_radii(self):
+        # radii too small to reach the end point are scaled up (F.6.6)
+        PD.precision(3)
+        pd = PD.pathdata_from_string('M 0,0 A 5 5 0 0 0 40,0')
+        self.assertEqual(str(pd), 'M 0,0 A 5 5 0 0 0 40,0')
+        pd.normalize(collapse_elliptical_arc=True)
+        # a half circle of the radius 20 around (20, 0)
+        points = pd.data[1].data
+        self.assertEqual(len(points), 12)
+        for p in points[2::3]:
+            self.assertAlmostEqual(math.hypot(p.x - 20, p.y), 20, places=5)
+        pd = PD.pathdata_from_string('M 0,0 A 5 2 30 1 1 40,0')
+        pd.transform(PD.transform_from_string('rotate(30) scale(2)'), collapse_elliptical_arc=True)
+        self.assertEqual(str(pd).split()[-1], '69.282,40')
+
+    def test_normalize_implicit_lineto_relative(self):
+        PD.precision(0)
+        self.pd3.normalize(repr_relative=True)
+        self.assertEqual(str(self.pd3),
+                         'm 30,45 a 20 20 0 1 1 20,0 z m 20,0 a 25 15 25 1 1 -20,0 24 12 345 1 0 20,0 m 5,-20 l -30,0 m 15,0 l 0,15')
+
+    def test_normalize_collapse_into_previous(self):
+        PD.precision(0)
+        pd = PD.pathdata_from_string('m 0,0 10,0 h 10 v 10 l -5,5 h -5 z')
+        pd.normalize(collapse_hv_lineto=True)
+        self.assertEqual(str(pd), 'M 0,0 L 10,0 20,0 20,10 15,15 10,15 Z')
+        self.assertEqual(len(pd), 3)
+
     def test_absolutize(self):
         PD.precision(0)
         self.pd1.absolutize()
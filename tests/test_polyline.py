@@ -0,0 +1,109 @@
+import unittest, math, random, sys
+from unittest import mock
+
+import svgpdtools as PD
+import svgpdtools.polyline as P
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _distance_to_segment(px, py, ax, ay, bx, by):
+    dx, dy = bx - ax, by - ay
+    d2 = dx * dx + dy * dy
+    t = 0 if d2 == 0 else max(0, min(1, ((px - ax) * dx + (py - ay) * dy) / d2))
+    return math.hypot(px - ax - t * dx, py - ay - t * dy)
+
+
+class TestPolyline(unittest.TestCase):
+    def setUp(self):
+        PD.precision(6)
+        self.rnd = random.Random(0)
+
+    def _random_pathdata(self, count: int) -> list[PD.PathData]:
+        u = lambda: self.rnd.uniform(-100, 100)
+        pds = []
+        for _ in range(count):
+            d = f'M {u()},{u()}'
+            for _ in range(10):
+                d += self.rnd.choice([f' C {u()},{u()} {u()},{u()} {u()},{u()}',
+                                      f' Q {u()},{u()} {u()},{u()}', f' L {u()},{u()}',
+                                      f' A 300 200 {u()} 0 1 {u()},{u()}', ' z', f' M {u()},{u()}'])
+            pds.append(PD.pathdata_from_string(d))
+        return pds
+
+    def test_subpaths(self):
+        pd = PD.pathdata_from_string('M 0,0 L 10,0 10,10 Z l 5,5 M 20,20 h 5 v 5')
+        coords, offsets = pd.flatten()
+        self.assertEqual(coords.tolist(), [0, 0, 10, 0, 10, 10, 0, 0, 0, 0, 5, 5, 20, 20, 25, 20, 25, 25])
+        self.assertEqual(offsets.tolist(), [0, 4, 6, 9])
+
+    def test_tolerance(self):
+        for tolerance in (1., .1, .01):
+            for seg in [('C', 0, 0, 0, 100, 100, 100, 100, 0), ('Q', 0, 0, 50, 100, 100, 0),
+                        ('A', 0, 0, 60, 40, 30, True, False, 100, 0)]:
+                pd = PD.pathdata_from_string(f'M 0,0 {seg[0]} ' + ' '.join(str(int(n)) for n in seg[3:]))
+                coords, _ = pd.flatten(tolerance)
+                ps = list(zip(coords[::2], coords[1::2]))
+                # the middles of the pieces are within the tolerance
+                for (ax, ay), (bx, by) in zip(ps, ps[1:]):
+                    mx, my = _point_between(seg, ps, (ax, ay), (bx, by))
+                    self.assertLessEqual(_distance_to_segment(mx, my, ax, ay, bx, by), tolerance * 1.0001)
+
+    def test_invalid_tolerance(self):
+        with self.assertRaises(ValueError):
+            PD.pathdata_from_string('M 0,0 L 1,1').flatten(0)
+
+    def test_flatten_many(self):
+        pds = self._random_pathdata(20)
+        pds.insert(3, PD.PathData())
+        with mock.patch.dict(sys.modules, {'numpy': None}):
+            coords, offsets, path_offsets = P.flatten_many(pds, .1)
+        for i, pd in enumerate(pds):
+            cs, offs = pd.flatten(.1)
+            sub = offsets[path_offsets[i]:path_offsets[i+1]+1]
+            if not len(pd):
+                self.assertEqual(path_offsets[i], path_offsets[i+1])
+                continue
+            self.assertEqual(coords[sub[0]*2:sub[-1]*2].tolist(), cs.tolist())
+            self.assertEqual([o - sub[0] for o in sub], offs.tolist())
+
+    @unittest.skipUnless(numpy, 'numpy is not installed')
+    def test_flatten_many_numpy(self):
+        pds = self._random_pathdata(50)
+        pds.insert(3, PD.PathData())
+        result = P.flatten_many(pds, .05)
+        with mock.patch.dict(sys.modules, {'numpy': None}):
+            expected = P.flatten_many(pds, .05)
+        self.assertEqual(result[1], expected[1])
+        self.assertEqual(result[2], expected[2])
+        self.assertEqual(len(result[0]), len(expected[0]))
+        for v1, v2 in zip(result[0], expected[0]):
+            self.assertAlmostEqual(v1, v2, places=9)
+
+
+def _point_between(seg, ps, a, b):
+    # the point of the middle parameter between the ends of a piece
+    n = len(ps) - 1
+    i = ps.index(a)
+    t = (i + .5) / n
+    mt = 1 - t
+    if seg[0] == 'C':
+        _, x0, y0, x1, y1, x2, y2, x3, y3 = seg
+        return (mt**3*x0 + 3*mt*mt*t*x1 + 3*mt*t*t*x2 + t**3*x3,
+                mt**3*y0 + 3*mt*mt*t*y1 + 3*mt*t*t*y2 + t**3*y3)
+    if seg[0] == 'Q':
+        _, x0, y0, x1, y1, x2, y2 = seg
+        return mt*mt*x0 + 2*mt*t*x1 + t*t*x2, mt*mt*y0 + 2*mt*t*y1 + t*t*y2
+    _, x0, y0, rx, ry, rot, fa, fs, x, y = seg
+    phi = math.radians(rot)
+    cx, cy, rx, ry, theta1, dtheta = P.center_parameterization(x0, y0, rx, ry, phi, fa, fs, x, y)
+    theta = theta1 + dtheta * t
+    return (cx + rx*math.cos(phi)*math.cos(theta) - ry*math.sin(phi)*math.sin(theta),
+            cy + rx*math.sin(phi)*math.cos(theta) + ry*math.cos(phi)*math.sin(theta))
+
+
+if __name__ == '__main__':
+    unittest.main()
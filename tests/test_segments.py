@@ -0,0 +1,54 @@
+import unittest
+from array import array
+
+import svgpdtools as PD
+
+
+class TestSegments(unittest.TestCase):
+    def setUp(self):
+        PD.precision(6)
+
+    def test_records(self):
+        pd = PD.pathdata_from_string('m 10,20 10,-10 v 60 h 5 z a 5 5 0 1 0 3,3')
+        self.assertEqual(list(pd.segments()), [
+            ('M', 10., 20.),
+            ('L', 10., 20., 20., 10.),
+            ('L', 20., 10., 20., 70.),
+            ('L', 20., 70., 25., 70.),
+            ('Z', 25., 70., 10., 20.),
+            ('A', 10., 20., 5., 5., 0., True, False, 13., 23.),
+        ])
+
+    def test_shorthand_reflection(self):
+        pd = PD.pathdata_from_string('M 0,0 C 0,10 10,10 10,0 S 20,-10 20,0 L 30,0 S 40,10 40,0 Q 45,10 50,0 T 60,0')
+        self.assertEqual(list(pd.segments())[1:], [
+            ('C', 0., 0., 0., 10., 10., 10., 10., 0.),
+            ('C', 10., 0., 10., -10., 20., -10., 20., 0.),
+            ('L', 20., 0., 30., 0.),
+            ('C', 30., 0., 30., 0., 40., 10., 40., 0.),
+            ('Q', 40., 0., 45., 10., 50., 0.),
+            ('Q', 50., 0., 55., -10., 60., 0.),
+        ])
+
+    def test_relative_equals_absolute(self):
+        src = 'm 10,20 10,-10 v 60 m -10,0 l 20,0 m 20,-60 c -10,0 -20,10 -20,30 s 10,30 20,30 q 10,0 10,-10 t 0,-20 z m 0,10 v 40'
+        pd = PD.pathdata_from_string(src)
+        absolutized = PD.pathdata_from_string(src)
+        absolutized.absolutize()
+        self.assertEqual(list(pd.segments()), list(absolutized.segments()))
+        self.assertEqual(str(pd), str(PD.pathdata_from_string(src)))
+
+    def test_buffers(self):
+        pd = PD.pathdata_from_string('M 1,2 L 3,4 Q 5,6 7,8 Z')
+        ops, coords = pd.segment_buffers()
+        self.assertEqual(ops, b'MLQZ')
+        self.assertEqual(coords.tolist(), [1., 2., 1., 2., 3., 4., 3., 4., 5., 6., 7., 8., 7., 8., 1., 2.])
+
+        ops2, coords2 = bytearray(b'X'), array('d', [0.])
+        self.assertIs(pd.segment_buffers(ops2, coords2)[0], ops2)
+        self.assertEqual(ops2, b'XMLQZ')
+        self.assertEqual(len(coords2), 1 + sum(PD.segments.SEGMENT_SIZES[chr(op)] for op in ops))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+import svgpdtools as PD
+from svgpdtools.utils import temporary_precision
+
+
+def _shorthand(d: str) -> str:
+    pd = PD.pathdata_from_string(d)
+    pd.shorthand_curves()
+    return str(pd)
+
+
+class TestShorthand(unittest.TestCase):
+    def setUp(self):
+        PD.precision(6)
+
+    def test_smooth_curveto(self):
+        self.assertEqual(_shorthand('M 0,0 C 0,1 1,1 1,0 C 1,-1 2,-1 2,0'), 'M 0,0 C 0,1 1,1 1,0 S 2,-1 2,0')
+        self.assertEqual(_shorthand('M 0,0 C 0,1 1,1 1,0 2,-1 3,-1 3,0'), 'M 0,0 C 0,1 1,1 1,0 2,-1 3,-1 3,0')
+        # the first control point of S after a non-curve is the current point
+        self.assertEqual(_shorthand('M 0,0 L 1,1 C 1,1 2,3 3,1'), 'M 0,0 L 1,1 S 2,3 3,1')
+
+    def test_quadratic(self):
+        self.assertEqual(_shorthand('M 0,0 C 2,2 4,2 6,0 C 8,-2 10,-2 12,0'), 'M 0,0 Q 3,3 6,0 T 12,0')
+        self.assertEqual(_shorthand('M 0,0 Q 3,3 6,0 Q 9,-3 12,0 Z'), 'M 0,0 Q 3,3 6,0 T 12,0 Z')
+        self.assertEqual(_shorthand('m 0,0 c 2,2 4,2 6,0 s 4,-2 6,0'), 'm 0,0 q 3,3 6,0 t 6,0')
+
+    def test_precision(self):
+        src = 'M 0,0 C 0,1 1,1 1,0 C 1.002,-1 2,-1 2,0'
+        self.assertEqual(_shorthand(src), 'M 0,0 C 0,1 1,1 1,0 1.002,-1 2,-1 2,0')
+        with temporary_precision(2):
+            self.assertEqual(_shorthand(src), 'M 0,0 C 0,1 1,1 1,0 S 2,-1 2,0')
+
+    def test_normalize(self):
+        pd = PD.pathdata_from_string('m 0,0 c 2,2 4,2 6,0 c 2,-2 4,-2 6,0')
+        pd.normalize(use_shorthand=True)
+        self.assertEqual(str(pd), 'M 0,0 Q 3,3 6,0 T 12,0')
+        self.assertEqual(PD.normalize_d('m 0,0 c 0,1 1,1 1,0 c 0,-1 1,-1 1,0', use_shorthand=True),
+                         'M 0,0 C 0,1 1,1 1,0 S 2,-1 2,0')
+
+
+if __name__ == '__main__':
+    unittest.main()
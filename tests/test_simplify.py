@@ -0,0 +1,51 @@
+import unittest, math, sys
+from unittest import mock
+
+import svgpdtools as PD
+from svgpdtools.simplify import rdp_indexes
+
+
+class TestSimplify(unittest.TestCase):
+    def setUp(self):
+        PD.precision(6)
+
+    def test_rdp(self):
+        xs = [0, 1, 2, 3, 4, 5, 6]
+        ys = [0, .05, -.05, 2, .05, 0, 0]
+        self.assertEqual(rdp_indexes(xs, ys, .1), [0, 2, 3, 4, 6])
+        self.assertEqual(rdp_indexes(xs, ys, 3), [0, 6])
+        self.assertEqual(rdp_indexes([0, 1, 2], [0, 0, 0], 0), [0, 2])
+        self.assertEqual(rdp_indexes([0, 1], [0, 0], 1), [0, 1])
+        with self.assertRaises(ValueError):
+            rdp_indexes(xs, ys, -1)
+
+    def test_long_run(self):
+        # no recursion limit, and the same with or without NumPy
+        n = 20000
+        xs = [i * .01 for i in range(n)]
+        ys = [math.sin(i * .001) for i in range(n)]
+        indexes = rdp_indexes(xs, ys, .001)
+        with mock.patch.dict(sys.modules, {'numpy': None}):
+            self.assertEqual(rdp_indexes(xs, ys, .001), indexes)
+        self.assertLess(len(indexes), n // 10)
+
+    def test_pathdata(self):
+        pd = PD.pathdata_from_string('M 0,0 1,0.01 2,0 h 1 v 0.001 l 1,0 C 1,1 2,2 3,3 l 1,1 1,1 z m 10,10 l 1,1')
+        pd.simplify(.1)
+        self.assertEqual(str(pd), 'M 0,0 L 4,0.001 C 1,1 2,2 3,3 l 2,2 z m 10,10 l 1,1')
+
+        pd = PD.pathdata_from_string('m 0,0 1,0.01 2,0 h 1 v 0.001 l 1,0')
+        pd.simplify(.1)
+        self.assertEqual(str(pd), 'm 0,0 l 5,0.011')
+
+        src = 'M 0,0 L 10,0 10,10 0,10 Z'
+        pd = PD.pathdata_from_string(src)
+        pd.simplify(.1)
+        self.assertEqual(str(pd), src)
+
+    def test_normalize_d(self):
+        self.assertEqual(PD.normalize_d('m 0,0 1,0.01 2,0 h 1 v 0.001', simplify=.1), 'M 0,0 L 4,0.011')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest, math, random
+
+import svgpdtools as PD
+from svgpdtools.graphics import Rect
+from svgpdtools.spatial import GridIndex, RTreeIndex, segment_boxes, box_distance
+
+
+def _random_pathdata(rnd):
+    x, y = rnd.uniform(0, 1000), rnd.uniform(0, 1000)
+    d = f'M {x:.3f},{y:.3f}'
+    for _ in range(rnd.randint(1, 5)):
+        x += rnd.uniform(-30, 30)
+        y += rnd.uniform(-30, 30)
+        if rnd.random() < .5:
+            d += f' L {x:.3f},{y:.3f}'
+        else:
+            d += f' Q {x + 10:.3f},{y - 10:.3f} {x + 5:.3f},{y + 5:.3f}'
+            x, y = x + 5, y + 5
+    if rnd.random() < .1:
+        # a long segment
+        d += f' L {rnd.uniform(0, 1000):.3f},{rnd.uniform(0, 1000):.3f}'
+    return PD.pathdata_from_string(d + ' Z')
+
+
+class TestSpatial(unittest.TestCase):
+    def setUp(self):
+        rnd = random.Random(7)
+        self.pds = {i: _random_pathdata(rnd) for i in range(300)}
+        self.rnd = rnd
+
+    def _boxes(self):
+        return {(k, i): box for k, pd in self.pds.items() for i, box in segment_boxes(pd)}
+
+    def _indexes(self):
+        return [GridIndex(25.), GridIndex(100., max_cells=4), RTreeIndex(node_size=4)]
+
+    def _check(self, index, boxes):
+        self.assertEqual(len(index), len(boxes))
+        for _ in range(30):
+            x, y = self.rnd.uniform(-50, 1050), self.rnd.uniform(-50, 1050)
+            w, h = self.rnd.uniform(0, 100), self.rnd.uniform(0, 100)
+            rect = Rect(x, y, x + w, y + h)
+            expected = {e for e, b in boxes.items()
+                        if b[0] <= rect.max_x and rect.min_x <= b[2] and b[1] <= rect.max_y and rect.min_y <= b[3]}
+            self.assertEqual(set(index.query_rect(rect)), expected)
+
+            expected = {e for e, b in boxes.items() if box_distance(b, x, y) <= 2}
+            self.assertEqual(set(index.query_point(x, y, 2)), expected)
+
+            ds = sorted(box_distance(b, x, y) for b in boxes.values())
+            found = index.nearest(x, y, k=5)
+            self.assertEqual([d for d, _ in found], ds[:5])
+            for d, e in found:
+                self.assertEqual(box_distance(boxes[e], x, y), d)
+
+    def test_queries(self):
+        boxes = self._boxes()
+        for index in self._indexes():
+            for k, pd in self.pds.items():
+                index.insert(k, pd)
+            self._check(index, boxes)
+
+    def test_updates(self):
+        for index in self._indexes():
+            for k, pd in self.pds.items():
+                index.insert(k, pd)
+            for k in range(0, 300, 3):
+                index.remove(k)
+                del self.pds[k]
+            for k in range(1, 300, 3):
+                self.pds[k].transform(PD.transform_from_string('translate(100 -50) rotate(10)'))
+                index.insert(k, self.pds[k])
+            self.assertNotIn(0, index)
+            self.assertIn(1, index)
+            self._check(index, self._boxes())
+            with self.assertRaises(KeyError):
+                index.remove(0)
+            self.pds = {i: _random_pathdata(self.rnd) for i in range(300)}
+
+    def test_nearest_distance(self):
+        pd = PD.pathdata_from_string('M 0,0 L 100,100 M 60,0 L 100,0')
+        index = RTreeIndex()
+        index.insert('p', pd)
+        segs = list(pd.segments())
+
+        def distance(key, i):
+            _, x0, y0, x1, y1 = segs[i]
+            t = max(0, min(1, ((50 - x0) * (x1 - x0) + (10 - y0) * (y1 - y0)) / ((x1 - x0)**2 + (y1 - y0)**2)))
+            return math.hypot(50 - x0 - t * (x1 - x0), 10 - y0 - t * (y1 - y0))
+
+        # the box of the diagonal contains the point, but the other line is nearer
+        self.assertEqual(index.nearest(50, 10)[0][1], ('p', 1))
+        d, entry = index.nearest(50, 10, distance=distance)[0]
+        self.assertEqual(entry, ('p', 3))
+        self.assertAlmostEqual(d, math.hypot(10, 10))
+        self.assertEqual(index.nearest(50, 10, max_distance=5, distance=distance), [])
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            GridIndex(0)
+        with self.assertRaises(ValueError):
+            RTreeIndex(node_size=1)
+        self.assertEqual(GridIndex(1).nearest(0, 0), [])
+        self.assertEqual(RTreeIndex().query_point(0, 0), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,4 @@
-import unittest, contextlib, io, pathlib
+import unittest, contextlib, io, pathlib, tempfile
 
 from svgpdtools import PathData, Transform, precision, pathdata_from_string, transform_from_string
 from svgpdtools.terminal_command import _PathDataViewer, _IndentedBox, _arg_parses, _Args
@@ -65,8 +65,134 @@ class TestArgParser(unittest.TestCase):
         self.assertEqual(args.transform, '"scale(-1) translate(-10)"')
         self.assertEqual(args.precision, 3)
         self.assertEqual(args.index, [1, 2])
+
+    def test_argparse_clip_rect(self):
+        test = ['--clip-rect', '0', '-5', '10', '20', '-f', 'yama']
+        args = self.parser.parse_args(test, namespace=_Args())
+        self.assertEqual(args.clip_rect, [0, -5, 10, 20])
+        self.assertFalse(args.clip_split)
+        self.assertEqual(str(CMD._clip_rect(args)), '0 -5 10 20')
+
+    def test_target_size(self):
+        args = self.parser.parse_args(['--target-size', '16', '-f', 'yama'], namespace=_Args())
+        self.assertEqual(args.target_size, 16)
+        self.assertEqual(args.cull_area, .25)
+        self.assertEqual(CMD._viewport_size(CMD.AttributesImpl({'viewBox': '0 0 100,200'})), 200)
+        self.assertEqual(CMD._viewport_size(CMD.AttributesImpl({'width': '64px', 'height': '32'})), 64)
+        self.assertIsNone(CMD._viewport_size(CMD.AttributesImpl({'width': '100%', 'height': '100%'})))
+        precision(6)
+        pd = pathdata_from_string('M 0.123,0.456 L 100.789,100.321 M 50,50 h 0.5 v 0.5 z')
+        d = CMD._postprocessed_d(pd,
+                                 clip_rect=None, clip_split=False, scale=.16, cull_area=.25)
+        self.assertEqual(d, 'M 0.1,0.5 L 100.8,100.3')
+
+    def test_target_size_group_scale(self):
+        # the box of the first subpath is 3 by 3 pixels with the scale of
+        # the group, and 0.03 by 0.03 without it
+        svg = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">
+<g transform="scale(100)"><path d="M 0,0 h .3 v .3 z M 0,0 L 1,1"/></g>
+</svg>'''
+        with tempfile.TemporaryDirectory() as tmp:
+            src = pathlib.Path(tmp) / 'src.svg'
+            src.write_text(svg)
+            for args in ('transform', 'normalize', 'normalize --collapse-group-transforms',
+                         'normalize --collapse-transform-attribute'):
+                with self.subTest(args=args):
+                    stream = io.StringIO()
+                    with contextlib.redirect_stdout(stream):
+                        CMD.main(f'{args} --collapse-hv-lineto --target-size 10 -f {src}'.split())
+                    self.assertEqual(stream.getvalue().count('z') + stream.getvalue().count('Z'), 1)
         
 
+_GROUPS_SVG = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">
+<defs><g transform="scale(5)"><path id="p" d="M 0,0 L 1,0"/></g></defs>
+<g transform="translate(10 20)">
+<g transform="scale(2)">
+<path d="M 1,1 L 2,2" transform="translate(1)"/>
+<rect width="1" height="1"/>
+<use href="#p" transform="rotate(90)"/>
+<path d="M 0,0 L 1,1" clip-path="url(#c)"/>
+<svg x="1" viewBox="0 0 1 1"><path d="M 0,0 L 1,1"/></svg>
+</g>
+<g fill="url(#grad)" transform="scale(3)"><path d="M 0,0 L 1,1"/></g>
+<path d="M 0,0 h 5 v 5" transform="rotate(90)"/>
+</g>
+</svg>'''
+
+
+_IDS_SVG = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">
+<g transform="translate(10 20)">
+<path id="a" d="M 0,0 L 1,1" transform="scale(2)"/>
+<g id="b" transform="scale(3)"><path d="M 0,0 L 1,1"/></g>
+<path d="M 0,0 L 1,1"/>
+</g>
+<use href="#a" transform="translate(50)"/>
+<use href="#b"/>
+</svg>'''
+
+
+class TestGroupTransforms(unittest.TestCase):
+    def run_command(self, args, svg=_GROUPS_SVG):
+        stream = io.StringIO()
+        with tempfile.TemporaryDirectory() as tmp:
+            src = pathlib.Path(tmp) / 'src.svg'
+            src.write_text(svg)
+            with contextlib.redirect_stdout(stream):
+                CMD.main(f'normalize --collapse-group-transforms -f {src} {args}'.split())
+        return stream.getvalue().splitlines()[1:]
+
+    def test_collapse_group_transforms(self):
+        self.assertEqual(self.run_command('--collapse-hv-lineto'), [
+            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">',
+            '<defs><g transform="scale(5)"><path id="p" d="M 0,0 L 1,0"/></g></defs>',
+            '<g>',
+            '<g>',
+            '<path d="M 14,22 L 16,24"/>',
+            '<rect width="1" height="1" transform="matrix(2, 0, 0, 2, 10, 20)"/>',
+            '<use href="#p" transform="matrix(2, 0, 0, 2, 10, 20) rotate(90)"/>',
+            '<path clip-path="url(#c)" transform="matrix(2, 0, 0, 2, 10, 20)" d="M 0,0 L 1,1"/>',
+            '<g transform="matrix(2, 0, 0, 2, 10, 20)"><svg x="1" viewBox="0 0 1 1"><path d="M 0,0 L 1,1"/></svg></g>',
+            '</g>',
+            '<g fill="url(#grad)" transform="matrix(1, 0, 0, 1, 10, 20) scale(3)"><path d="M 0,0 L 1,1"/></g>',
+            '<path d="M 10,20 L 10,25 5,25"/>',
+            '</g>',
+            '</svg>',
+        ])
+
+    def test_ids(self):
+        # the elements cloned by use-elements keep their own coordinates
+        self.assertEqual(self.run_command('', _IDS_SVG), [
+            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">',
+            '<g>',
+            '<g transform="matrix(1, 0, 0, 1, 10, 20)"><path id="a" transform="scale(2)" d="M 0,0 L 1,1"/></g>',
+            '<g transform="matrix(1, 0, 0, 1, 10, 20)"><g id="b" transform="scale(3)"><path d="M 0,0 L 1,1"/></g></g>',
+            '<path d="M 10,20 L 11,21"/>',
+            '</g>',
+            '<use href="#a" transform="translate(50)"/>',
+            '<use href="#b"/>',
+            '</svg>',
+        ])
+
+    def test_untargeted_paths(self):
+        lines = self.run_command('-i 1')
+        self.assertEqual(lines[4], '<path d="M 14,22 L 16,24"/>')
+        self.assertEqual(lines[11], '<path d="M 0,0 h 5 v 5" transform="matrix(1, 0, 0, 1, 10, 20) rotate(90)"/>')
+
+    def test_ctm_stack(self):
+        ctms = CMD._CTMStack()
+        ctms.push(None)
+        ctms.push(Transform.translate(1, 2))
+        ctms.push(None)
+        attrs = ctms.with_ctm(CMD.AttributesImpl({'transform': 'scale(2)'}))
+        self.assertEqual(attrs['transform'], 'matrix(1, 0, 0, 1, 1, 2) scale(2)')
+        # the string is made once per level
+        self.assertIs(ctms.ctm_repr(-2), ctms.ctm_repr(-2))
+        ctms.pop()
+        self.assertEqual(ctms.pop().ctm_repr, 'matrix(1, 0, 0, 1, 1, 2)')
+        self.assertIsNone(ctms.top.ctm)
+        self.assertEqual(str(Transform.matrix(1, 2, 3, 4, 5, 6)), 'matrix(1, 2, 3, 4, 5, 6)')
+
+
 class TestCMDMainArgParseError(unittest.TestCase):
     def setUp(self):
         self.stream = io.StringIO()
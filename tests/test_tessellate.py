@@ -0,0 +1,177 @@
+import unittest, contextlib, io, math, pathlib, random, struct, tempfile
+from array import array
+
+import svgpdtools as PD
+from svgpdtools import npy
+from svgpdtools.tessellate import merge_meshes
+import svgpdtools.terminal_command as CMD
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _triangles(mesh):
+    vs, ids = mesh
+    for k in range(0, len(ids), 3):
+        yield [(vs[2*i], vs[2*i+1]) for i in ids[k:k+3]]
+
+
+def _signed_area(t):
+    (ax, ay), (bx, by), (cx, cy) = t
+    return ((bx - ax) * (cy - ay) - (cx - ax) * (by - ay)) / 2
+
+
+def _area(mesh):
+    return sum(abs(_signed_area(t)) for t in _triangles(mesh))
+
+
+def _covered(mesh, x, y):
+    n = 0
+    for (ax, ay), (bx, by), (cx, cy) in _triangles(mesh):
+        d1 = (bx - ax) * (y - ay) - (by - ay) * (x - ax)
+        d2 = (cx - bx) * (y - by) - (cy - by) * (x - bx)
+        d3 = (ax - cx) * (y - cy) - (ay - cy) * (x - cx)
+        if (d1 < 0 and d2 < 0 and d3 < 0) or (d1 > 0 and d2 > 0 and d3 > 0):
+            n += 1
+    return n
+
+
+_STAR = 'M 50,0 L 80,100 L 0,35 L 100,35 L 20,100 Z'
+
+
+class TestTessellate(unittest.TestCase):
+    def test_polygons(self):
+        square = PD.pathdata_from_string('M 0,0 h 10 v 10 h -10 z')
+        mesh = square.tessellate()
+        self.assertEqual(mesh[0].typecode, 'f')
+        self.assertEqual(mesh[1].typecode, 'I')
+        self.assertEqual(len(mesh[1]), 6)
+        self.assertEqual(len(mesh[0]), 8)
+        self.assertEqual(_area(mesh), 100)
+
+        # a hole drawn in the same direction is filled by nonzero
+        d = 'M 0,0 h 10 v 10 h -10 z M 2,2 h 6 v 6 h -6 z'
+        self.assertEqual(_area(PD.pathdata_from_string(d).tessellate()), 100)
+        self.assertEqual(_area(PD.pathdata_from_string(d).tessellate(fill_rule='evenodd')), 64)
+        d = 'M 0,0 h 10 v 10 h -10 z M 2,2 v 6 h 6 v -6 z'
+        self.assertEqual(_area(PD.pathdata_from_string(d).tessellate()), 64)
+
+        # open subpaths are closed, and lines have no area
+        self.assertEqual(_area(PD.pathdata_from_string('M 0,0 L 10,10 L 0,10').tessellate()), 50)
+        self.assertEqual(PD.pathdata_from_string('M 0,0 L 10,10').tessellate()[1], array('I'))
+
+        with self.assertRaises(ValueError):
+            square.tessellate(fill_rule='odd')
+
+    def test_fill_rules(self):
+        pd = PD.pathdata_from_string(_STAR)
+        rnd = random.Random(1)
+        points = [(rnd.uniform(0, 100), rnd.uniform(0, 100)) for _ in range(300)]
+        for fill_rule in ('nonzero', 'evenodd'):
+            mesh = pd.tessellate(fill_rule=fill_rule)
+            # no triangles overlap, and all wind the same way
+            self.assertTrue(all(_signed_area(t) <= 0 for t in _triangles(mesh)))
+            for (x, y), inside in zip(points, pd.contains_many(points, fill_rule)):
+                self.assertEqual(_covered(mesh, x, y), int(inside), (fill_rule, x, y))
+
+    def test_curves(self):
+        circle = PD.pathdata_from_string('M 0,-10 A 10,10 0 1 1 0,10 A 10,10 0 1 1 0,-10 z')
+        area = _area(circle.tessellate(.01))
+        self.assertLess(area, math.pi * 100)
+        self.assertAlmostEqual(area, math.pi * 100, delta=math.pi * 100 * .002)
+
+    def test_merge_meshes(self):
+        a = PD.pathdata_from_string('M 0,0 h 10 v 10 z').tessellate()
+        b = PD.pathdata_from_string('M 20,0 h 10 v 10 h -10 z').tessellate()
+        vertices, indices, offsets = merge_meshes([a, b])
+        self.assertEqual(list(offsets), [0, 1, 3])
+        self.assertEqual(list(vertices), list(a[0]) + list(b[0]))
+        self.assertEqual(list(indices), list(a[1]) + [i + len(a[0]) // 2 for i in b[1]])
+
+
+class TestNpy(unittest.TestCase):
+    def test_header(self):
+        header = npy.npy_header('<f4', (3, 2))
+        self.assertEqual(len(header) % 64, 0)
+        self.assertTrue(header.startswith(b'\x93NUMPY\x01\x00'))
+        self.assertEqual(struct.unpack('<H', header[8:10])[0], len(header) - 10)
+        self.assertIn(b"'shape': (3, 2)", header)
+        self.assertIn(b"'shape': (3,)", npy.npy_header('<u4', (3,)))
+        self.assertEqual(npy.dtype_of(array('I')), '<u4')
+        self.assertEqual(npy.dtype_of(array('d')), '<f8')
+        with self.assertRaises(ValueError):
+            npy.write_npy(io.BytesIO(), array('f', [1, 2, 3]), (2, 2))
+
+    @unittest.skipUnless(numpy, 'numpy is not installed')
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = pathlib.Path(tmp) / 'a.npy'
+            npy.save(path, array('f', [1, 2, 3, 4, 5, 6]), (3, 2))
+            a = numpy.load(path, mmap_mode='r')
+            self.assertEqual(a.dtype, numpy.float32)
+            self.assertEqual(a.tolist(), [[1, 2], [3, 4], [5, 6]])
+
+            path = pathlib.Path(tmp) / 'a.bin'
+            npy.save(path, array('I', [1, 2, 3]))
+            self.assertEqual(numpy.fromfile(path, dtype='<u4').tolist(), [1, 2, 3])
+
+
+_SVG = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">
+<defs><path id="p" d="M 0,0 h 10 v 10 z"/><clipPath id="clip"><path d="M 0,0 H 50 V 50 H 0 Z"/></clipPath></defs>
+<g fill-rule="evenodd">
+<path d="M 0,0 h 10 v 10 h -10 z M 2,2 h 6 v 6 h -6 z"/>
+<path d="M 0,0 h 10 v 10 h -10 z M 2,2 h 6 v 6 h -6 z" style="fill-rule: nonzero" transform="translate(20 0)"/>
+</g>
+<path d="M 0,0 h 10 v 10 h -10 z M 2,2 h 6 v 6 h -6 z"/>
+<g transform="translate(40 0)"><g transform="scale(2)">
+<path d="M 0,0 h 10 v 10 h -10 z" transform="translate(5 0)"/>
+</g></g>
+</svg>
+'''
+
+
+class TestTessellateCommand(unittest.TestCase):
+    def run_command(self, args):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = pathlib.Path(tmp) / 'src.svg'
+            src.write_text(_SVG)
+            with contextlib.redirect_stdout(io.StringIO()):
+                CMD.main(f'tessellate -f {src} -o {tmp}/icon.{{buffer}}.bin {args}'.split())
+            return [array(code, (pathlib.Path(tmp) / f'icon.{name}.bin').read_bytes())
+                    for name, code in (('vertices', 'f'), ('indices', 'I'), ('offsets', 'q'))]
+
+    def test_command(self):
+        vertices, indices, offsets = self.run_command('')
+        self.assertEqual(len(offsets), 5)
+        areas = [_area((vertices, indices[offsets[i]*3:offsets[i+1]*3])) for i in range(4)]
+        self.assertEqual(areas, [64, 100, 100, 400])
+        # the transform attribute is applied
+        xs = [vertices[2*i] for i in indices[offsets[1]*3:offsets[2]*3]]
+        self.assertEqual((min(xs), max(xs)), (20, 30))
+        # and those of the ancestors
+        xs = [vertices[2*i] for i in indices[offsets[3]*3:offsets[4]*3]]
+        self.assertEqual((min(xs), max(xs)), (50, 70))
+
+        vertices, indices, offsets = self.run_command('--fill-rule evenodd -- scale(2)')
+        areas = [_area((vertices, indices[offsets[i]*3:offsets[i+1]*3])) for i in range(4)]
+        self.assertEqual(areas, [256, 256, 256, 1600])
+        xs = [vertices[2*i] for i in indices[offsets[3]*3:offsets[4]*3]]
+        self.assertEqual((min(xs), max(xs)), (100, 140))
+
+    def test_templates(self):
+        # the contents of defs and clipPath give no triangles
+        vertices, indices, offsets = self.run_command('-i 0 1 2')
+        self.assertEqual(len(offsets), 2)
+        self.assertEqual(len(indices), 3 * offsets[-1])
+        self.assertEqual(_area((vertices, indices)), 64)
+
+    def test_command_without_output(self):
+        with self.assertRaises(SystemExit) as cm, contextlib.redirect_stderr(io.StringIO()):
+            CMD.main(['tessellate'])
+        self.assertEqual(cm.exception.code, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest, contextlib, io, pathlib, tempfile
+
+import svgpdtools as PD
+from svgpdtools.graphics import Rect
+from svgpdtools.tile import Spool, tile_rect, tiles_of, write_tiles
+import svgpdtools.terminal_command as CMD
+
+
+_SVG = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">
+<defs><path id="p" d="M 0,0 L 10,10"/><clipPath id="clip"><path d="M 0,0 H 50 V 50 H 0 Z"/></clipPath></defs>
+<g fill="none" stroke-width="1" transform="scale(2)">
+<path id="a" d="M 5,5 L 45,5 45,45" stroke="red"/>
+<path id="b" d="M 0,0 h 5 v 5 z" transform="translate(30 30)"/>
+<g style="stroke-dasharray: 1 2"><path id="c" d="M 5,30 C 10,35 15,35 20,30" style="opacity:.5; stroke:blue"/></g>
+</g>
+</svg>'''
+
+
+class TestTile(unittest.TestCase):
+    def setUp(self):
+        PD.precision(6)
+
+    def test_grid(self):
+        extent = Rect(10, 0, 110, 50)
+        self.assertEqual(tile_rect(extent, 0, 0, 0), Rect(10, 0, 110, 100))
+        self.assertEqual(tile_rect(extent, 2, 1, 3), Rect(35, 75, 60, 100))
+        self.assertEqual(list(tiles_of(extent, 1, Rect(20, 10, 70, 20))), [(0, 0), (1, 0)])
+        self.assertEqual(list(tiles_of(extent, 3, Rect(500, 500, 600, 600))), [])
+
+    def test_spool(self):
+        with Spool() as spool:
+            self.assertIsNone(spool.add(PD.PathData(), {}))
+            i = spool.add(PD.pathdata_from_string('M 1,2 l 3,4'), {'id': 'p', 'class': 'é'})
+            spool.add(PD.pathdata_from_string('M 5,5 h 10'), {})
+            self.assertEqual(len(spool), 2)
+            pd, attrs = spool.read(i)
+            self.assertEqual(str(pd), 'M 1,2 l 3,4')
+            self.assertEqual(attrs, {'id': 'p', 'class': 'é'})
+            self.assertEqual(spool.bbox(i), Rect(1, 2, 4, 6))
+            self.assertEqual(spool.extent(), Rect(1, 2, 15, 6))
+            path = spool.path
+        self.assertFalse(path.exists())
+
+    def test_write_tiles(self):
+        with tempfile.TemporaryDirectory() as tmp, Spool() as spool:
+            for i in range(4):
+                spool.add(PD.pathdata_from_string(f'M {i * 30},0 h 20 v 20 h -20 z'), {'id': str(i)})
+            # a subpath smaller than a pixel at zoom 0
+            spool.add(PD.pathdata_from_string('M 1,90 h .4 v .4 z'), {'id': 'dot'})
+
+            serial = write_tiles(spool, tmp, [0, 1], tile_size=100, executor='serial')
+            self.assertEqual([str(p.relative_to(tmp)) for p in serial],
+                             ['0/0/0.svg', '1/0/0.svg', '1/0/1.svg', '1/1/0.svg'])
+            texts = [p.read_text() for p in serial]
+            self.assertNotIn('dot', texts[0])
+            self.assertIn('viewBox="0 0 55 55"', texts[1])
+            self.assertIn('<path id="dot" d="M 1,90 h 0.4 v 0.4 z"/>', texts[2])
+            self.assertIn('<path id="2" d="M 60,0 h 20 v 20 h -20 z"/>', texts[3])
+
+            processes = write_tiles(spool, tmp, [0, 1], tile_size=100, executor='process', max_workers=2)
+            self.assertEqual(processes, serial)
+            self.assertEqual([p.read_text() for p in processes], texts)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = pathlib.Path(tmp) / 'src.svg'
+            src.write_text(_SVG)
+            with contextlib.redirect_stdout(io.StringIO()):
+                CMD.main(f'tile -f {src} --out-dir {tmp}/out --zoom 0 1 --clip-split --jobs 1'.split())
+            out = pathlib.Path(tmp) / 'out'
+            self.assertEqual(sorted(str(p.relative_to(out)) for p in out.rglob('*.svg')),
+                             ['0/0/0.svg', '1/0/0.svg', '1/0/1.svg', '1/1/0.svg', '1/1/1.svg'])
+            # the contents of defs and clipPath are not drawn
+            tile = (out / '0' / '0' / '0.svg').read_text()
+            self.assertEqual(tile.count('<path'), 3)
+            self.assertNotIn('id="p"', tile)
+            tile = (out / '1' / '1' / '1.svg').read_text()
+            self.assertIn('viewBox="50 50 50 50" width="256" height="256"', tile)
+            # the transforms and the inherited properties of the groups
+            # apply, and the stroke lengths are scaled
+            self.assertIn('<path id="a" fill="none" stroke-width="2" stroke="red" d="M 90,50 L 90,90"/>', tile)
+            self.assertIn('<path id="b" fill="none" stroke-width="2" d="M 60,60 l 10,0 l 0,10 z"/>', tile)
+            tile = (out / '1' / '0' / '1.svg').read_text()
+            self.assertIn('<path id="c" style="opacity:.5" fill="none" stroke-width="2" stroke-dasharray="2 4" '
+                          'stroke="blue" d="M 10,60 C 20,70 30,70 40,60"/>', tile)
+
+    def test_command_without_out_dir(self):
+        with self.assertRaises(SystemExit) as cm, contextlib.redirect_stderr(io.StringIO()):
+            CMD.main(['tile'])
+        self.assertEqual(cm.exception.code, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
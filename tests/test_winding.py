@@ -0,0 +1,94 @@
+import unittest, math, random, sys
+from unittest import mock
+
+import svgpdtools as PD
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _polygon_winding(coords, offsets, x, y):
+    # winding number of the flattened subpaths, each closed
+    w = 0
+    for k in range(len(offsets) - 1):
+        ps = [(coords[2*i], coords[2*i+1]) for i in range(offsets[k], offsets[k+1])]
+        for (x0, y0), (x1, y1) in zip(ps, ps[1:] + ps[:1]):
+            if y0 <= y < y1 and (x1 - x0) * (y - y0) - (x - x0) * (y1 - y0) > 0:
+                w += 1
+            elif y1 <= y < y0 and (x1 - x0) * (y - y0) - (x - x0) * (y1 - y0) < 0:
+                w -= 1
+    return w
+
+
+_SHAPES = [
+    'M 0,0 h 10 v 10 h -10 z M 2,2 h 6 v 6 h -6 z',
+    'M 0,0 h 10 v 10 h -10 z M 2,2 v 6 h 6 v -6 z',
+    'M 0,5 C 0,-2 10,-2 10,5 S 0,12 0,5 M 3,5 Q 5,0 7,5 T 3,5',
+    'M 0,5 A 5,5 0 1 1 10,5 A 5,5 0 1 1 0,5 M 2,5 a 3,2 30 1 0 6,0 a 3,2 30 1 0 -6,0',
+    'M 1,1 L 9,1 1,9 9,9',
+    'M 0,0 L 10,3 2,8 8,1 5,10 z',
+]
+
+
+class TestWinding(unittest.TestCase):
+    def _points(self, n=400):
+        rnd = random.Random(3)
+        return [(rnd.uniform(-1, 11), rnd.uniform(-2, 12)) for _ in range(n)]
+
+    def test_contains(self):
+        for d in _SHAPES:
+            pd = PD.pathdata_from_string(d)
+            coords, offsets = pd.flatten(1e-4)
+            for x, y in self._points():
+                w = _polygon_winding(coords, offsets, x, y)
+                # points near the outline may differ from the polygon
+                if any(math.hypot(x - coords[2*i], y - coords[2*i+1]) < .01 for i in range(len(coords) // 2)):
+                    continue
+                self.assertEqual(pd.contains(x, y), w != 0, (d, x, y))
+                self.assertEqual(pd.contains(x, y, fill_rule='evenodd'), w % 2 == 1, (d, x, y))
+
+    def test_simple(self):
+        pd = PD.pathdata_from_string('M 0,0 h 10 v 10 h -10 z M 2,2 h 6 v 6 h -6 z')
+        self.assertTrue(pd.contains(1, 1))
+        self.assertTrue(pd.contains(5, 5))
+        self.assertFalse(pd.contains(5, 5, 'evenodd'))
+        self.assertFalse(pd.contains(11, 5))
+        # a vertex on the ray is crossed once
+        pd = PD.pathdata_from_string('M 5,0 L 10,5 5,10 0,5 z')
+        self.assertTrue(pd.contains(4, 5))
+        self.assertFalse(pd.contains(-1, 5))
+        self.assertFalse(pd.contains(-1, 0))
+        self.assertFalse(PD.PathData().contains(0, 0))
+        with self.assertRaises(ValueError):
+            pd.contains(5, 5, 'even-odd')
+
+    def test_cache(self):
+        pd = PD.pathdata_from_string('M 0,0 l 10,0 0,10 -10,0 z')
+        self.assertTrue(pd.contains(5, 5))
+        pd.transform(PD.transform_from_string('translate(20)'))
+        self.assertFalse(pd.contains(5, 5))
+        self.assertTrue(pd.contains(25, 5))
+
+    def test_contains_many(self):
+        points = self._points()
+        for d in _SHAPES:
+            pd = PD.pathdata_from_string(d)
+            expected = [pd.contains(x, y, 'evenodd') for x, y in points]
+            with mock.patch.dict(sys.modules, {'numpy': None}):
+                self.assertEqual(pd.contains_many(points, 'evenodd'), expected)
+        self.assertEqual(pd.contains_many([]), [])
+
+    @unittest.skipUnless(numpy, 'numpy is not installed')
+    def test_contains_many_numpy(self):
+        points = self._points()
+        for d in _SHAPES:
+            pd = PD.pathdata_from_string(d)
+            expected = [pd.contains(x, y) for x, y in points]
+            self.assertEqual(pd.contains_many(numpy.array(points)), expected)
+            self.assertEqual(pd.contains_many(points), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest, pickle, copy, pathlib, subprocess, sys
+
+import svgpdtools as PD
+import svgpdtools.wire as W
+
+
+class TestWire(unittest.TestCase):
+    def setUp(self):
+        PD.precision(6)
+        self.srcs = [
+            'm 10,20 10,-10 v 60 m -10,0 l 20,0 m 20,-60 c -10,0 -20,10 -20,30 0,20 10,30 20,30 C 60,70 70,60 70,40 c 0,-20 -10,-30 -20,-30 z m 0,10 v 40',
+            'M 45,30 Q 35,30 35,40 q 0,10 10,10 z m 10,20 q 10,0 10,-10 0,-10 -10,-10 z',
+            'm 30,45 a 20 20 0 11 20,0 z m 20,0 a 25 15 25 11 -20,0 24 12 345 10 20,0 m 5,-20 -30,0 m 15,0 0,15',
+            'M 0,0 S 10,10 20,0 T 40,0 H 50 h 5 V 10 v 5',
+        ]
+
+    def assertSamePathData(self, pd1: PD.PathData, pd2: PD.PathData):
+        self.assertEqual(str(pd1), str(pd2))
+        self.assertEqual(pd1._absolutized, pd2._absolutized)
+        self.assertEqual(W.dumps(pd1), W.dumps(pd2))
+        self.assertEqual([cmd.repr_relative for cmd in pd1], [cmd.repr_relative for cmd in pd2])
+
+    def test_roundtrip(self):
+        for src in self.srcs:
+            pd = PD.pathdata_from_string(src)
+            self.assertSamePathData(W.loads(W.dumps(pd)), pd)
+
+    def test_roundtrip_after_operations(self):
+        t = PD.Transform.rotate(60, 40, 40)
+        for src in self.srcs:
+            pd = PD.pathdata_from_string(src)
+            pd.transform(t, noexception=True)
+            self.assertSamePathData(W.loads(W.dumps(pd)), pd)
+
+            pd = PD.pathdata_from_string(src)
+            pd.normalize(collapse_hv_lineto=True)
+            self.assertSamePathData(W.loads(W.dumps(pd)), pd)
+
+    def test_decoded_is_usable(self):
+        pd = W.loads(W.dumps(PD.pathdata_from_string(self.srcs[0])))
+        pd.normalize()
+        self.assertEqual(str(pd), 'M 10,20 L 20,10 V 70 M 10,70 L 30,70 M 50,10 C 40,10 30,20 30,40 30,60 40,70 50,70 60,70 70,60 70,40 70,20 60,10 50,10 Z M 50,20 V 60')
+
+    def test_pickle(self):
+        for src in self.srcs:
+            pd = PD.pathdata_from_string(src)
+            self.assertSamePathData(pickle.loads(pickle.dumps(pd)), pd)
+            self.assertSamePathData(copy.deepcopy(pd), pd)
+
+    def test_layout(self):
+        pd = PD.pathdata_from_string('M 1,2 L 3,4 z')
+        pd.normalize()
+        blob = W.dumps(pd)
+        self.assertEqual(blob[:4], W.MAGIC)
+        self.assertEqual(len(blob), 16 + 8*4 + 4*3 + 3)
+        self.assertEqual(memoryview(blob)[16:48].cast('d').tolist(), [1., 2., 3., 4.])
+        self.assertEqual(blob[-3:], b'MLZ')
+        self.assertEqual(str(W.loads(blob + b'\0' * 5)), 'M 1,2 L 3,4 Z')
+
+    def test_errors(self):
+        with self.assertRaises(Exception):
+            W.loads(b'XXXX' + bytes(12))
+        with self.assertRaises(Exception):
+            W.loads(W.dumps(PD.pathdata_from_string('M 1,2 L 3,4 z'))[:-1])
+
+    def test_shared_memory(self):
+        pd = PD.pathdata_from_string(self.srcs[2])
+        shm = W.to_shared_memory(pd)
+        try:
+            self.assertSamePathData(W.from_shared_memory(shm.name), pd)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_shared_memory_owner(self):
+        # a process reading the block does not unlink it at its exit
+        pd = PD.pathdata_from_string(self.srcs[2])
+        shm = W.to_shared_memory(pd)
+        try:
+            self.assertEqual(self._run_python(f'wire.from_shared_memory({shm.name!r})'), '')
+            self.assertSamePathData(W.from_shared_memory(shm.name), pd)
+        finally:
+            shm.close()
+            shm.unlink()
+
+        # nor does the creator reading it confuse its own resource tracker
+        self.assertEqual(self._run_python(
+            'import svgpdtools as PD; shm = wire.to_shared_memory(PD.pathdata_from_string("M 1,2 L 3,4")); '
+            'wire.from_shared_memory(shm.name); shm.close(); shm.unlink()'), '')
+
+    def _run_python(self, code):
+        result = subprocess.run([sys.executable, '-c', 'from svgpdtools import wire; ' + code],
+                                capture_output=True, text=True, cwd=pathlib.Path(__file__).parent.parent)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stderr
+
+
+if __name__ == '__main__':
+    unittest.main()